@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('centres', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', 'centre'], name='accounts_profile_role_ctr_idx'),
+        ),
+    ]
@@ -20,6 +20,11 @@ class UserProfile(models.Model):
     centre = models.ForeignKey(Centre, null=True, blank=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["role", "centre"], name="accounts_profile_role_ctr_idx"),
+        ]
+
     def clean(self):
         super().clean()
         if self.role in {UserRole.STAFF, UserRole.ADMIN} and self.centre_id is None:
@@ -2,9 +2,11 @@ from django.urls import path
 
 from .views import (
     StaffAggregateMissedView,
+    StaffCentreExportView,
     StaffParentSessionsView,
     StaffParentsView,
     StaffPasswordResetView,
+    StaffSoundHeatmapView,
 )
 
 urlpatterns = [
@@ -16,4 +18,10 @@ urlpatterns = [
         StaffAggregateMissedView.as_view(),
         name="staff-centre-aggregate-missed",
     ),
+    path(
+        "staff/centres/<int:centre_id>/sound-heatmap/",
+        StaffSoundHeatmapView.as_view(),
+        name="staff-centre-sound-heatmap",
+    ),
+    path("staff/centres/<int:centre_id>/export/", StaffCentreExportView.as_view(), name="staff-centre-export"),
 ]
@@ -1,3 +1,64 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.centres.models import Centre
+from apps.practice.models import PracticeSession
+
+from .models import UserRole
+
+
+class StaffListingTests(TestCase):
+    def setUp(self):
+        self.centre = Centre.objects.create(name="North", code="N")
+        staff = User.objects.create_user("staff", password="secret")
+        staff.profile.role = UserRole.STAFF
+        staff.profile.centre = self.centre
+        staff.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+        self.parents = []
+        for username in ("carol", "alice", "bob"):
+            parent = User.objects.create_user(username, password="secret")
+            parent.profile.centre = self.centre
+            parent.profile.save()
+            self.parents.append(parent)
+        User.objects.create_user("elsewhere", password="secret")
+
+    def test_parents_without_paging_keep_the_list_shape(self):
+        response = self.client.get("/api/staff/parents/")
+        self.assertEqual([row["username"] for row in response.json()], ["alice", "bob", "carol"])
+
+    def test_parents_page_with_a_cursor(self):
+        first = self.client.get("/api/staff/parents/", {"page_size": 2}).json()
+        self.assertEqual([row["username"] for row in first["results"]], ["alice", "bob"])
+        second = self.client.get("/api/staff/parents/", {"page_size": 2, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([row["username"] for row in second["results"]], ["carol"])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(self.client.get("/api/staff/parents/", {"cursor": "!!!"}).status_code, 400)
+
+    def test_parent_sessions_page_through_tied_start_times(self):
+        parent = self.parents[0]
+        started = timezone.now() - timedelta(days=1)
+        sessions = PracticeSession.objects.bulk_create(
+            [PracticeSession(created_by=parent, started_at=started) for _ in range(3)]
+        )
+        url = f"/api/staff/parents/{parent.id}/sessions/"
+
+        unpaged = self.client.get(url).json()
+        self.assertNotIn("practice_next_cursor", unpaged)
+        self.assertEqual([row["id"] for row in unpaged["practice_sessions"]], [s.id for s in reversed(sessions)])
 
-# Create your tests here.
+        seen, params = [], {"page_size": 2}
+        while True:
+            body = self.client.get(url, params).json()
+            seen += [row["id"] for row in body["practice_sessions"]]
+            self.assertIsNone(body["screening_next_cursor"])
+            if body["practice_next_cursor"] is None:
+                break
+            params["practice_cursor"] = body["practice_next_cursor"]
+        self.assertEqual(seen, [s.id for s in reversed(sessions)])
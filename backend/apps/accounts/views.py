@@ -3,15 +3,24 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
 from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
+from django.views.decorators.gzip import gzip_page
 from rest_framework import permissions, status
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.analytics.export import EXPORT_FORMATS, parse_cursor, stream_attempts
+from apps.analytics.heatmap import sound_group_heatmap
+from apps.analytics.models import AttemptSource
+from apps.analytics.rollups import centre_missed_report
+from apps.common.pagination import paginate_request, paging_requested
+from apps.lexicon.services import phoneme_filters_from
 from apps.practice.models import PracticeSession
 from apps.screening.models import ScreeningSession
 
@@ -115,6 +124,11 @@ class StaffParentsView(APIView):
             if centre_id:
                 queryset = queryset.filter(centre_id=centre_id)
 
+        paged = paging_requested(request)
+        if paged:
+            profiles, next_cursor = paginate_request(request, queryset, ("user__username",))
+        else:
+            profiles = queryset.order_by("user__username")
         data = [
             {
                 "user_id": p.user_id,
@@ -122,9 +136,9 @@ class StaffParentsView(APIView):
                 "centre_id": p.centre_id,
                 "centre_name": p.centre.name if p.centre else None,
             }
-            for p in queryset.order_by("user__username")
+            for p in profiles
         ]
-        return Response(data)
+        return Response({"results": data, "next_cursor": next_cursor} if paged else data)
 
 
 class StaffParentSessionsView(APIView):
@@ -146,60 +160,137 @@ class StaffParentSessionsView(APIView):
                 return Response({"detail": "Parent is outside your centre."}, status=status.HTTP_403_FORBIDDEN)
 
         practice_sessions = PracticeSession.objects.filter(created_by=parent, started_at__gte=since)
-        screening_sessions = ScreeningSession.objects.filter(created_by=parent, started_at__gte=since)
+        screening_sessions = ScreeningSession.objects.filter(
+            created_by=parent, started_at__gte=since
+        ).select_related("age_band")
+        ordering = ("-started_at", "-id")
+        paged = paging_requested(request, ("practice_cursor", "screening_cursor"))
+        if paged:
+            practice_sessions, practice_next_cursor = paginate_request(
+                request, practice_sessions, ordering, cursor_param="practice_cursor"
+            )
+            screening_sessions, screening_next_cursor = paginate_request(
+                request, screening_sessions, ordering, cursor_param="screening_cursor"
+            )
+        else:
+            practice_sessions = practice_sessions.order_by(*ordering)
+            screening_sessions = screening_sessions.order_by(*ordering)
+
+        data = {
+            "parent_id": parent.id,
+            "username": parent.username,
+            "practice_sessions": [
+                {
+                    "id": s.id,
+                    "session_type": s.session_type,
+                    "started_at": s.started_at,
+                    "submitted_at": s.submitted_at,
+                }
+                for s in practice_sessions
+            ],
+            "screening_sessions": [
+                {
+                    "id": s.id,
+                    "age_band": s.age_band.label,
+                    "started_at": s.started_at,
+                    "submitted_at": s.submitted_at,
+                }
+                for s in screening_sessions
+            ],
+        }
+        if paged:
+            data["practice_next_cursor"] = practice_next_cursor
+            data["screening_next_cursor"] = screening_next_cursor
+        return Response(data)
+
+
+class StaffAggregateMissedView(APIView):
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request, centre_id):
+        days = int(request.query_params.get("days", 30))
+        # Rollups are per day and are refreshed by refresh_centre_rollups, not at submit time.
+        since = timezone.localdate() - timedelta(days=days)
+
+        requester = request.user
+        if not requester.is_superuser and requester.profile.centre_id != centre_id:
+            return Response({"detail": "You do not have access to this centre."}, status=status.HTTP_403_FORBIDDEN)
 
+        source = request.query_params.get("source")
+        if source and source.upper() not in AttemptSource.values:
+            return Response({"detail": "source must be practice or screening."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            phonemes = phoneme_filters_from(request.query_params)
+        except ValueError:
+            return Response({"detail": "tone and position must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = centre_missed_report(centre_id, since, sources=[source.upper()] if source else None, phonemes=phonemes)
         return Response(
             {
-                "parent_id": parent.id,
-                "username": parent.username,
-                "practice_sessions": [
-                    {
-                        "id": s.id,
-                        "session_type": s.session_type,
-                        "started_at": s.started_at,
-                        "submitted_at": s.submitted_at,
-                    }
-                    for s in practice_sessions.order_by("-started_at")
-                ],
-                "screening_sessions": [
-                    {
-                        "id": s.id,
-                        "age_band": s.age_band.label,
-                        "started_at": s.started_at,
-                        "submitted_at": s.submitted_at,
-                    }
-                    for s in screening_sessions.select_related("age_band").order_by("-started_at")
-                ],
+                "centre_id": centre_id,
+                "days": days,
+                "results": report["words"],
+                "sound_groups": report["sound_groups"],
+                "age_bands": report["age_bands"],
             }
         )
 
 
-class StaffAggregateMissedView(APIView):
+class StaffSoundHeatmapView(APIView):
     permission_classes = [IsStaffOrAdmin]
 
     def get(self, request, centre_id):
-        days = int(request.query_params.get("days", 30))
-        since = timezone.now() - timedelta(days=days)
+        try:
+            weeks = int(request.query_params.get("weeks", 12))
+        except ValueError:
+            weeks = None
+        if weeks is None or not 1 <= weeks <= 104:
+            return Response({"detail": "weeks must be between 1 and 104."}, status=status.HTTP_400_BAD_REQUEST)
 
         requester = request.user
         if not requester.is_superuser and requester.profile.centre_id != centre_id:
             return Response({"detail": "You do not have access to this centre."}, status=status.HTTP_403_FORBIDDEN)
 
-        practice_attempts = (
-            PracticeSession.objects.filter(centre_id=centre_id, started_at__gte=since)
-            .values("attempts__word_id", "attempts__word__hanzi", "attempts__word__jyutping")
-            .annotate(missed=Count("attempts", filter=Q(attempts__is_correct=False)))
-            .filter(missed__gt=0)
-            .order_by("-missed")
-        )
+        source = request.query_params.get("source")
+        if source and source.upper() not in AttemptSource.values:
+            return Response({"detail": "source must be practice or screening."}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = [
-            {
-                "word_id": row["attempts__word_id"],
-                "hanzi": row["attempts__word__hanzi"],
-                "jyutping": row["attempts__word__jyutping"],
-                "missed_count": row["missed"],
-            }
-            for row in practice_attempts
-        ]
-        return Response({"centre_id": centre_id, "days": days, "results": data})
+        try:
+            phonemes = phoneme_filters_from(request.query_params)
+        except ValueError:
+            return Response({"detail": "tone and position must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        heatmap = sound_group_heatmap(centre_id, weeks, sources=[source.upper()] if source else None, phonemes=phonemes)
+        return Response({"centre_id": centre_id, **heatmap})
+
+
+class StaffCentreExportView(APIView):
+    permission_classes = [IsStaffOrAdmin]
+
+    # Compresses the stream chunk by chunk for clients that send Accept-Encoding: gzip.
+    @method_decorator(gzip_page)
+    def get(self, request, centre_id):
+        requester = request.user
+        if not requester.is_superuser and requester.profile.centre_id != centre_id:
+            return Response({"detail": "You do not have access to this centre."}, status=status.HTTP_403_FORBIDDEN)
+
+        # ``format`` is taken by DRF's content negotiation.
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response({"detail": "output must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = request.query_params.get("since")
+        if since:
+            since = parse_date(since)
+            if since is None:
+                return Response({"detail": "since must be a date (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        after = parse_cursor(request.query_params.get("cursor"))
+        content_type = "text/csv" if output == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(
+            stream_attempts(centre_id, output=output, after=after, since=since),
+            content_type=f"{content_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="centre-{centre_id}-attempts.{output}"'
+        return response
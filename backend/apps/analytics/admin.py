@@ -1,3 +1,62 @@
 from django.contrib import admin
 
-# Analytics admin models will be added when summary tables are introduced.
+from apps.accounts.models import UserRole
+
+from .models import CentreWordDailyStats, CentreWordMonthlyStats, UserWordDailyStats, UserWordStats
+
+
+def _is_full_admin(request):
+    if request.user.is_superuser:
+        return True
+    profile = getattr(request.user, "profile", None)
+    return bool(profile and profile.role == UserRole.ADMIN)
+
+
+class CentreScopedStatsAdmin(admin.ModelAdmin):
+    raw_id_fields = ("user", "word")
+    search_fields = ("user__username", "word__hanzi", "word__jyutping")
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related("user", "word")
+        if _is_full_admin(request):
+            return queryset
+        profile = getattr(request.user, "profile", None)
+        if not profile or profile.role != UserRole.STAFF:
+            return queryset.none()
+        return queryset.filter(user__profile__centre_id=profile.centre_id)
+
+
+@admin.register(UserWordStats)
+class UserWordStatsAdmin(CentreScopedStatsAdmin):
+    list_display = ("user", "word", "attempts", "misses", "last_seen_at", "last_missed_at")
+
+
+@admin.register(UserWordDailyStats)
+class UserWordDailyStatsAdmin(CentreScopedStatsAdmin):
+    list_display = ("user", "word", "source", "day", "attempts", "misses")
+    list_filter = ("source", "day")
+
+
+class CentreRollupAdmin(admin.ModelAdmin):
+    list_filter = ("source",)
+    raw_id_fields = ("word",)
+    search_fields = ("word__hanzi", "word__jyutping")
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related("centre", "word")
+        if _is_full_admin(request):
+            return queryset
+        profile = getattr(request.user, "profile", None)
+        if not profile or profile.role != UserRole.STAFF:
+            return queryset.none()
+        return queryset.filter(centre_id=profile.centre_id)
+
+
+@admin.register(CentreWordDailyStats)
+class CentreWordDailyStatsAdmin(CentreRollupAdmin):
+    list_display = ("centre", "day", "source", "age_band_key", "word", "attempts", "misses")
+
+
+@admin.register(CentreWordMonthlyStats)
+class CentreWordMonthlyStatsAdmin(CentreRollupAdmin):
+    list_display = ("centre", "month", "source", "age_band_key", "word", "attempts", "misses")
@@ -0,0 +1,240 @@
+"""Columnar ``.npy`` dumps of submitted attempts for offline analysis.
+
+A dump directory holds one sub-directory per source with one ``.npy`` file per
+column, and a ``manifest.json`` recording how many rows each source has, the last
+attempt id written, and the centre and age band dictionaries. Later dumps append
+the attempts after that id to the same files, so analysis jobs can memory-map the
+columns with ``load_attempt_arrays`` instead of querying the database.
+
+Every ``.npy`` file has a fixed-size header, so appending writes the new rows at
+the end and rewrites the header's row count in place. The manifest is replaced
+last, and the loader reads only the rows it lists, so an interrupted dump leaves
+nothing visible that the next dump will not truncate and write again.
+"""
+
+import json
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from django.db.models import F, IntegerField, Max, Value
+
+from apps.centres.models import Centre
+from apps.practice.models import PracticeAttempt
+from apps.screening.models import AgeBand, ScreeningAttempt
+
+from .models import AttemptSource
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DUMP_BATCH = 100_000
+# Seconds to wait after reading the highest attempt id, so submits that were still
+# committing lower ids are visible before the dump reads past them.
+DUMP_SETTLE_SECONDS = 5.0
+# Magic, version and header length plus the padded header dict; a multiple of 64 as the format recommends.
+HEADER_BYTES = 128
+SOURCES = {
+    AttemptSource.PRACTICE: PracticeAttempt,
+    AttemptSource.SCREENING: ScreeningAttempt,
+}
+COLUMNS = {
+    "attempt_id": np.dtype("<i8"),
+    "session_id": np.dtype("<i8"),
+    "user_id": np.dtype("<i8"),
+    # Microseconds since the Unix epoch, UTC.
+    "submitted_at": np.dtype("<i8"),
+    "word_id": np.dtype("<i4"),
+    "position": np.dtype("<i2"),
+    # Index into the manifest's ``centres``, or -1 for a session without a centre.
+    "centre": np.dtype("<i4"),
+    # Index into the manifest's ``age_bands``, or -1 for practice.
+    "age_band": np.dtype("<i2"),
+    # Bit-packed with ``np.packbits``, eight attempts per byte; see ``unpack_correct``.
+    "is_correct": np.dtype("u1"),
+}
+PACKED_COLUMNS = {"is_correct"}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class AttemptArrays(NamedTuple):
+    rows: int
+    # ``{column: read-only memmap}``; ``is_correct`` is still bit-packed.
+    columns: dict
+    centres: list
+    age_bands: list
+
+
+def _stored_length(column, rows):
+    return (rows + 7) // 8 if column in PACKED_COLUMNS else rows
+
+
+def _header(dtype, length):
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.lib.format.dtype_to_descr(dtype), length)
+    prefix = np.lib.format.magic(1, 0)
+    padded = text.ljust(HEADER_BYTES - len(prefix) - 3) + "\n"
+    return prefix + struct.pack("<H", len(padded)) + padded.encode("latin1")
+
+
+def _append_column(path, column, values, rows):
+    """Write ``values`` after the first ``rows`` rows of ``path``, dropping anything past them."""
+    dtype = COLUMNS[column]
+    if not path.exists():
+        path.write_bytes(_header(dtype, 0))
+    with path.open("r+b") as handle:
+        if column in PACKED_COLUMNS:
+            offset = HEADER_BYTES + rows // 8
+            partial = rows % 8
+            bits = np.asarray(values, dtype=bool)
+            if partial:
+                # The last stored byte holds the first bits of the next one; unpack and repack it.
+                handle.seek(offset)
+                stored = np.unpackbits(np.frombuffer(handle.read(1), dtype=np.uint8), count=partial)
+                bits = np.concatenate([stored.astype(bool), bits])
+            data = np.packbits(bits)
+        else:
+            offset = HEADER_BYTES + rows * dtype.itemsize
+            data = np.asarray(values, dtype=dtype)
+        handle.truncate(offset)
+        handle.seek(offset)
+        handle.write(data.tobytes())
+        handle.seek(0)
+        handle.write(_header(dtype, _stored_length(column, rows + len(values))))
+
+
+def read_manifest(directory):
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return {
+            "version": MANIFEST_VERSION,
+            "sources": {source.lower(): {"rows": 0, "last_id": 0} for source in SOURCES},
+            "centres": [],
+            "age_bands": [],
+        }
+    manifest = json.loads(path.read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported attempt array manifest version: {manifest.get('version')}.")
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    path = Path(directory) / MANIFEST_NAME
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(manifest, indent=2))
+    os.replace(temporary, path)
+
+
+def _encoder(entries, model, label_field):
+    """``id -> code`` for a manifest dictionary, adding unseen ids to ``entries`` in first-seen order."""
+    codes = {entry["id"]: code for code, entry in enumerate(entries)}
+
+    def encode(object_id):
+        if object_id is None:
+            return -1
+        if object_id not in codes:
+            label = model.objects.filter(pk=object_id).values_list(label_field, flat=True).first()
+            codes[object_id] = len(entries)
+            entries.append({"id": object_id, "label": label})
+        return codes[object_id]
+
+    return encode
+
+
+def _microseconds(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _attempt_rows(model, after_id, through_id):
+    age_band = F("session__age_band_id") if model is ScreeningAttempt else Value(None, output_field=IntegerField())
+    return (
+        model.objects.filter(id__gt=after_id, id__lte=through_id, session__submitted_at__isnull=False)
+        .annotate(dump_age_band=age_band)
+        .order_by("id")
+        .values_list(
+            "id",
+            "session_id",
+            "session__created_by_id",
+            "session__submitted_at",
+            "word_id",
+            "position",
+            "session__centre_id",
+            "dump_age_band",
+            "is_correct",
+        )
+    )
+
+
+def _write_batch(directory, manifest, source, batch, encode_centre, encode_age_band):
+    state = manifest["sources"][source.lower()]
+    attempt_ids, session_ids, user_ids, submitted, word_ids, positions, centres, age_bands, correct = zip(*batch)
+    columns = {
+        "attempt_id": attempt_ids,
+        "session_id": session_ids,
+        "user_id": user_ids,
+        "submitted_at": [_microseconds(value) for value in submitted],
+        "word_id": word_ids,
+        "position": positions,
+        "centre": [encode_centre(value) for value in centres],
+        "age_band": [encode_age_band(value) for value in age_bands],
+        "is_correct": correct,
+    }
+    source_directory = Path(directory) / source.lower()
+    source_directory.mkdir(parents=True, exist_ok=True)
+    for column, values in columns.items():
+        _append_column(source_directory / f"{column}.npy", column, values, state["rows"])
+    state["rows"] += len(batch)
+    state["last_id"] = attempt_ids[-1]
+    _write_manifest(directory, manifest)
+
+
+def dump_attempt_arrays(directory, batch_size=DUMP_BATCH, settle_seconds=DUMP_SETTLE_SECONDS):
+    """Append attempts submitted since the last dump in ``directory``; returns ``{source: rows appended}``."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(directory)
+    encode_centre = _encoder(manifest["centres"], Centre, "code")
+    encode_age_band = _encoder(manifest["age_bands"], AgeBand, "label")
+
+    latest = {source: model.objects.aggregate(latest=Max("id"))["latest"] or 0 for source, model in SOURCES.items()}
+    if settle_seconds:
+        time.sleep(settle_seconds)
+
+    appended = {}
+    for source, model in SOURCES.items():
+        state = manifest["sources"][source.lower()]
+        before = state["rows"]
+        batch = []
+        for row in _attempt_rows(model, state["last_id"], latest[source]).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _write_batch(directory, manifest, source, batch, encode_centre, encode_age_band)
+                batch = []
+        if batch:
+            _write_batch(directory, manifest, source, batch, encode_centre, encode_age_band)
+        appended[source] = state["rows"] - before
+    return appended
+
+
+def load_attempt_arrays(directory, source):
+    """Memory-map one source's columns from a dump; no column is read until it is used."""
+    manifest = read_manifest(directory)
+    rows = manifest["sources"][source.lower()]["rows"]
+    source_directory = Path(directory) / source.lower()
+    columns = {}
+    if rows:
+        for column in COLUMNS:
+            # Slicing a memmap is a view, so rows an interrupted dump wrote past the manifest stay hidden.
+            array = np.load(source_directory / f"{column}.npy", mmap_mode="r")
+            columns[column] = array[: _stored_length(column, rows)]
+    else:
+        columns = {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+    return AttemptArrays(rows, columns, manifest["centres"], manifest["age_bands"])
+
+
+def unpack_correct(arrays):
+    """``is_correct`` as a boolean array with one entry per row."""
+    return np.unpackbits(arrays.columns["is_correct"], count=arrays.rows).astype(bool)
@@ -0,0 +1,161 @@
+"""Rasch (one-parameter IRT) calibration of word difficulty from the per-user word rollups.
+
+For each child and each word they have attempted, ``UserWordStats`` stores the attempt
+and miss counts. That sparse matrix of counts is a sufficient statistic for the Rasch
+model, so a fit reads one row per (child, word) pair rather than one per attempt.
+
+Child ability and word difficulty are estimated jointly by alternating Newton steps.
+Each step is a few ``np.bincount`` calls over the pairs. A weak normal prior centred
+on zero keeps all-correct and all-wrong records finite. It also fixes the origin of
+the logit scale, so fits are comparable from one run to the next. A warm start from
+the previous fit's estimates leaves little to fit beyond the new attempts.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+
+from apps.lexicon.models import Word
+from apps.lexicon.snapshot import bump_lexicon_version
+
+from .models import UserAbility, UserWordStats
+
+# Words with fewer attempts than this keep a null difficulty.
+CALIBRATION_MIN_ATTEMPTS = 20
+# Variance of the normal prior on abilities and difficulties, in logits squared.
+PRIOR_VARIANCE = 4.0
+MAX_ITERATIONS = 200
+# Stop once no parameter moves by more than this many logits in an iteration.
+TOLERANCE = 1e-4
+# Largest Newton step, so poorly determined parameters cannot overshoot early on.
+MAX_STEP = 1.0
+LOAD_CHUNK_SIZE = 50_000
+PAIR_DTYPE = np.dtype([("user", "<i8"), ("word", "<i8"), ("attempts", "<i8"), ("misses", "<i8")])
+
+
+class RaschFit(NamedTuple):
+    word_ids: np.ndarray
+    difficulty: np.ndarray
+    word_attempts: np.ndarray
+    user_ids: np.ndarray
+    ability: np.ndarray
+    iterations: int
+    converged: bool
+
+
+def load_response_counts():
+    """Every (user, word, attempts, misses) row of ``UserWordStats`` as a structured array."""
+    rows = (
+        UserWordStats.objects.filter(attempts__gt=0)
+        .order_by()
+        .values_list("user_id", "word_id", "attempts", "misses")
+    )
+    return np.fromiter(rows.iterator(chunk_size=LOAD_CHUNK_SIZE), dtype=PAIR_DTYPE)
+
+
+def _expected(ability, difficulty, users, words):
+    # The logistic function, written so large logits do not overflow.
+    return np.exp(-np.logaddexp(0, difficulty[words] - ability[users]))
+
+
+def fit_rasch(pairs, initial_ability=None, initial_difficulty=None, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    """Fit abilities and difficulties to ``pairs`` (a ``PAIR_DTYPE`` array).
+
+    ``initial_ability`` and ``initial_difficulty`` map user and word ids to a previous
+    fit's estimates to start from; anyone or anything not in them starts at zero.
+    An empty ``pairs`` gives an empty, converged fit.
+    """
+    if not len(pairs):
+        empty_ids = np.empty(0, dtype=np.int64)
+        return RaschFit(empty_ids, np.empty(0), empty_ids, empty_ids, np.empty(0), 0, True)
+    user_ids, users = np.unique(pairs["user"], return_inverse=True)
+    word_ids, words = np.unique(pairs["word"], return_inverse=True)
+    attempts = pairs["attempts"].astype(float)
+    correct = attempts - pairs["misses"]
+
+    ability = np.array([(initial_ability or {}).get(user_id, 0.0) for user_id in user_ids.tolist()])
+    difficulty = np.array([(initial_difficulty or {}).get(word_id, 0.0) for word_id in word_ids.tolist()])
+
+    converged = False
+    iterations = 0
+    while iterations < max_iterations and not converged:
+        iterations += 1
+        expected = _expected(ability, difficulty, users, words)
+        gradient = np.bincount(users, correct - attempts * expected, len(user_ids)) - ability / PRIOR_VARIANCE
+        information = np.bincount(users, attempts * expected * (1 - expected), len(user_ids)) + 1 / PRIOR_VARIANCE
+        ability_step = np.clip(gradient / information, -MAX_STEP, MAX_STEP)
+        ability += ability_step
+
+        expected = _expected(ability, difficulty, users, words)
+        gradient = np.bincount(words, attempts * expected - correct, len(word_ids)) - difficulty / PRIOR_VARIANCE
+        information = np.bincount(words, attempts * expected * (1 - expected), len(word_ids)) + 1 / PRIOR_VARIANCE
+        difficulty_step = np.clip(gradient / information, -MAX_STEP, MAX_STEP)
+        difficulty += difficulty_step
+
+        # Adding the same constant to every ability and difficulty leaves the likelihood
+        # unchanged, so only the prior moves along that direction and the Newton steps
+        # barely do. Take the prior's exact minimum along it instead.
+        shift = (ability.sum() + difficulty.sum()) / (len(ability) + len(difficulty))
+        ability -= shift
+        difficulty -= shift
+        converged = max(np.abs(ability_step).max(), np.abs(difficulty_step).max(), abs(shift)) < tolerance
+
+    word_attempts = np.bincount(words, attempts, len(word_ids)).astype(np.int64)
+    return RaschFit(word_ids, difficulty, word_attempts, user_ids, ability, iterations, converged)
+
+
+def stages_from_difficulty(difficulty, stages):
+    """Stage 1 to ``stages`` for each difficulty, splitting the words into equal-sized groups."""
+    ranks = np.argsort(np.argsort(difficulty, kind="stable"), kind="stable")
+    return 1 + ranks * stages // max(len(difficulty), 1)
+
+
+def save_calibration(fit, min_attempts=CALIBRATION_MIN_ATTEMPTS, stages=None):
+    """Store every ability, the difficulties of words with enough attempts and, with ``stages``, their stages.
+
+    Returns the number of words calibrated.
+    """
+    calibrated = fit.word_attempts >= min_attempts
+    difficulty = dict(zip(fit.word_ids[calibrated].tolist(), fit.difficulty[calibrated].tolist()))
+    words = list(Word.objects.filter(id__in=list(difficulty)).only("id", "difficulty", "hierarchy_stage", "is_active"))
+    for word in words:
+        word.difficulty = difficulty[word.id]
+
+    fields = ["difficulty"]
+    if stages:
+        # Words without a calibrated difficulty keep their hand-set stage.
+        active = [word for word in words if word.is_active]
+        for word, stage in zip(active, stages_from_difficulty([word.difficulty for word in active], stages).tolist()):
+            word.hierarchy_stage = stage
+        fields.append("hierarchy_stage")
+
+    abilities = [
+        UserAbility(user_id=user_id, ability=ability)
+        for user_id, ability in zip(fit.user_ids.tolist(), fit.ability.tolist())
+    ]
+    with transaction.atomic():
+        Word.objects.bulk_update(words, fields, batch_size=1000)
+        UserAbility.objects.bulk_create(
+            abilities,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["ability", "updated_at"],
+        )
+        if stages:
+            # bulk_update skips the signals that would replace the cached lexicon.
+            transaction.on_commit(bump_lexicon_version)
+    return len(words)
+
+
+def calibrate_word_difficulty(warm_start=True, min_attempts=CALIBRATION_MIN_ATTEMPTS, stages=None, **fit_options):
+    """Fit the Rasch model over all rollups, store the result, and return ``(fit, words calibrated)``."""
+    pairs = load_response_counts()
+    if warm_start:
+        fit_options["initial_ability"] = dict(UserAbility.objects.values_list("user_id", "ability"))
+        fit_options["initial_difficulty"] = dict(
+            Word.objects.filter(difficulty__isnull=False).values_list("id", "difficulty")
+        )
+    fit = fit_rasch(pairs, **fit_options)
+    return fit, save_calibration(fit, min_attempts=min_attempts, stages=stages)
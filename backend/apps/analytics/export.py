@@ -0,0 +1,123 @@
+"""Streaming export of a centre's submitted practice and screening attempts.
+
+Rows come from ``values_list(...).iterator()`` in attempt id order, practice first and
+then screening, and are written out in chunks, so memory stays flat however many
+rows there are. Every row carries a ``cursor``; passing the last one received as
+``?cursor=`` resumes the export after it.
+"""
+
+import csv
+import io
+import json
+
+from django.db.models import F, Value
+from rest_framework.exceptions import ParseError
+
+from apps.common.pagination import decode_cursor, encode_cursor
+from apps.practice.models import PracticeAttempt
+from apps.screening.models import ScreeningAttempt
+
+from .models import AttemptSource
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 2000
+# Roughly how much text to gather before handing a chunk to the response.
+EXPORT_BUFFER_BYTES = 64 * 1024
+COLUMNS = (
+    "source",
+    "attempt_id",
+    "session_id",
+    "parent_id",
+    "session_type",
+    "age_band",
+    "started_at",
+    "submitted_at",
+    "position",
+    "word_id",
+    "hanzi",
+    "jyutping",
+    "sound_group",
+    "is_correct",
+    "cursor",
+)
+SOURCES = (
+    (AttemptSource.PRACTICE, PracticeAttempt, {"session_type": F("session__session_type"), "age_band": Value("")}),
+    (AttemptSource.SCREENING, ScreeningAttempt, {"session_type": Value(""), "age_band": F("session__age_band__label")}),
+)
+
+
+def parse_cursor(token):
+    """``(source index, attempt id)`` to resume after; raises ``ParseError`` for a bad token.
+
+    Parse before streaming starts, so a bad cursor is a 400 rather than a broken download.
+    """
+    if not token:
+        return 0, 0
+    source_index, attempt_id = decode_cursor(token, 2)
+    if not isinstance(source_index, int) or not isinstance(attempt_id, int):
+        raise ParseError("Invalid cursor.")
+    return source_index, attempt_id
+
+
+def iter_attempt_rows(centre_id, after=(0, 0), since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    start_source, after_id = after
+    for source_index, (source, model, extra) in enumerate(SOURCES):
+        if source_index < start_source:
+            continue
+        attempts = model.objects.filter(session__centre_id=centre_id, session__submitted_at__isnull=False)
+        if source_index == start_source:
+            attempts = attempts.filter(id__gt=after_id)
+        if since:
+            attempts = attempts.filter(session__submitted_at__date__gte=since)
+        rows = (
+            attempts.annotate(**extra)
+            .order_by("id")
+            .values_list(
+                "id",
+                "session_id",
+                "session__created_by_id",
+                "session_type",
+                "age_band",
+                "session__started_at",
+                "session__submitted_at",
+                "position",
+                "word_id",
+                "word__hanzi",
+                "word__jyutping",
+                "word__sound_group",
+                "is_correct",
+            )
+        )
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield (source.lower(), *row, encode_cursor([source_index, row[0]]))
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow([value.isoformat() if hasattr(value, "isoformat") else value for value in row])
+        if buffer.tell() >= EXPORT_BUFFER_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows):
+    chunk, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False, default=lambda value: value.isoformat()) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_BYTES:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    yield "".join(chunk)
+
+
+def stream_attempts(centre_id, output="csv", after=(0, 0), since=None):
+    """Text chunks of the export in ``output`` format (``csv`` or ``ndjson``), after a parsed cursor."""
+    rows = iter_attempt_rows(centre_id, after=after, since=since)
+    return _csv_lines(rows) if output == "csv" else _ndjson_lines(rows)
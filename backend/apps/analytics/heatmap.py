@@ -0,0 +1,92 @@
+"""Week-by-sound-group accuracy for a centre, computed with NumPy over the daily rollups.
+
+The database sums the window's ``CentreWordDailyStats`` per (day, sound group), which
+is at most a few hundred rows; NumPy then bins them into weeks and derives accuracy
+and Wilson score intervals for the whole matrix at once. Results are cached until the
+rollups next change.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.lexicon.models import SoundGroup
+from apps.lexicon.services import words_with_phonemes
+
+from .models import CentreWordDailyStats
+from .rollups import current_rollup_version
+
+HEATMAP_CACHE_TIMEOUT = 60 * 60
+# Two-sided 95% interval.
+WILSON_Z = 1.96
+
+
+def wilson_interval(correct, attempts, z=WILSON_Z):
+    """Element-wise Wilson score interval for ``correct`` out of ``attempts``; NaN where there were no attempts."""
+    correct = np.asarray(correct, dtype=float)
+    attempts = np.asarray(attempts, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = correct / attempts
+        z2 = z * z
+        denominator = 1 + z2 / attempts
+        centre = (p + z2 / (2 * attempts)) / denominator
+        half_width = z * np.sqrt(p * (1 - p) / attempts + z2 / (4 * attempts**2)) / denominator
+    return centre - half_width, centre + half_width
+
+
+def _matrix(values):
+    # NaN (no attempts) becomes None in the JSON.
+    return [[None if np.isnan(value) else round(float(value), 4) for value in row] for row in values]
+
+
+def sound_group_heatmap(centre_id, weeks, sources=None, phonemes=None):
+    today = timezone.localdate()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    source_key = ",".join(sorted(sources)) if sources else "all"
+    phoneme_key = ",".join(f"{field}={value}" for field, value in sorted((phonemes or {}).items())) or "all"
+    version = current_rollup_version()
+    cache_key = f"analytics:heatmap:{centre_id}:{first_week}:{weeks}:{source_key}:{phoneme_key}:{version}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    rows = CentreWordDailyStats.objects.filter(centre_id=centre_id, day__gte=first_week)
+    if sources:
+        rows = rows.filter(source__in=sources)
+    if phonemes:
+        rows = rows.filter(word_id__in=words_with_phonemes(**phonemes))
+    grouped = list(
+        rows.values("day", "sound_group").annotate(attempts=Sum("attempts"), misses=Sum("misses")).values_list(
+            "day", "sound_group", "attempts", "misses"
+        )
+    )
+
+    sound_groups = list(SoundGroup.values)
+    sound_groups += sorted({sound_group for _, sound_group, _, _ in grouped} - set(sound_groups))
+    attempts = np.zeros((len(sound_groups), weeks), dtype=np.int64)
+    correct = np.zeros_like(attempts)
+    if grouped:
+        days, groups, day_attempts, day_misses = zip(*grouped)
+        week_index = (np.array(days, dtype="datetime64[D]") - np.datetime64(first_week)).astype(np.int64) // 7
+        positions = {group: index for index, group in enumerate(sound_groups)}
+        group_index = np.array([positions[group] for group in groups])
+        np.add.at(attempts, (group_index, week_index), day_attempts)
+        np.add.at(correct, (group_index, week_index), np.subtract(day_attempts, day_misses))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = correct / attempts
+    low, high = wilson_interval(correct, attempts)
+
+    result = {
+        "weeks": [(first_week + timedelta(weeks=index)).isoformat() for index in range(weeks)],
+        "sound_groups": sound_groups,
+        "attempts": attempts.tolist(),
+        "accuracy": _matrix(accuracy),
+        "ci_low": _matrix(low),
+        "ci_high": _matrix(high),
+    }
+    cache.set(cache_key, result, HEATMAP_CACHE_TIMEOUT)
+    return result
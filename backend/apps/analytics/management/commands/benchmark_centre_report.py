@@ -0,0 +1,67 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.analytics.rollups import centre_missed_report, refresh_centre_rollups
+from apps.centres.models import Centre
+from apps.practice.models import PracticeAttempt
+from apps.screening.models import ScreeningAttempt
+
+
+def _raw_report(centre_id, since):
+    """The same per-word totals grouped straight from the attempt tables, for comparison."""
+    rows = {}
+    for model in (PracticeAttempt, ScreeningAttempt):
+        grouped = (
+            model.objects.filter(session__centre_id=centre_id, session__submitted_at__date__gte=since)
+            .order_by()
+            .values("word_id")
+            .annotate(attempts=Count("id"), missed=Count("id", filter=Q(is_correct=False)))
+        )
+        for row in grouped:
+            totals = rows.setdefault(row["word_id"], [0, 0])
+            totals[0] += row["attempts"]
+            totals[1] += row["missed"]
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Time the centre missed-word report from rollups against grouping the raw attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centre-code", default="BENCH")
+        parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 365])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--skip-raw", action="store_true", help="Only time the rollup report.")
+
+    def _time(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        try:
+            centre = Centre.objects.get(code=options["centre_code"])
+        except Centre.DoesNotExist:
+            raise CommandError(f"No centre with code {options['centre_code']}; run seed_centre_attempts first.")
+
+        started = time.perf_counter()
+        covered = refresh_centre_rollups()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Refreshed rollups ({sum(covered.values())} sessions) in {elapsed:.1f}s.")
+
+        for days in options["days"]:
+            since = timezone.localdate() - timedelta(days=days)
+            report_ms = self._time(lambda: centre_missed_report(centre.id, since), options["repeat"])
+            line = f"{days:>4} days: rollup report {report_ms:8.1f} ms"
+            if not options["skip_raw"]:
+                raw_ms = self._time(lambda: _raw_report(centre.id, since), options["repeat"])
+                line += f", raw attempts {raw_ms:8.1f} ms"
+            self.stdout.write(line)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics.calibration import CALIBRATION_MIN_ATTEMPTS, MAX_ITERATIONS, TOLERANCE, calibrate_word_difficulty
+
+
+class Command(BaseCommand):
+    help = "Fit a Rasch model over all practice and screening attempts and store each word's difficulty."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cold", action="store_true", help="Start from zero instead of the previous fit.")
+        parser.add_argument(
+            "--min-attempts",
+            type=int,
+            default=CALIBRATION_MIN_ATTEMPTS,
+            help="Attempts a word needs before its difficulty is stored.",
+        )
+        parser.add_argument(
+            "--stages",
+            type=int,
+            help="Also set hierarchy_stage of calibrated active words to 1..N by difficulty, in equal-sized groups.",
+        )
+        parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+        parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fit, calibrated = calibrate_word_difficulty(
+            warm_start=not options["cold"],
+            min_attempts=options["min_attempts"],
+            stages=options["stages"],
+            max_iterations=options["max_iterations"],
+            tolerance=options["tolerance"],
+        )
+        elapsed = time.perf_counter() - started
+        if not fit.converged:
+            self.stderr.write(self.style.WARNING(f"Stopped after {fit.iterations} iterations without converging."))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Calibrated {calibrated} words from {len(fit.user_ids)} children "
+                f"in {fit.iterations} iterations ({elapsed:.1f}s)."
+            )
+        )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics.arrays import DUMP_BATCH, DUMP_SETTLE_SECONDS, dump_attempt_arrays
+
+
+class Command(BaseCommand):
+    help = "Append submitted practice and screening attempts to memory-mappable .npy column files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Dump directory; created on the first run and appended to afterwards.")
+        parser.add_argument("--batch-size", type=int, default=DUMP_BATCH, help="Attempts per append.")
+        parser.add_argument(
+            "--settle",
+            type=float,
+            default=DUMP_SETTLE_SECONDS,
+            help="Seconds to let in-flight submits commit before reading.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        appended = dump_attempt_arrays(options["directory"], options["batch_size"], options["settle"])
+        summary = ", ".join(f"{source.lower()} {count}" for source, count in appended.items())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Appended attempts ({summary}) in {elapsed:.1f}s."))
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+
+from apps.analytics.models import AttemptSource, UserWordDailyStats, UserWordStats
+from apps.practice.models import PracticeAttempt
+from apps.screening.models import ScreeningAttempt
+
+SOURCES = (
+    (AttemptSource.PRACTICE, PracticeAttempt),
+    (AttemptSource.SCREENING, ScreeningAttempt),
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user word rollups (UserWordStats and daily buckets) from submitted attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        totals = {}
+        buckets = 0
+
+        with transaction.atomic():
+            UserWordDailyStats.objects.all().delete()
+            UserWordStats.objects.all().delete()
+
+            for source, attempt_model in SOURCES:
+                rows = (
+                    attempt_model.objects.filter(session__submitted_at__isnull=False)
+                    .values("session__created_by_id", "word_id", day=TruncDate("session__submitted_at"))
+                    .annotate(
+                        attempts=Count("id"),
+                        misses=Count("id", filter=Q(is_correct=False)),
+                        last_seen_at=Max("session__submitted_at"),
+                        last_missed_at=Max("session__submitted_at", filter=Q(is_correct=False)),
+                    )
+                    .order_by()
+                )
+                daily = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    key = (row["session__created_by_id"], row["word_id"])
+                    daily.append(
+                        UserWordDailyStats(
+                            user_id=key[0],
+                            word_id=key[1],
+                            source=source,
+                            day=row["day"],
+                            attempts=row["attempts"],
+                            misses=row["misses"],
+                        )
+                    )
+                    stats = totals.get(key)
+                    if stats is None:
+                        stats = totals[key] = UserWordStats(user_id=key[0], word_id=key[1], last_seen_at=row["last_seen_at"])
+                    stats.attempts += row["attempts"]
+                    stats.misses += row["misses"]
+                    stats.last_seen_at = max(stats.last_seen_at, row["last_seen_at"])
+                    if row["last_missed_at"]:
+                        stats.last_missed_at = max(filter(None, (stats.last_missed_at, row["last_missed_at"])))
+                    if len(daily) >= batch_size:
+                        UserWordDailyStats.objects.bulk_create(daily)
+                        buckets += len(daily)
+                        daily = []
+                UserWordDailyStats.objects.bulk_create(daily)
+                buckets += len(daily)
+
+            UserWordStats.objects.bulk_create(totals.values(), batch_size=batch_size)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(totals)} word stats and {buckets} daily buckets in {elapsed:.1f}s.")
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.analytics.rollups import ROLLUP_BATCH, refresh_centre_rollups
+
+
+class Command(BaseCommand):
+    help = "Add newly submitted practice and screening attempts to the centre daily rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ROLLUP_BATCH, help="Sessions per transaction.")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds between refreshes.")
+        parser.add_argument("--once", action="store_true", help="Refresh once and exit instead of looping.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            covered = refresh_centre_rollups(options["batch_size"])
+            if options["once"] or options["verbosity"] >= 2:
+                summary = ", ".join(f"{source.lower()} {count}" for source, count in covered.items())
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(f"Rolled up sessions ({summary}) in {elapsed:.1f}s."))
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+            close_old_connections()
@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import UserProfile
+from apps.centres.models import Centre
+from apps.lexicon.models import Word
+from apps.practice.models import PracticeAttempt, PracticeSession
+from apps.screening.models import ScreeningAttempt, ScreeningSession, ScreeningSet
+
+SESSION_BATCH = 2000
+
+
+class Command(BaseCommand):
+    help = "Fill a benchmark centre with synthetic submitted practice and screening sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centre-code", default="BENCH")
+        parser.add_argument("--attempts", type=int, default=1_000_000)
+        parser.add_argument("--parents", type=int, default=200)
+        parser.add_argument("--words", type=int, default=400, help="Practise the first N active words by stage.")
+        parser.add_argument("--days", type=int, default=365, help="Spread submissions over this many past days.")
+        parser.add_argument("--screening-share", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        word_ids = list(
+            Word.objects.filter(is_active=True).order_by("hierarchy_stage", "id").values_list("id", flat=True)[
+                : options["words"]
+            ]
+        )
+        if len(word_ids) < 20:
+            raise CommandError("Seeding needs at least 20 active words.")
+        sets = [
+            (screening_set.id, screening_set.age_band_id, list(screening_set.items.values_list("position", "word_id")))
+            for screening_set in ScreeningSet.objects.filter(is_active=True)
+        ]
+        sets = [entry for entry in sets if entry[2]]
+
+        started = time.perf_counter()
+        centre, _ = Centre.objects.get_or_create(code=options["centre_code"], defaults={"name": options["centre_code"]})
+        User = get_user_model()
+        parents = []
+        for index in range(options["parents"]):
+            parent, _ = User.objects.get_or_create(username=f"{centre.code.lower()}-parent-{index}")
+            parents.append(parent.id)
+        UserProfile.objects.filter(user_id__in=parents).update(centre=centre)
+
+        now = timezone.now()
+        screening_target = int(options["attempts"] * options["screening_share"]) if sets else 0
+        practice_target = options["attempts"] - screening_target
+        written = 0
+
+        def submission_times():
+            return [now - timedelta(seconds=rng.randrange(options["days"] * 86400)) for _ in range(SESSION_BATCH)]
+
+        while written < practice_target:
+            with transaction.atomic():
+                sessions = PracticeSession.objects.bulk_create(
+                    [
+                        PracticeSession(
+                            created_by_id=rng.choice(parents),
+                            centre=centre,
+                            planned_item_count=20,
+                            started_at=at,
+                            submitted_at=at,
+                        )
+                        for at in submission_times()
+                    ]
+                )
+                attempts = []
+                for session in sessions:
+                    for position, word_id in enumerate(rng.sample(word_ids, 20), start=1):
+                        attempts.append(
+                            PracticeAttempt(
+                                session=session, word_id=word_id, position=position, is_correct=rng.random() > 0.3
+                            )
+                        )
+                attempts = attempts[: practice_target - written]
+                PracticeAttempt.objects.bulk_create(attempts, batch_size=5000)
+            written += len(attempts)
+
+        screening_written = 0
+        while screening_written < screening_target:
+            with transaction.atomic():
+                chosen = [rng.choice(sets) for _ in range(SESSION_BATCH)]
+                sessions = ScreeningSession.objects.bulk_create(
+                    [
+                        ScreeningSession(
+                            created_by_id=rng.choice(parents),
+                            centre=centre,
+                            age_band_id=age_band_id,
+                            screening_set_id=set_id,
+                            started_at=at,
+                            submitted_at=at,
+                        )
+                        for (set_id, age_band_id, _), at in zip(chosen, submission_times())
+                    ]
+                )
+                attempts = [
+                    ScreeningAttempt(session=session, word_id=word_id, position=position, is_correct=rng.random() > 0.3)
+                    for session, (_, _, items) in zip(sessions, chosen)
+                    for position, word_id in items
+                ]
+                attempts = attempts[: screening_target - screening_written]
+                ScreeningAttempt.objects.bulk_create(attempts, batch_size=5000)
+            screening_written += len(attempts)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded centre {centre.id} with {written} practice and {screening_written} screening attempts "
+                f"in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('lexicon', '0006_minimal_pair_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserWordDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('PRACTICE', 'Practice'), ('SCREENING', 'Screening')], max_length=16)),
+                ('day', models.DateField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_daily_stats', to=settings.AUTH_USER_MODEL)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_daily_stats', to='lexicon.word')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'source', 'day', 'word'), name='uniq_userworddailystats_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserWordStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('last_seen_at', models.DateTimeField()),
+                ('last_missed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_stats', to=settings.AUTH_USER_MODEL)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='lexicon.word')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'word'), name='uniq_userwordstats_user_word')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_user_word_stats'),
+        ('centres', '0001_initial'),
+        ('lexicon', '0006_minimal_pair_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('processed_id', models.BigIntegerField(default=0)),
+                ('seen_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CentreWordDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source', models.CharField(choices=[('PRACTICE', 'Practice'), ('SCREENING', 'Screening')], max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('centre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_daily_stats', to='centres.centre')),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='centre_daily_stats', to='lexicon.word')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('centre', 'day', 'source', 'word'), name='uniq_centreworddaily_bucket')],
+            },
+        ),
+    ]
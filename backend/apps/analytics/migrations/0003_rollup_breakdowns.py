@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_rollups(apps, schema_editor):
+    # Deletes every existing daily rollup row and resets the watermarks. The old buckets have no age
+    # band or sound group to fill in, so the next refreshes rebuild them, and the new monthly table,
+    # from the full attempt history. Centre reports are empty until that has run.
+    apps.get_model("analytics", "CentreWordDailyStats").objects.all().delete()
+    apps.get_model("analytics", "RollupWatermark").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_centre_daily_rollups'),
+        ('centres', '0001_initial'),
+        ('lexicon', '0006_minimal_pair_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_rollups, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='centreworddailystats',
+            name='uniq_centreworddaily_bucket',
+        ),
+        migrations.AddField(
+            model_name='centreworddailystats',
+            name='age_band_key',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='centreworddailystats',
+            name='sound_group',
+            field=models.CharField(default='', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='centreworddailystats',
+            index=models.Index(fields=['centre', 'day', 'source', 'age_band_key', 'sound_group', 'word', 'attempts', 'misses'], name='analytics_centreday_cover_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='centreworddailystats',
+            constraint=models.UniqueConstraint(fields=('centre', 'day', 'source', 'age_band_key', 'word'), name='uniq_centreworddaily_bucket'),
+        ),
+        migrations.CreateModel(
+            name='CentreWordMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('source', models.CharField(choices=[('PRACTICE', 'Practice'), ('SCREENING', 'Screening')], max_length=16)),
+                ('age_band_key', models.PositiveIntegerField(default=0)),
+                ('sound_group', models.CharField(max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('centre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_monthly_stats', to='centres.centre')),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='centre_monthly_stats', to='lexicon.word')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['centre', 'month', 'source', 'age_band_key', 'sound_group', 'word', 'attempts', 'misses'], name='analytics_centremon_cover_idx')],
+                'constraints': [models.UniqueConstraint(fields=('centre', 'month', 'source', 'age_band_key', 'word'), name='uniq_centrewordmonthly_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:54
+
+from django.db import migrations
+
+
+def reset_rollups(apps, schema_editor):
+    # Rollups are now tracked per session through rolled_up_at, which starts out empty for every
+    # session. This empties both rollup tables so the next refresh rebuilds them from the full
+    # history instead of adding it on top of the watermark's counts. Reports are empty until then.
+    apps.get_model("analytics", "CentreWordDailyStats").objects.all().delete()
+    apps.get_model("analytics", "CentreWordMonthlyStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_user_ability'),
+        ('practice', '0010_session_rolled_up_at'),
+        ('screening', '0007_session_rolled_up_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_rollups, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='RollupWatermark',
+        ),
+    ]
@@ -1,3 +1,134 @@
+from django.conf import settings
 from django.db import models
 
-# Reserved for future materialised analytics tables.
+from apps.centres.models import Centre
+from apps.lexicon.models import Word
+
+
+class AttemptSource(models.TextChoices):
+    PRACTICE = "PRACTICE", "Practice"
+    SCREENING = "SCREENING", "Screening"
+
+
+class UserWordStats(models.Model):
+    """Running totals of one user's attempts at one word across practice and screening."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="word_stats")
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="user_stats")
+    attempts = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    last_seen_at = models.DateTimeField()
+    last_missed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "word"], name="uniq_userwordstats_user_word"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.word_id} {self.misses}/{self.attempts}"
+
+
+class UserAbility(models.Model):
+    """A child's Rasch ability in logits from the latest ``calibrate_word_difficulty`` run.
+
+    Kept so the next run can warm-start from it.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="ability"
+    )
+    ability = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} {self.ability:.2f}"
+
+
+class UserWordDailyStats(models.Model):
+    """Per-day attempt and miss counts of one user at one word, split by source."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="word_daily_stats")
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="user_daily_stats")
+    source = models.CharField(max_length=16, choices=AttemptSource.choices)
+    day = models.DateField()
+    attempts = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "source", "day", "word"], name="uniq_userworddailystats_bucket"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.word_id} {self.source} {self.day}"
+
+
+class CentreWordDailyStats(models.Model):
+    """Per-day attempt and miss counts at one word across a centre's sessions, split by source.
+
+    Filled in batches by ``refresh_centre_rollups`` rather than at submit time, so staff
+    reports read a table whose size depends on days and words, not on attempts.
+    ``CentreWordMonthlyStats`` holds the same counts by month.
+    """
+
+    centre = models.ForeignKey(Centre, on_delete=models.CASCADE, related_name="word_daily_stats")
+    day = models.DateField()
+    source = models.CharField(max_length=16, choices=AttemptSource.choices)
+    # The screening session's age band id, or 0 for practice, which has none. Not a nullable
+    # foreign key: NULLs never conflict, so the additive upsert would insert duplicate buckets.
+    age_band_key = models.PositiveIntegerField(default=0)
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="centre_daily_stats")
+    # The word's sound group when the bucket was first rolled up, so reports can group by it without a join.
+    sound_group = models.CharField(max_length=16)
+    attempts = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["centre", "day", "source", "age_band_key", "word"], name="uniq_centreworddaily_bucket"
+            ),
+        ]
+        indexes = [
+            # Every column a centre report reads, so each breakdown is an index-only range scan.
+            models.Index(
+                fields=["centre", "day", "source", "age_band_key", "sound_group", "word", "attempts", "misses"],
+                name="analytics_centreday_cover_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.centre_id}:{self.word_id} {self.source} {self.day}"
+
+
+class CentreWordMonthlyStats(models.Model):
+    """``CentreWordDailyStats`` summed by calendar month, so long report windows read one row per month."""
+
+    centre = models.ForeignKey(Centre, on_delete=models.CASCADE, related_name="word_monthly_stats")
+    month = models.DateField()  # First day of the month.
+    source = models.CharField(max_length=16, choices=AttemptSource.choices)
+    age_band_key = models.PositiveIntegerField(default=0)
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="centre_monthly_stats")
+    sound_group = models.CharField(max_length=16)
+    attempts = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["centre", "month", "source", "age_band_key", "word"], name="uniq_centrewordmonthly_bucket"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["centre", "month", "source", "age_band_key", "sound_group", "word", "attempts", "misses"],
+                name="analytics_centremon_cover_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.centre_id}:{self.word_id} {self.source} {self.month:%Y-%m}"
+
@@ -0,0 +1,179 @@
+"""Centre-level daily and monthly rollups, refreshed incrementally from the attempt tables.
+
+A refresh claims submitted sessions whose ``rolled_up_at`` is still empty, adds their
+attempts to ``CentreWordDailyStats`` and ``CentreWordMonthlyStats`` with one
+``INSERT ... SELECT ... ON CONFLICT`` per table, and stamps ``rolled_up_at`` in the
+same transaction. Submits and sync write a session's attempts together with its
+``submitted_at``, so a session only becomes visible here once it is complete, however
+late its transaction commits, and each one is counted exactly once. Counts for an
+existing bucket are added rather than overwritten.
+
+Reports read whole months from the monthly table and only the days before the
+first whole month from the daily one, so any window costs at most about a month
+of daily buckets plus one bucket per month.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, DateField, F, Q, Sum, Value
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from apps.lexicon.models import Word
+from apps.lexicon.services import words_with_phonemes
+from apps.practice.models import PracticeAttempt, PracticeSession
+from apps.screening.models import AgeBand, ScreeningAttempt, ScreeningSession
+
+from .models import AttemptSource, CentreWordDailyStats, CentreWordMonthlyStats
+from .services import upsert_add_sql
+
+# Sessions per transaction.
+ROLLUP_BATCH = 2_000
+VERSION_CACHE_KEY = "analytics:rollups:version"
+SOURCES = {
+    AttemptSource.PRACTICE: (PracticeSession, PracticeAttempt),
+    AttemptSource.SCREENING: (ScreeningSession, ScreeningAttempt),
+}
+
+
+def bump_rollup_version():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def current_rollup_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        candidate = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, candidate, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY, candidate)
+    return version
+
+
+def _rollup_rows(model, source, session_ids, period):
+    # Columns in the order of the INSERT: centre, period, source, age band, word, sound group, attempts, misses.
+    age_band = F("session__age_band_id") if model is ScreeningAttempt else Value(0)
+    return (
+        model.objects.filter(session_id__in=session_ids, session__centre__isnull=False)
+        .order_by()
+        .values(
+            rollup_centre=F("session__centre_id"),
+            rollup_period=period,
+            rollup_source=Value(source),
+            rollup_age_band=age_band,
+            rollup_word=F("word_id"),
+            rollup_sound_group=F("word__sound_group"),
+        )
+        .annotate(rollup_attempts=Count("id"), rollup_misses=Count("id", filter=Q(is_correct=False)))
+    )
+
+
+def _add_to_rollups(model, source, session_ids):
+    periods = (
+        (CentreWordDailyStats, "day", TruncDate("session__submitted_at")),
+        (CentreWordMonthlyStats, "month", TruncMonth("session__submitted_at", output_field=DateField())),
+    )
+    with connection.cursor() as cursor:
+        for table, period_field, period in periods:
+            insert, conflict = upsert_add_sql(
+                table,
+                ("centre", period_field, "source", "age_band_key", "word"),
+                ("attempts", "misses"),
+                kept_fields=("sound_group",),
+            )
+            select, params = _rollup_rows(model, source, session_ids, period).query.sql_with_params()
+            cursor.execute(f"{insert} {select} {conflict}", params)
+
+
+def refresh_source(source, batch_size=ROLLUP_BATCH):
+    """Roll up one source's newly submitted sessions and return how many were covered."""
+    session_model, model = SOURCES[source]
+    pending = session_model.objects.filter(submitted_at__isnull=False, rolled_up_at__isnull=True).order_by("id")
+
+    covered = 0
+    while True:
+        with transaction.atomic():
+            # Sessions locked by another refresher are left to it rather than added twice.
+            session_ids = list(pending.select_for_update(skip_locked=True).values_list("id", flat=True)[:batch_size])
+            if not session_ids:
+                break
+            _add_to_rollups(model, source, session_ids)
+            session_model.objects.filter(id__in=session_ids).update(rolled_up_at=timezone.now())
+        covered += len(session_ids)
+    if covered:
+        bump_rollup_version()
+    return covered
+
+
+def refresh_centre_rollups(batch_size=ROLLUP_BATCH):
+    return {source: refresh_source(source, batch_size) for source in SOURCES}
+
+
+def _report_totals():
+    return {
+        "attempts": Sum("attempts"),
+        "missed_count": Sum("misses"),
+        "practice_missed": Sum("misses", filter=Q(source=AttemptSource.PRACTICE)),
+        "screening_missed": Sum("misses", filter=Q(source=AttemptSource.SCREENING)),
+    }
+
+
+def _breakdown(centre_id, since, sources, phonemes, dimension):
+    """``{value: totals}`` for one dimension, from whole months plus the days before the first of them."""
+    first_month = since if since.day == 1 else (since.replace(day=1) + timedelta(days=32)).replace(day=1)
+    parts = (
+        CentreWordDailyStats.objects.filter(centre_id=centre_id, day__gte=since, day__lt=first_month),
+        CentreWordMonthlyStats.objects.filter(centre_id=centre_id, month__gte=first_month),
+    )
+    merged = {}
+    for rows in parts:
+        if sources:
+            rows = rows.filter(source__in=sources)
+        if phonemes:
+            rows = rows.filter(word_id__in=words_with_phonemes(**phonemes))
+        for row in rows.values(dimension).annotate(**_report_totals()).order_by():
+            totals = merged.setdefault(row[dimension], dict.fromkeys(_report_totals(), 0))
+            for field in totals:
+                totals[field] += row[field] or 0
+    return merged
+
+
+def centre_missed_report(centre_id, since, sources=None, phonemes=None):
+    """Missed-word totals for a centre since ``since``, by word, sound group and age band.
+
+    Each breakdown is two grouped, index-only queries over the rollups; practice rows
+    fall under the ``None`` age band. ``phonemes`` limits it to words matching those
+    ``WordSyllable`` criteria.
+    """
+    missed_words = _breakdown(centre_id, since, sources, phonemes, "word_id")
+    by_word = sorted(
+        ((word_id, totals) for word_id, totals in missed_words.items() if totals["missed_count"]),
+        key=lambda item: (-item[1]["missed_count"], item[0]),
+    )
+    by_sound_group = sorted(
+        _breakdown(centre_id, since, sources, phonemes, "sound_group").items(),
+        key=lambda item: (-item[1]["missed_count"], item[0]),
+    )
+    by_age_band = sorted(_breakdown(centre_id, since, sources, phonemes, "age_band_key").items())
+    words = Word.objects.only("hanzi", "jyutping", "sound_group").in_bulk([word_id for word_id, _ in by_word])
+    age_bands = AgeBand.objects.in_bulk([key for key, _ in by_age_band if key])
+
+    return {
+        "words": [
+            {
+                "word_id": word_id,
+                "hanzi": words[word_id].hanzi,
+                "jyutping": words[word_id].jyutping,
+                "sound_group": words[word_id].sound_group,
+                **totals,
+            }
+            for word_id, totals in by_word
+        ],
+        "sound_groups": [{"sound_group": sound_group, **totals} for sound_group, totals in by_sound_group],
+        "age_bands": [
+            {"age_band_id": key or None, "age_band": age_bands[key].label if key in age_bands else None, **totals}
+            for key, totals in by_age_band
+        ],
+    }
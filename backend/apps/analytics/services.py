@@ -0,0 +1,110 @@
+"""Incremental per-user word rollups written alongside practice and screening submits."""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import AttemptSource, UserWordDailyStats, UserWordStats
+
+# Rows per upsert statement, well inside SQLite's bound-parameter limit.
+UPSERT_BATCH_SIZE = 500
+
+
+def _upsert_add(model, rows, key_fields, add_fields, latest_fields=()):
+    """Insert ``rows`` or, on a key conflict, add ``add_fields`` and keep the latest ``latest_fields``.
+
+    ``bulk_create(update_conflicts=True)`` can only overwrite columns, so concurrent
+    submits would lose counts; the additive upsert is one statement on SQLite and Postgres.
+    """
+    if not rows:
+        return
+    width = len(key_fields) + len(add_fields) + len(latest_fields)
+    placeholders = "(" + ", ".join(["%s"] * width) + ")"
+    insert, conflict = upsert_add_sql(model, key_fields, add_fields, latest_fields)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start : start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f"{insert} VALUES {', '.join([placeholders] * len(batch))} {conflict}",
+                [value for row in batch for value in row],
+            )
+
+
+def upsert_add_sql(model, key_fields, add_fields, latest_fields=(), kept_fields=()):
+    """``(insert, conflict)`` clauses around the rows or SELECT of an additive upsert.
+
+    Columns come in the order key, kept, added, latest; ``kept_fields`` are written on
+    insert and left alone on conflict.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+
+    def columns(names):
+        return [quote(model._meta.get_field(name).column) for name in names]
+
+    keys, added, latest, kept = columns(key_fields), columns(add_fields), columns(latest_fields), columns(kept_fields)
+    updates = [f"{column} = {table}.{column} + excluded.{column}" for column in added]
+    updates += [
+        f"{column} = CASE WHEN {table}.{column} IS NULL OR excluded.{column} > {table}.{column} "
+        f"THEN excluded.{column} ELSE {table}.{column} END"
+        for column in latest
+    ]
+    insert = f"INSERT INTO {table} ({', '.join(keys + kept + added + latest)})"
+    conflict = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(updates)}"
+    return insert, conflict
+
+
+def record_word_attempts(user_id, source, attempts, submitted_at):
+    """Add ``attempts`` (objects with ``word_id`` and ``is_correct``) to the user's rollups.
+
+    Call inside the submit transaction so the rollup commits or rolls back with the attempts.
+    """
+    record_word_attempt_batches(user_id, source, [(submitted_at, attempts)])
+
+
+def record_word_attempt_batches(user_id, source, batches):
+    """Add several sessions' ``(submitted_at, attempts)`` to the user's rollups with one upsert per table."""
+    totals = defaultdict(lambda: [0, 0, None, None])
+    daily = defaultdict(lambda: [0, 0])
+    for submitted_at, attempts in batches:
+        day = timezone.localdate(submitted_at)
+        for attempt in attempts:
+            counts = totals[attempt.word_id]
+            counts[0] += 1
+            counts[2] = max(counts[2] or submitted_at, submitted_at)
+            bucket = daily[day, attempt.word_id]
+            bucket[0] += 1
+            if not attempt.is_correct:
+                counts[1] += 1
+                counts[3] = max(counts[3] or submitted_at, submitted_at)
+                bucket[1] += 1
+    if not totals:
+        return
+
+    _upsert_add(
+        UserWordStats,
+        [(user_id, word_id, *values) for word_id, values in sorted(totals.items())],
+        key_fields=("user", "word"),
+        add_fields=("attempts", "misses"),
+        latest_fields=("last_seen_at", "last_missed_at"),
+    )
+    _upsert_add(
+        UserWordDailyStats,
+        [(user_id, source, day, word_id, count, missed) for (day, word_id), (count, missed) in sorted(daily.items())],
+        key_fields=("user", "source", "day", "word"),
+        add_fields=("attempts", "misses"),
+    )
+
+
+def missed_words_for_user(user, days=30, source=AttemptSource.PRACTICE):
+    """Words the user missed in the last ``days`` days, most-missed first, from the daily buckets."""
+    since = timezone.localdate() - timedelta(days=days)
+    return (
+        UserWordDailyStats.objects.filter(user=user, source=source, day__gte=since, misses__gt=0)
+        .values("word_id", "word__hanzi", "word__jyutping")
+        .annotate(missed_count=Sum("misses"), total_attempts=Sum("attempts"))
+        .order_by("-missed_count", "word_id")
+    )
@@ -1,3 +1,569 @@
+import csv
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F, Value
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import UserRole
+from apps.centres.models import Centre
+from apps.lexicon.models import SoundGroup, Word
+from apps.lexicon.snapshot import current_lexicon_version
+from apps.practice.models import PracticeAttempt, PracticeSession
+from apps.screening.models import AgeBand, ScreeningAttempt, ScreeningItem, ScreeningSession, ScreeningSet
+
+from .arrays import HEADER_BYTES, MANIFEST_NAME, dump_attempt_arrays, load_attempt_arrays, unpack_correct
+from .calibration import PAIR_DTYPE, PRIOR_VARIANCE, calibrate_word_difficulty, fit_rasch, stages_from_difficulty
+from .heatmap import wilson_interval
+from .models import (
+    AttemptSource,
+    CentreWordDailyStats,
+    CentreWordMonthlyStats,
+    UserAbility,
+    UserWordDailyStats,
+    UserWordStats,
+)
+from .rollups import centre_missed_report, refresh_centre_rollups
+from .services import record_word_attempts
+
+
+def staff_client(centre):
+    staff = User.objects.create_user(f"staff-{centre.code}", password="secret")
+    staff.profile.role = UserRole.STAFF
+    staff.profile.centre = centre
+    staff.profile.save()
+    client = APIClient()
+    client.force_authenticate(staff)
+    return client
+
+
+def answers(*pairs):
+    return [SimpleNamespace(word_id=word.id, is_correct=is_correct) for word, is_correct in pairs]
+
+
+class UserWordStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("parent", password="secret")
+        self.home, self.add = Word.objects.create(hanzi="家"), Word.objects.create(hanzi="加")
+
+    def test_submits_add_to_the_totals(self):
+        first = timezone.now() - timedelta(hours=2)
+        first_answers = answers((self.home, False), (self.home, True), (self.add, True))
+        record_word_attempts(self.user.id, AttemptSource.PRACTICE, first_answers, first)
+        second = first + timedelta(hours=1)
+        record_word_attempts(self.user.id, AttemptSource.PRACTICE, answers((self.home, True)), second)
+        # A submit that commits out of order adds its counts without moving last_seen_at back.
+        record_word_attempts(self.user.id, AttemptSource.SCREENING, answers((self.home, False)), first)
+
+        home = UserWordStats.objects.get(user=self.user, word=self.home)
+        self.assertEqual((home.attempts, home.misses, home.last_seen_at, home.last_missed_at), (4, 2, second, first))
+        add = UserWordStats.objects.get(user=self.user, word=self.add)
+        self.assertEqual((add.attempts, add.misses, add.last_missed_at), (1, 0, None))
+
+        buckets = UserWordDailyStats.objects.filter(user=self.user, word=self.home).order_by("source")
+        self.assertEqual(
+            [(row.source, row.attempts, row.misses) for row in buckets], [("PRACTICE", 3, 1), ("SCREENING", 1, 1)]
+        )
+
+    def test_missed_endpoint_reads_the_practice_buckets(self):
+        now = timezone.now()
+        record_word_attempts(self.user.id, AttemptSource.PRACTICE, answers((self.home, False), (self.add, True)), now)
+        record_word_attempts(self.user.id, AttemptSource.PRACTICE, answers((self.home, False)), now)
+        record_word_attempts(self.user.id, AttemptSource.SCREENING, answers((self.add, False)), now)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        results = client.get("/api/practice/missed/").json()["results"]
+        self.assertEqual([(row["word_id"], row["missed_count"]) for row in results], [(self.home.id, 2)])
+
+
+class StaffPhonemeFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.centre = Centre.objects.create(name="North", code="N")
+        self.client = staff_client(self.centre)
+        today = timezone.localdate()
+        for hanzi, jyutping, sound_group, attempts, misses in (
+            ("光", "gwong1", "INITIAL", 10, 4),
+            ("江", "gong1", "INITIAL", 10, 6),
+            ("唔", "m4", "OTHER", 5, 1),
+        ):
+            word = Word.objects.create(hanzi=hanzi, jyutping=jyutping, sound_group=sound_group)
+            bucket = {
+                "centre": self.centre,
+                "source": AttemptSource.PRACTICE,
+                "word": word,
+                "sound_group": sound_group,
+                "attempts": attempts,
+                "misses": misses,
+            }
+            CentreWordDailyStats.objects.create(day=today, **bucket)
+            CentreWordMonthlyStats.objects.create(month=today.replace(day=1), **bucket)
+
+    def test_missed_report_filters_by_phoneme(self):
+        url = f"/api/staff/centres/{self.centre.id}/aggregate-missed/"
+        report = self.client.get(url, {"initial": "gw"}).json()
+        self.assertEqual([row["hanzi"] for row in report["results"]], ["光"])
+        self.assertEqual(report["sound_groups"][0]["missed_count"], 4)
+
+        report = self.client.get(url, {"final": "ong", "tone": 1}).json()
+        self.assertEqual([row["hanzi"] for row in report["results"]], ["江", "光"])
+        self.assertEqual(self.client.get(url, {"tone": "x"}).status_code, 400)
+
+    def test_heatmap_filters_by_phoneme(self):
+        url = f"/api/staff/centres/{self.centre.id}/sound-heatmap/"
+        everything = self.client.get(url, {"weeks": 1}).json()
+        initial = everything["sound_groups"].index("INITIAL")
+        self.assertEqual(everything["attempts"][initial], [20])
+
+        filtered = self.client.get(url, {"weeks": 1, "initial": "gw"}).json()
+        self.assertEqual(filtered["attempts"][initial], [10])
+        self.assertEqual(filtered["accuracy"][initial], [0.6])
+        self.assertEqual(filtered["attempts"][filtered["sound_groups"].index("OTHER")], [0])
+
+
+class CentreRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("parent", password="secret")
+        self.centre = Centre.objects.create(name="North", code="N")
+        self.home = Word.objects.create(hanzi="家", jyutping="gaa1", sound_group="INITIAL")
+        self.add = Word.objects.create(hanzi="加", jyutping="gaa1", sound_group="FINAL")
+        self.age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        self.screening_set = ScreeningSet.objects.create(name="Set", age_band=self.age_band)
+
+    def practice(self, *pairs, submitted=True, first_id=None):
+        session = PracticeSession.objects.create(
+            created_by=self.user, centre=self.centre, submitted_at=timezone.now() if submitted else None
+        )
+        for position, (word, is_correct) in enumerate(pairs, start=1):
+            attempt_id = first_id + position if first_id else None
+            PracticeAttempt.objects.create(
+                id=attempt_id, session=session, word=word, position=position, is_correct=is_correct
+            )
+        return session
+
+    def buckets(self, model=CentreWordDailyStats):
+        return sorted(
+            model.objects.values_list("source", "age_band_key", "word__hanzi", "sound_group", "attempts", "misses")
+        )
+
+    def test_refresh_adds_each_submitted_session_once(self):
+        self.practice((self.home, False), (self.add, True))
+        self.practice((self.home, False))
+        self.practice((self.home, True), submitted=False)
+        screening = ScreeningSession.objects.create(
+            created_by=self.user,
+            centre=self.centre,
+            age_band=self.age_band,
+            screening_set=self.screening_set,
+            submitted_at=timezone.now(),
+        )
+        ScreeningAttempt.objects.create(session=screening, word=self.add, position=1, is_correct=False)
+
+        self.assertEqual(refresh_centre_rollups(), {"PRACTICE": 2, "SCREENING": 1})
+        expected = [
+            ("PRACTICE", 0, "加", "FINAL", 1, 0),
+            ("PRACTICE", 0, "家", "INITIAL", 2, 2),
+            ("SCREENING", self.age_band.id, "加", "FINAL", 1, 1),
+        ]
+        self.assertEqual(self.buckets(), expected)
+        self.assertEqual(self.buckets(CentreWordMonthlyStats), expected)
+
+        self.assertEqual(refresh_centre_rollups(), {"PRACTICE": 0, "SCREENING": 0})
+        self.assertEqual(self.buckets(), expected)
+
+    def test_late_commits_are_rolled_up(self):
+        self.practice((self.home, True), first_id=100)
+        refresh_centre_rollups()
+        refresh_centre_rollups()
+
+        # A submit whose transaction commits after the refreshes, with attempt ids below theirs.
+        late = self.practice((self.home, False), (self.add, False), first_id=10)
+
+        self.assertEqual(refresh_centre_rollups(), {"PRACTICE": 1, "SCREENING": 0})
+        self.assertEqual(
+            self.buckets(), [("PRACTICE", 0, "加", "FINAL", 1, 1), ("PRACTICE", 0, "家", "INITIAL", 2, 1)]
+        )
+        late.refresh_from_db()
+        self.assertIsNotNone(late.rolled_up_at)
+
+    def test_sessions_without_a_centre_are_marked_but_not_counted(self):
+        PracticeSession.objects.filter(pk=self.practice((self.home, False)).pk).update(centre=None)
+        self.practice((self.home, True))
+
+        self.assertEqual(refresh_centre_rollups(batch_size=1), {"PRACTICE": 2, "SCREENING": 0})
+        self.assertEqual(self.buckets(), [("PRACTICE", 0, "家", "INITIAL", 1, 0)])
+        self.assertFalse(PracticeSession.objects.filter(rolled_up_at__isnull=True).exists())
+
+    def test_refresh_invalidates_the_heatmap(self):
+        client = staff_client(self.centre)
+        url = f"/api/staff/centres/{self.centre.id}/sound-heatmap/"
+        initial = client.get(url, {"weeks": 1}).json()
+        self.assertEqual(sum(sum(row) for row in initial["attempts"]), 0)
+
+        self.practice((self.home, False), (self.add, True))
+        refresh_centre_rollups()
+
+        refreshed = client.get(url, {"weeks": 1}).json()
+        self.assertEqual(sum(sum(row) for row in refreshed["attempts"]), 2)
+
+
+class CentreReportTests(TestCase):
+    def setUp(self):
+        words = [
+            Word.objects.create(hanzi=chr(0x4E00 + index), sound_group=("INITIAL", "FINAL", "TONE")[index % 3])
+            for index in range(24)
+        ]
+        for label, months, items in (("3-4", 36, words[:6]), ("4-5", 48, words[6:12])):
+            age_band = AgeBand.objects.create(label=label, min_months=months, max_months=months + 12)
+            screening_set = ScreeningSet.objects.create(name=label, age_band=age_band)
+            for position, word in enumerate(items, start=1):
+                ScreeningItem.objects.create(screening_set=screening_set, word=word, position=position)
+        call_command("seed_centre_attempts", attempts=3000, parents=5, days=120, screening_share=0.3, stdout=StringIO())
+        self.centre = Centre.objects.get(code="BENCH")
+        refresh_centre_rollups()
+
+    def raw_totals(self, since):
+        """``{dimension: {key: [attempts, misses]}}`` counted one attempt at a time, keyed like the report rows."""
+        totals = {"word_id": {}, "sound_group": {}, "age_band_id": {}}
+        for model, age_band in ((PracticeAttempt, Value(0)), (ScreeningAttempt, F("session__age_band_id"))):
+            attempts = model.objects.filter(session__centre=self.centre, session__submitted_at__date__gte=since)
+            for word_id, sound_group, age_band_id, is_correct in attempts.values_list(
+                "word_id", "word__sound_group", age_band, "is_correct"
+            ):
+                keys = {"word_id": word_id, "sound_group": sound_group, "age_band_id": age_band_id or None}
+                for dimension, key in keys.items():
+                    counts = totals[dimension].setdefault(key, [0, 0])
+                    counts[0] += 1
+                    counts[1] += not is_correct
+        return totals
+
+    def test_report_matches_the_raw_attempts(self):
+        for days in (10, 45, 120):
+            since = timezone.localdate() - timedelta(days=days)
+            report = centre_missed_report(self.centre.id, since)
+            raw = self.raw_totals(since)
+            for dimension, rows in (
+                ("word_id", report["words"]),
+                ("sound_group", report["sound_groups"]),
+                ("age_band_id", report["age_bands"]),
+            ):
+                expected = {key: tuple(counts) for key, counts in raw[dimension].items()}
+                if dimension == "word_id":
+                    # The word list only has missed words.
+                    expected = {key: counts for key, counts in expected.items() if counts[1]}
+                reported = {row[dimension]: (row["attempts"], row["missed_count"]) for row in rows}
+                self.assertEqual(reported, expected, (days, dimension))
+        self.assertEqual([row["age_band"] for row in report["age_bands"]], [None, "3-4", "4-5"])
+
+    def test_benchmark_reports_each_window(self):
+        output = StringIO()
+        call_command("benchmark_centre_report", days=[7, 30], repeat=1, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertIn("Refreshed rollups (0 sessions)", lines[0])
+        self.assertEqual([line.split(":")[0].strip() for line in lines[1:]], ["7 days", "30 days"])
+        self.assertIn("raw attempts", lines[1])
+
+
+class SoundHeatmapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.centre = Centre.objects.create(name="North", code="N")
+        self.client = staff_client(self.centre)
+        self.url = f"/api/staff/centres/{self.centre.id}/sound-heatmap/"
+        self.home = Word.objects.create(hanzi="家", sound_group="INITIAL")
+        self.add = Word.objects.create(hanzi="加", sound_group="VOWEL")
+        today = timezone.localdate()
+        self.this_week = today - timedelta(days=today.weekday())
+        self.last_week = self.this_week - timedelta(weeks=1)
+
+    def bucket(self, day, word, attempts, misses, source=AttemptSource.PRACTICE, sound_group=None):
+        CentreWordDailyStats.objects.create(
+            centre=self.centre,
+            day=day,
+            source=source,
+            word=word,
+            sound_group=sound_group or word.sound_group,
+            attempts=attempts,
+            misses=misses,
+        )
+
+    def test_wilson_interval_matches_known_values(self):
+        low, high = wilson_interval([8, 0, 5, 0], [10, 5, 5, 0])
+        np.testing.assert_allclose(low[:3], [0.4902, 0.0, 0.5655], atol=1e-4)
+        np.testing.assert_allclose(high[:3], [0.9433, 0.4345, 1.0], atol=1e-4)
+        self.assertTrue(np.isnan(low[3]) and np.isnan(high[3]))
+
+    def test_days_are_binned_into_weeks_per_sound_group(self):
+        self.bucket(self.last_week, self.home, 6, 2)
+        self.bucket(self.last_week + timedelta(days=6), self.home, 4, 0, source=AttemptSource.SCREENING)
+        self.bucket(self.this_week, self.add, 5, 5)
+        # Before the window, and a sound group the lexicon no longer lists.
+        self.bucket(self.last_week - timedelta(days=1), self.home, 9, 9)
+        self.bucket(self.this_week, self.home, 2, 1, source=AttemptSource.SCREENING, sound_group="RETIRED")
+
+        heatmap = self.client.get(self.url, {"weeks": 2}).json()
+
+        self.assertEqual(heatmap["weeks"], [self.last_week.isoformat(), self.this_week.isoformat()])
+        self.assertEqual(heatmap["sound_groups"], [*SoundGroup.values, "RETIRED"])
+        rows = {group: index for index, group in enumerate(heatmap["sound_groups"])}
+        initial, vowel, retired = rows["INITIAL"], rows["VOWEL"], rows["RETIRED"]
+        self.assertEqual(heatmap["attempts"][initial], [10, 0])
+        self.assertEqual(heatmap["accuracy"][initial], [0.8, None])
+        self.assertEqual(heatmap["ci_low"][initial], [0.4902, None])
+        self.assertEqual(heatmap["ci_high"][initial], [0.9433, None])
+        self.assertEqual((heatmap["attempts"][vowel], heatmap["accuracy"][vowel]), ([0, 5], [None, 0.0]))
+        self.assertEqual(heatmap["ci_low"][vowel], [None, 0.0])
+        self.assertEqual(heatmap["accuracy"][retired], [None, 0.5])
+        self.assertEqual(heatmap["attempts"][rows["OTHER"]], [0, 0])
+
+        screening = self.client.get(self.url, {"weeks": 2, "source": "screening"}).json()
+        self.assertEqual(screening["attempts"][initial], [4, 0])
+        self.assertEqual(screening["accuracy"][initial], [1.0, None])
+
+    def test_weeks_and_source_are_validated(self):
+        for params in ({"weeks": 0}, {"weeks": 105}, {"weeks": "x"}, {"source": "homework"}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+
+class CentreExportTests(TestCase):
+    def setUp(self):
+        self.centre = Centre.objects.create(name="North", code="N")
+        self.client = staff_client(self.centre)
+        self.url = f"/api/staff/centres/{self.centre.id}/export/"
+        parent = User.objects.create_user("parent", password="secret")
+        self.home = Word.objects.create(hanzi="家", jyutping="gaa1", sound_group="INITIAL")
+        age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        screening_set = ScreeningSet.objects.create(name="Set", age_band=age_band)
+        now = timezone.now()
+        other = Centre.objects.create(name="South", code="S")
+        for centre, submitted_at, positions in ((self.centre, now, 2), (self.centre, None, 1), (other, now, 1)):
+            session = PracticeSession.objects.create(created_by=parent, centre=centre, submitted_at=submitted_at)
+            for position in range(1, positions + 1):
+                PracticeAttempt.objects.create(
+                    session=session, word=self.home, position=position, is_correct=position == 1
+                )
+        screening = ScreeningSession.objects.create(
+            created_by=parent, centre=self.centre, age_band=age_band, screening_set=screening_set, submitted_at=now
+        )
+        ScreeningAttempt.objects.create(session=screening, word=self.home, position=1, is_correct=False)
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def ndjson(self, **params):
+        body = self.body(self.client.get(self.url, {"output": "ndjson", **params}))
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    def test_exports_submitted_attempts_at_the_centre(self):
+        rows = self.ndjson()
+        self.assertEqual(
+            [(row["source"], row["position"], row["is_correct"], row["age_band"]) for row in rows],
+            [("practice", 1, True, ""), ("practice", 2, False, ""), ("screening", 1, False, "3-4")],
+        )
+        self.assertEqual(rows[0]["hanzi"], "家")
+
+        lines = list(csv.reader(StringIO(self.body(self.client.get(self.url)).decode())))
+        self.assertEqual(lines[0][:3], ["source", "attempt_id", "session_id"])
+        self.assertEqual([line[-1] for line in lines[1:]], [row["cursor"] for row in rows])
+
+    def test_cursor_resumes_after_the_last_row_received(self):
+        rows = self.ndjson()
+        for index, row in enumerate(rows):
+            resumed = self.ndjson(cursor=row["cursor"])
+            self.assertEqual([entry["cursor"] for entry in resumed], [entry["cursor"] for entry in rows[index + 1 :]])
+
+        self.assertEqual(self.client.get(self.url, {"cursor": "not-a-cursor"}).status_code, 400)
+
+    def test_gzip_when_the_client_accepts_it(self):
+        plain = self.body(self.client.get(self.url))
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(self.body(response)), plain)
+
+
+class AttemptArrayTests(TestCase):
+    def setUp(self):
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.parent = User.objects.create_user("parent", password="secret")
+        self.centre = Centre.objects.create(name="North", code="N")
+        self.home = Word.objects.create(hanzi="家")
+        self.age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        self.screening_set = ScreeningSet.objects.create(name="Set", age_band=self.age_band)
+        self.correct = []
+
+    def practice(self, *correct, centre=None, submitted=True):
+        session = PracticeSession.objects.create(
+            created_by=self.parent, centre=centre, submitted_at=timezone.now() if submitted else None
+        )
+        for position, is_correct in enumerate(correct, start=1):
+            PracticeAttempt.objects.create(session=session, word=self.home, position=position, is_correct=is_correct)
+        if submitted:
+            self.correct += correct
+
+    def dump(self):
+        return dump_attempt_arrays(self.directory, batch_size=3, settle_seconds=0)
+
+    def test_dump_writes_columns_and_manifest(self):
+        self.practice(True, False, True, True, False, centre=self.centre)
+        self.practice(False, True)
+        self.practice(True, submitted=False)
+        screening = ScreeningSession.objects.create(
+            created_by=self.parent,
+            centre=self.centre,
+            age_band=self.age_band,
+            screening_set=self.screening_set,
+            submitted_at=timezone.now(),
+        )
+        attempt = ScreeningAttempt.objects.create(session=screening, word=self.home, position=1, is_correct=False)
+
+        self.assertEqual(self.dump(), {"PRACTICE": 7, "SCREENING": 1})
+
+        manifest = json.loads((self.directory / MANIFEST_NAME).read_text())
+        last_practice = PracticeAttempt.objects.filter(session__submitted_at__isnull=False).latest("id").id
+        self.assertEqual(
+            manifest["sources"],
+            {"practice": {"rows": 7, "last_id": last_practice}, "screening": {"rows": 1, "last_id": attempt.id}},
+        )
+        self.assertEqual(manifest["centres"], [{"id": self.centre.id, "label": "N"}])
+        self.assertEqual(manifest["age_bands"], [{"id": self.age_band.id, "label": "3-4"}])
+
+        practice = load_attempt_arrays(self.directory, "practice")
+        self.assertEqual(practice.columns["centre"].tolist(), [0] * 5 + [-1] * 2)
+        self.assertEqual(practice.columns["age_band"].tolist(), [-1] * 7)
+        self.assertEqual(practice.columns["position"].tolist(), [1, 2, 3, 4, 5, 1, 2])
+        self.assertEqual(unpack_correct(practice).tolist(), self.correct)
+        screening_arrays = load_attempt_arrays(self.directory, "screening")
+        self.assertEqual(screening_arrays.columns["age_band"].tolist(), [0])
+        self.assertEqual(screening_arrays.columns["attempt_id"].tolist(), [attempt.id])
+
+        # Every column is a regular .npy file with the fixed-size header and the stored length.
+        for path in (self.directory / "practice").glob("*.npy"):
+            with path.open("rb") as handle:
+                self.assertEqual(np.lib.format.read_magic(handle), (1, 0))
+                shape, _, dtype = np.lib.format.read_array_header_1_0(handle)
+                self.assertEqual(handle.tell(), HEADER_BYTES, path.name)
+            self.assertEqual(shape, (1,) if path.stem == "is_correct" else (7,), path.name)
+            self.assertEqual(np.load(path).dtype, dtype)
+
+    def test_later_dumps_append_only_new_attempts(self):
+        self.practice(True, False, True, centre=self.centre)
+        self.practice(False, False)
+        self.dump()
+        first_ids = load_attempt_arrays(self.directory, "practice").columns["attempt_id"].tolist()
+
+        self.practice(True, True, False, True, centre=self.centre)
+        self.practice(False, True, True)
+        self.assertEqual(self.dump(), {"PRACTICE": 7, "SCREENING": 0})
+        self.assertEqual(self.dump(), {"PRACTICE": 0, "SCREENING": 0})
+
+        practice = load_attempt_arrays(self.directory, "practice")
+        ids = list(PracticeAttempt.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(practice.rows, 12)
+        self.assertEqual(practice.columns["attempt_id"].tolist(), ids)
+        self.assertEqual(practice.columns["attempt_id"][:5].tolist(), first_ids)
+        self.assertEqual(unpack_correct(practice).tolist(), self.correct)
+        self.assertEqual(np.load(self.directory / "practice" / "is_correct.npy").shape, (2,))
+
+    def test_rows_past_the_manifest_are_hidden_and_rewritten(self):
+        self.practice(True, False, True)
+        self.dump()
+        manifest = (self.directory / MANIFEST_NAME).read_text()
+
+        self.practice(False, True, False, True, True)
+        self.dump()
+        # As if the second dump had stopped before replacing the manifest.
+        (self.directory / MANIFEST_NAME).write_text(manifest)
+        self.assertEqual(load_attempt_arrays(self.directory, "practice").rows, 3)
+
+        self.assertEqual(self.dump(), {"PRACTICE": 5, "SCREENING": 0})
+        practice = load_attempt_arrays(self.directory, "practice")
+        ids = list(PracticeAttempt.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(practice.columns["attempt_id"].tolist(), ids)
+        self.assertEqual(unpack_correct(practice).tolist(), self.correct)
+
+
+class CalibrationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(f"child-{index}", password="secret") for index in range(4)]
+        # Misses out of ten attempts for every child: easy, medium and hard, then one rarely tried word.
+        self.words = [Word.objects.create(hanzi=hanzi, hierarchy_stage=9) for hanzi in ("一", "二", "三", "四")]
+        now = timezone.now()
+        for user in self.users:
+            for word, misses in zip(self.words[:3], (1, 5, 9)):
+                UserWordStats.objects.create(user=user, word=word, attempts=10, misses=misses, last_seen_at=now)
+        UserWordStats.objects.create(user=self.users[0], word=self.words[3], attempts=2, misses=0, last_seen_at=now)
+
+    def pairs(self):
+        rows = UserWordStats.objects.order_by("id").values_list("user_id", "word_id", "attempts", "misses")
+        return np.array(list(rows), dtype=PAIR_DTYPE)
+
+    def test_fit_solves_the_penalised_score_equations(self):
+        pairs = self.pairs()
+        fit = fit_rasch(pairs)
+        self.assertTrue(fit.converged)
+
+        easy, medium, hard, rare = fit.difficulty
+        self.assertLess(easy, medium)
+        self.assertLess(medium, hard)
+        self.assertLess(rare, medium)
+        self.assertEqual(fit.word_attempts.tolist(), [40, 40, 40, 2])
+
+        # At the optimum, expected and observed correct answers differ only by the prior's pull.
+        users = np.searchsorted(fit.user_ids, pairs["user"])
+        words = np.searchsorted(fit.word_ids, pairs["word"])
+        expected = 1 / (1 + np.exp(fit.difficulty[words] - fit.ability[users]))
+        residual = pairs["attempts"] - pairs["misses"] - pairs["attempts"] * expected
+        word_score = -np.bincount(words, residual) - fit.difficulty / PRIOR_VARIANCE
+        ability_score = np.bincount(users, residual) - fit.ability / PRIOR_VARIANCE
+        np.testing.assert_allclose(word_score, 0, atol=1e-3)
+        np.testing.assert_allclose(ability_score, 0, atol=1e-3)
+
+    def test_warm_start_needs_fewer_iterations(self):
+        pairs = self.pairs()
+        cold = fit_rasch(pairs)
+        warm = fit_rasch(
+            pairs,
+            initial_ability=dict(zip(cold.user_ids.tolist(), cold.ability.tolist())),
+            initial_difficulty=dict(zip(cold.word_ids.tolist(), cold.difficulty.tolist())),
+        )
+        self.assertLess(warm.iterations, cold.iterations)
+        np.testing.assert_allclose(warm.difficulty, cold.difficulty, atol=1e-3)
+
+    def test_nothing_attempted_fits_and_stores_nothing(self):
+        UserWordStats.objects.all().delete()
+        fit, calibrated = calibrate_word_difficulty()
+        self.assertEqual((len(fit.word_ids), len(fit.user_ids), fit.converged, calibrated), (0, 0, True, 0))
+        self.assertFalse(UserAbility.objects.exists())
+        self.assertFalse(Word.objects.filter(difficulty__isnull=False).exists())
+
+    def test_stages_split_words_into_equal_groups_by_difficulty(self):
+        self.assertEqual(stages_from_difficulty([0.5, -1.0, 2.0, 0.0], 2).tolist(), [2, 1, 2, 1])
+        self.assertEqual(stages_from_difficulty([0.5, -1.0, 2.0], 3).tolist(), [2, 1, 3])
+
+        Word.objects.filter(pk=self.words[1].pk).update(is_active=False)
+        version = current_lexicon_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            _, calibrated = calibrate_word_difficulty(min_attempts=20, stages=2)
 
-# Create your tests here.
+        self.assertEqual(calibrated, 3)
+        words = Word.objects.order_by("id")
+        self.assertEqual([word.hierarchy_stage for word in words], [1, 9, 2, 9])
+        self.assertEqual([word.difficulty is None for word in words], [False, False, False, True])
+        self.assertEqual(UserAbility.objects.count(), len(self.users))
+        self.assertNotEqual(current_lexicon_version(), version)
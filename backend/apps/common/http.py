@@ -0,0 +1,49 @@
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+# For payloads that never change once written, such as submitted sessions.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if "*" in candidates:
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix from an intermediary still matches.
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def rendered_json_response(request, body: bytes, etag: str, cache_control: str = "private, no-cache"):
+    """Serve pre-rendered JSON bytes, answering a matching If-None-Match with 304."""
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def boolean_param(request, name, default=False):
+    """A boolean from the request body or query string, parsed as DRF parses ``BooleanField`` input.
+
+    ``"false"``, ``"0"`` and the like are false; anything unrecognised is a 400.
+    """
+    value = request.data.get(name, request.query_params.get(name))
+    if value is None or value == "":
+        return default
+    try:
+        return serializers.BooleanField().to_internal_value(value)
+    except serializers.ValidationError:
+        raise ParseError(f"{name} must be a boolean.")
@@ -0,0 +1,120 @@
+"""``Idempotency-Key`` support for POST endpoints that create or submit sessions.
+
+The first request with a key inserts an ``IdempotencyRecord`` in the same
+transaction as the view's own writes and stores the rendered response. A retry
+with the same key hits the unique index, reads the committed record and replays
+the stored response without running the view again. A concurrent duplicate waits
+on that index until the first request commits, so no explicit locks are needed.
+
+Only successful (2xx) responses are stored. An error response drops the claim,
+so a client can correct the problem, e.g. a session that was not ready to
+submit, and retry with the same key.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+
+def _digest(*parts):
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _request_hash(request):
+    return _digest(request.method, json.dumps(request.data, sort_keys=True, default=str))
+
+
+def _claim(key, request_hash):
+    """Insert the record for ``key``, or return the existing live one if another request owns it."""
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyRecord.objects.create(key=key, request_hash=request_hash, expires_at=now + IDEMPOTENCY_TTL)
+        return None
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyRecord.objects.get(key=key)
+    if existing.expires_at > now:
+        return existing
+    # The key expired but has not been purged yet: take it over for this request.
+    IdempotencyRecord.objects.filter(pk=existing.pk).update(
+        request_hash=request_hash, status_code=None, body=b"", content_type="", expires_at=now + IDEMPOTENCY_TTL
+    )
+    return None
+
+
+def _replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {"detail": f"{HEADER} has already been used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _rendered(view, request, response):
+    """Render a DRF ``Response`` once into a plain ``HttpResponse`` with the same headers.
+
+    It uses the renderer ``initial()`` negotiated, so the bytes match what the client would
+    have received, and ``dispatch()`` then finalizes the plain response just as it does a replay.
+    """
+    if not isinstance(response, Response):
+        return response
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    rendered = HttpResponse(response.rendered_content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    return rendered
+
+
+def idempotent(view_method):
+    """Make an ``APIView`` handler replay its first response for repeated ``Idempotency-Key`` values."""
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        header = request.headers.get(HEADER)
+        if not header:
+            return view_method(view, request, *args, **kwargs)
+        if len(header) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = _digest(str(request.user.pk), request.method, request.path, header)
+        request_hash = _request_hash(request)
+        with transaction.atomic():
+            record = _claim(key, request_hash)
+            if record is not None:
+                return _replay(record, request_hash)
+
+            response = _rendered(view, request, view_method(view, request, *args, **kwargs))
+            if response.streaming:
+                raise TypeError(f"{view_method.__qualname__} returned a streaming response, which cannot be replayed.")
+            if status.is_success(response.status_code):
+                IdempotencyRecord.objects.filter(key=key).update(
+                    status_code=response.status_code, body=response.content, content_type=response["Content-Type"]
+                )
+            else:
+                IdempotencyRecord.objects.filter(key=key).delete()
+        return response
+
+    return wrapper
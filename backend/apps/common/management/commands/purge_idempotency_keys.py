@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.common.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses that have expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        expired_records = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now())
+        deleted = 0
+        while True:
+            expired = list(expired_records.values_list("pk", flat=True)[: options["batch_size"]])
+            if not expired:
+                break
+            deleted += IdempotencyRecord.objects.filter(pk__in=expired).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records."))
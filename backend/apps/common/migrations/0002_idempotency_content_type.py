@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='content_type',
+            field=models.CharField(default='application/json', max_length=100),
+        ),
+    ]
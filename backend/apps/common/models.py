@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class IdempotencyRecord(models.Model):
+    """The stored response to a request sent with an ``Idempotency-Key`` header.
+
+    ``key`` is a digest of the user, endpoint and header value, so the table needs no
+    foreign keys and one unique index both finds replays and collapses concurrent
+    duplicates.
+    """
+
+    key = models.CharField(max_length=32, unique=True)
+    request_hash = models.CharField(max_length=32)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    body = models.BinaryField(default=b"")
+    content_type = models.CharField(max_length=100, default="application/json")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,146 @@
+import threading
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from apps.lexicon.models import Word
+from apps.practice.models import PracticeSession
+
+from .models import IdempotencyRecord
+from .pagination import decode_cursor, encode_cursor, paginate_keyset
+
+
+class CursorTests(TestCase):
+    def test_round_trip_keeps_microseconds(self):
+        started = datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        token = encode_cursor([started, 42, "香港"])
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token, 3), ["2026-03-01T09:30:15.123456+00:00", 42, "香港"])
+
+    def test_rejects_malformed_cursors(self):
+        for token in ("!!!", encode_cursor([1, 2]), "bm90IGpzb24"):
+            with self.subTest(token=token), self.assertRaises(ParseError):
+                decode_cursor(token, 3)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("parent", password="secret")
+        base = datetime(2026, 3, 1, 9, 0, tzinfo=dt_timezone.utc)
+        # Three sessions share each start time, so pages must break ties on id.
+        self.sessions = PracticeSession.objects.bulk_create(
+            [PracticeSession(created_by=user, started_at=base + timedelta(minutes=index // 3)) for index in range(8)]
+        )
+        self.queryset = PracticeSession.objects.filter(created_by=user)
+
+    def walk(self, ordering, page_size):
+        pages, cursor = [], None
+        while True:
+            rows, cursor = paginate_keyset(self.queryset, ordering, cursor=cursor, page_size=page_size)
+            pages.append([row.id for row in rows])
+            if cursor is None:
+                return pages
+
+    def test_descending_pages_cover_tied_rows_once(self):
+        expected = [session.id for session in sorted(self.sessions, key=lambda s: (s.started_at, s.id), reverse=True)]
+        for page_size in (1, 2, 3, 5, 8):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(("-started_at", "-id"), page_size)
+                self.assertEqual([session_id for page in pages for session_id in page], expected)
+                self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+    def test_ascending_pages_cover_tied_rows_once(self):
+        expected = [session.id for session in sorted(self.sessions, key=lambda s: (s.started_at, s.id))]
+        pages = self.walk(("started_at", "id"), 2)
+        self.assertEqual([session_id for page in pages for session_id in page], expected)
+
+    def test_exact_last_page_has_no_cursor(self):
+        rows, cursor = paginate_keyset(self.queryset, ("-started_at", "-id"), page_size=8)
+        self.assertEqual(len(rows), 8)
+        self.assertIsNone(cursor)
+
+
+class IdempotencyTests(TestCase):
+    url = "/api/practice/sessions/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, key, planned_item_count=2):
+        return self.client.post(
+            self.url, {"planned_item_count": planned_item_count}, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_the_first_response(self):
+        Word.objects.create(hanzi="家", jyutping="gaa1")
+        first = self.create("create-1")
+        retry = self.create("create-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+        self.assertEqual(retry["Content-Type"], first["Content-Type"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(PracticeSession.objects.count(), 1)
+
+    def test_reusing_a_key_with_a_different_body_is_rejected(self):
+        Word.objects.create(hanzi="家", jyutping="gaa1")
+        self.assertEqual(self.create("create-1").status_code, 201)
+
+        response = self.create("create-1", planned_item_count=3)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(PracticeSession.objects.count(), 1)
+
+    def test_error_responses_are_not_stored(self):
+        self.assertEqual(self.create("create-1").status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        Word.objects.create(hanzi="家", jyutping="gaa1")
+        response = self.create("create-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    thread_count = 6
+
+    def test_concurrent_duplicates_create_one_session(self):
+        cache.clear()
+        user = User.objects.create_user("parent", password="secret")
+        Word.objects.create(hanzi="家", jyutping="gaa1")
+        barrier = threading.Barrier(self.thread_count)
+        responses = []
+
+        def create():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                responses.append(
+                    client.post("/api/practice/sessions/", {}, format="json", HTTP_IDEMPOTENCY_KEY="create-1")
+                )
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create) for _ in range(self.thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        outcomes = {(response.status_code, response.content) for response in responses}
+        self.assertEqual(outcomes, {(201, responses[0].content)})
+        replayed = [response for response in responses if response.has_header("Idempotent-Replayed")]
+        self.assertEqual(len(replayed), self.thread_count - 1)
+        self.assertEqual(PracticeSession.objects.count(), 1)
@@ -11,7 +11,7 @@ class WordComponentInline(admin.TabularInline):
 
 @admin.register(Word)
 class WordAdmin(admin.ModelAdmin):
-    list_display = ("id", "hanzi", "jyutping", "sound_group", "hierarchy_stage", "is_active")
+    list_display = ("id", "hanzi", "jyutping", "sound_group", "hierarchy_stage", "difficulty", "is_active")
     list_filter = ("sound_group", "hierarchy_stage", "is_active")
     search_fields = ("hanzi", "jyutping", "meaning")
     inlines = [WordComponentInline]
@@ -1,8 +1,11 @@
 from django.urls import path
 
-from .views import WordDetailView, WordListView
+from .views import WordDetailView, WordListView, WordMinimalPairsView, WordTreeBatchView, WordTreeView
 
 urlpatterns = [
     path("words/", WordListView.as_view(), name="word-list"),
+    path("words/tree/", WordTreeBatchView.as_view(), name="word-tree-batch"),
     path("words/<int:pk>/", WordDetailView.as_view(), name="word-detail"),
+    path("words/<int:pk>/tree/", WordTreeView.as_view(), name="word-tree"),
+    path("words/<int:pk>/minimal-pairs/", WordMinimalPairsView.as_view(), name="word-minimal-pairs"),
 ]
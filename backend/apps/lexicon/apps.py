@@ -6,3 +6,6 @@ class LexiconConfig(AppConfig):
     name = "apps.lexicon"
     label = "lexicon"
     verbose_name = "Lexicon"
+
+    def ready(self):
+        from . import signals  # noqa: F401
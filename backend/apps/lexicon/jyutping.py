@@ -0,0 +1,71 @@
+import re
+from typing import NamedTuple
+
+_NON_LETTERS = re.compile(r"[^a-z]+")
+_SYLLABLE = re.compile(r"^([a-z]+)([1-6])?$")
+
+# Longest first so that e.g. "gw" wins over "g" and "aa" over "a".
+INITIALS = ("gw", "kw", "ng", "b", "p", "m", "f", "d", "t", "n", "l", "g", "k", "h", "w", "z", "c", "s", "j")
+NUCLEI = ("aa", "oe", "eo", "yu", "a", "e", "i", "o", "u")
+CODAS = ("ng", "i", "u", "m", "n", "p", "t", "k")
+SYLLABIC_NASALS = ("m", "ng")
+
+
+class JyutpingError(ValueError):
+    pass
+
+
+class Syllable(NamedTuple):
+    initial: str
+    nucleus: str
+    coda: str
+    tone: int | None
+
+    @property
+    def final(self):
+        return self.nucleus + self.coda
+
+
+def normalize_jyutping(value: str) -> str:
+    """Lower-case, tone-stripped jyutping with single spaces between syllables."""
+    syllables = (_NON_LETTERS.sub("", part) for part in value.lower().split())
+    return " ".join(syllable for syllable in syllables if syllable)
+
+
+def _split_final(final):
+    for nucleus in NUCLEI:
+        if final.startswith(nucleus):
+            coda = final[len(nucleus) :]
+            if coda == "" or coda in CODAS:
+                return nucleus, coda
+    return None
+
+
+def parse_syllable(text: str) -> Syllable:
+    """Split one jyutping syllable such as ``gwong2`` into initial, nucleus, coda and tone."""
+    match = _SYLLABLE.match(text.strip().lower())
+    if not match:
+        raise JyutpingError(f"Invalid jyutping syllable: {text!r}")
+    body, tone = match.group(1), match.group(2)
+    tone = int(tone) if tone else None
+
+    if body in SYLLABIC_NASALS:
+        return Syllable("", body, "", tone)
+
+    for initial in (*INITIALS, ""):
+        if body.startswith(initial):
+            parts = _split_final(body[len(initial) :])
+            if parts:
+                return Syllable(initial, *parts, tone)
+    raise JyutpingError(f"Invalid jyutping syllable: {text!r}")
+
+
+def parse_jyutping(value: str):
+    """Return ``[(position, Syllable), ...]`` for the valid syllables of ``value``, counting from 1."""
+    parsed = []
+    for position, text in enumerate(value.split(), start=1):
+        try:
+            parsed.append((position, parse_syllable(text)))
+        except JyutpingError:
+            continue
+    return parsed
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.lexicon.models import Word
+from apps.lexicon.services import sync_word_phonemes
+
+
+class Command(BaseCommand):
+    help = "Re-parse every word's jyutping into WordSyllable rows and minimal-pair keys in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        last_id = 0
+        total = 0
+
+        while True:
+            words = list(Word.objects.filter(id__gt=last_id).order_by("id").only("id", "jyutping")[:batch_size])
+            if not words:
+                break
+            with transaction.atomic():
+                sync_word_phonemes(words)
+            last_id = words[-1].id
+            total += len(words)
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"{total} words")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Parsed {total} words in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s).")
+        )
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.lexicon.jyutping import INITIALS, normalize_jyutping
+from apps.lexicon.models import Word
+from apps.lexicon.search import refresh_search_index, search_words
+
+DEFAULT_QUERIES = ["港", "香港", "gong", "gong2", "hoeng gong", "hoe", "m", "apple", "red fruit"]
+FINALS = """
+    aa aai aau aam aan aang aak ai au am an ang e ei eng i ing o oi ou on ong u ung oe oeng eoi eon yu yun
+""".split()
+MEANINGS = ("apple", "red", "fruit", "harbour", "river", "water", "big", "small", "dog", "cat", "tree", "hand", "home")
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _seed_words(count, generator):
+    words = [
+        Word(
+            hanzi="".join(chr(generator.randint(0x4E00, 0x9FA5)) for _ in range(generator.randint(1, 3))),
+            jyutping=" ".join(
+                f"{generator.choice(INITIALS)}{generator.choice(FINALS)}{generator.randint(1, 6)}"
+                for _ in range(generator.randint(1, 3))
+            ),
+            meaning=" ".join(generator.sample(MEANINGS, generator.randint(1, 3))),
+            hierarchy_stage=generator.randint(1, 5),
+        )
+        for _ in range(count)
+    ]
+    for word in words:
+        word.search_jyutping = normalize_jyutping(word.jyutping)
+    created = Word.objects.bulk_create(words, batch_size=1000)
+    refresh_search_index(created)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the first page of word searches. With --seed, adds synthetic words for the run "
+        "and rolls them back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--seed", type=int, default=0, help="Synthetic words to add for the run.")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    _seed_words(options["seed"], random.Random(0))
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        queryset = Word.objects.filter(is_active=True)
+        self.stdout.write(f"{queryset.count()} active words.")
+        for query in options["queries"]:
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                results = list(search_words(query, queryset)[: options["page_size"]])
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{query!r:>14}: {len(results):>3} results, median {statistics.median(timings):6.1f} ms, p95 {p95:6.1f} ms"
+            )
@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.lexicon.transfer import FORMATS, detect_format, iter_export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = "Stream every word and its components to CSV or JSONL (stdout by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default="-")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        fmt = options["format"] or detect_format(path)
+        started = time.perf_counter()
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        stream = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        try:
+            write_rows(stream, fmt, counted(iter_export_rows(chunk_size=options["chunk_size"])))
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f"Exported {count} words in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s).")
@@ -0,0 +1,44 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lexicon.transfer import FORMATS, LexiconImportError, detect_format, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert words and their components from a CSV or JSONL file (use - for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        started = time.perf_counter()
+
+        def report(stats):
+            if options["verbosity"] >= 2:
+                rate = stats["rows"] / max(time.perf_counter() - started, 1e-9)
+                self.stdout.write(f"{stats['rows']} rows ({rate:.0f} rows/s)")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        try:
+            stats = import_rows(read_rows(stream, fmt), batch_size=options["batch_size"], on_batch=report)
+        except LexiconImportError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['rows']} words ({stats['created']} created, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged) "
+                f"and {stats['components']} components in {elapsed:.1f}s "
+                f"({stats['rows'] / max(elapsed, 1e-9):.0f} rows/s)."
+            )
+        )
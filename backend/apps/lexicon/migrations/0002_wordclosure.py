@@ -0,0 +1,71 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:02
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    # A frozen copy of WordClosureManager.rebuild as it was when this migration was
+    # written, so later changes to the manager cannot alter it.
+    WordClosure = apps.get_model("lexicon", "WordClosure")
+    WordComponent = apps.get_model("lexicon", "WordComponent")
+    children = defaultdict(list)
+    for parent_id, component_id in WordComponent.objects.values_list("parent_word_id", "component_word_id"):
+        children[parent_id].append(component_id)
+
+    paths = {}
+    visiting = set()
+    for root_id in children:
+        stack = [(root_id, False)]
+        while stack:
+            word_id, expanded = stack.pop()
+            if word_id in paths:
+                continue
+            if not expanded:
+                if word_id in visiting:
+                    raise ValueError(f"Word {word_id} is part of a component cycle.")
+                visiting.add(word_id)
+                stack.append((word_id, True))
+                stack.extend((child_id, False) for child_id in children.get(word_id, ()) if child_id not in paths)
+                continue
+            merged = defaultdict(int)
+            for child_id in children.get(word_id, ()):
+                merged[child_id] += 1
+                for descendant_id, count in paths[child_id].items():
+                    merged[descendant_id] += count
+            paths[word_id] = merged
+
+    WordClosure.objects.bulk_create(
+        [
+            WordClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, path_count=count)
+            for ancestor_id, descendants in paths.items()
+            for descendant_id, count in descendants.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path_count', models.PositiveIntegerField(default=1)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='lexicon.word')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='lexicon.word')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='lexicon_closure_desc_anc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uniq_wordclosure_ancestor_descendant')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:06
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of apps.lexicon.jyutping.normalize_jyutping and apps.lexicon.search.search_tokens
+# as they were when this migration was written, so later changes to them cannot alter it.
+_NON_LETTERS = re.compile(r"[^a-z]+")
+_KEYWORD = re.compile(r"[^\W_]+")
+
+
+def normalize_jyutping(value):
+    syllables = (_NON_LETTERS.sub("", part) for part in value.lower().split())
+    return " ".join(syllable for syllable in syllables if syllable)
+
+
+def search_tokens(hanzi, jyutping, meaning, max_length):
+    tokens = set()
+    hanzi = hanzi.strip()
+    tokens.update(f"h:{char}" for char in hanzi)
+    tokens.update(f"h:{hanzi[index : index + 2]}" for index in range(len(hanzi) - 1))
+
+    reading = normalize_jyutping(jyutping)
+    if reading:
+        tokens.add(f"p:{reading}")
+        tokens.update(f"j:{syllable}" for syllable in reading.split())
+
+    tokens.update(f"m:{keyword}" for keyword in _KEYWORD.findall(meaning.lower()))
+    return {token[:max_length] for token in tokens}
+
+
+def build_search_index(apps, schema_editor):
+    Word = apps.get_model("lexicon", "Word")
+    WordSearchToken = apps.get_model("lexicon", "WordSearchToken")
+    max_length = WordSearchToken._meta.get_field("token").max_length
+
+    words = list(Word.objects.only("hanzi", "jyutping", "meaning"))
+    for word in words:
+        word.search_jyutping = normalize_jyutping(word.jyutping)
+    Word.objects.bulk_update(words, ["search_jyutping"], batch_size=100)
+    WordSearchToken.objects.bulk_create(
+        [
+            WordSearchToken(word_id=word.pk, token=token)
+            for word in words
+            for token in search_tokens(word.hanzi, word.jyutping, word.meaning, max_length)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0002_wordclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='search_jyutping',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50),
+        ),
+        migrations.CreateModel(
+            name='WordSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='lexicon.word')),
+            ],
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
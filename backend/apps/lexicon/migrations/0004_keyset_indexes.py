@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0003_word_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hierarchy_stage', 'id'], name='lexicon_word_active_stage_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordSyllable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('initial', models.CharField(blank=True, max_length=2)),
+                ('nucleus', models.CharField(max_length=2)),
+                ('coda', models.CharField(blank=True, max_length=2)),
+                ('final', models.CharField(max_length=4)),
+                ('tone', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='syllables', to='lexicon.word')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['initial', 'tone'], name='lexicon_syllable_initial_idx'), models.Index(fields=['final', 'tone'], name='lexicon_syllable_final_idx'), models.Index(fields=['coda', 'tone'], name='lexicon_syllable_coda_idx'), models.Index(fields=['nucleus', 'tone'], name='lexicon_syllable_nucleus_idx')],
+                'constraints': [models.UniqueConstraint(fields=('word', 'position'), name='uniq_wordsyllable_word_position')],
+            },
+        ),
+    ]
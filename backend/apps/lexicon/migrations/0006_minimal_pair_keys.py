@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0005_word_syllables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MinimalPairKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField()),
+                ('position', models.PositiveSmallIntegerField()),
+                ('slot', models.CharField(choices=[('initial', 'Initial'), ('nucleus', 'Nucleus'), ('coda', 'Coda'), ('tone', 'Tone')], max_length=8)),
+                ('value', models.CharField(blank=True, max_length=2)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='minimal_pair_keys', to='lexicon.word')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'value'], name='lexicon_minpair_key_idx'), models.Index(fields=['slot', 'value'], name='lexicon_minpair_slot_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0006_minimal_pair_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='difficulty',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
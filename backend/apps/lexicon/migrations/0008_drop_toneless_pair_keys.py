@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def drop_toneless_tone_keys(apps, schema_editor):
+    # Syllables written without a tone no longer get a tone key; see apps.lexicon.minimal_pairs.
+    apps.get_model("lexicon", "MinimalPairKey").objects.filter(slot="tone", value="").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0007_word_difficulty'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_toneless_tone_keys, migrations.RunPython.noop),
+    ]
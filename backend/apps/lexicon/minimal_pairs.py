@@ -0,0 +1,109 @@
+"""Minimal-pair index over the lexicon.
+
+For every syllable position and phoneme slot a word gets one key: the hash of its
+whole phoneme sequence with that slot replaced by a wildcard. Words that share a
+key are identical everywhere except that slot, so finding pairs is an indexed key
+lookup and building the index is linear in the lexicon size.
+"""
+
+import hashlib
+from collections import defaultdict
+
+from .jyutping import parse_jyutping
+from .models import MinimalPairKey, PhonemeSlot
+
+SLOTS = tuple(PhonemeSlot.values)
+WILDCARD = "*"
+
+
+def _hash(parts):
+    digest = hashlib.blake2b("\x1f".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _slot_value(syllable, slot):
+    value = getattr(syllable, slot)
+    return "" if value is None else str(value)
+
+
+def minimal_pair_keys(jyutping):
+    """Yield ``(key, position, slot, value)`` for a reading, or nothing if any syllable is invalid.
+
+    A syllable written without a tone gets no tone key, since "gaa" and "gaa1" may be the same word.
+    """
+    parsed = parse_jyutping(jyutping)
+    if not parsed or len(parsed) != len(jyutping.split()):
+        return
+    phonemes = [[_slot_value(syllable, slot) for slot in SLOTS] for _, syllable in parsed]
+    for index, (position, _) in enumerate(parsed):
+        for slot_index, slot in enumerate(SLOTS):
+            if slot == PhonemeSlot.TONE and parsed[index][1].tone is None:
+                continue
+            pattern = [list(syllable) for syllable in phonemes]
+            pattern[index][slot_index] = WILDCARD
+            yield _hash("|".join(syllable) for syllable in pattern), position, slot, phonemes[index][slot_index]
+
+
+def sync_minimal_pair_keys(words):
+    """Replace the minimal-pair keys of ``words`` (saved instances) in two queries."""
+    words = [word for word in words if word.pk is not None]
+    if not words:
+        return
+    MinimalPairKey.objects.filter(word_id__in=[word.pk for word in words]).delete()
+    MinimalPairKey.objects.bulk_create(
+        [
+            MinimalPairKey(word_id=word.pk, key=key, position=position, slot=slot, value=value)
+            for word in words
+            for key, position, slot, value in minimal_pair_keys(word.jyutping)
+        ],
+        batch_size=1000,
+    )
+
+
+def minimal_pairs_for_word(word_id):
+    """Return ``[(other_word, position, slot, from_value, to_value), ...]`` for an active word."""
+    own = {row.key: row for row in MinimalPairKey.objects.filter(word_id=word_id)}
+    if not own:
+        return []
+
+    partners = (
+        MinimalPairKey.objects.filter(key__in=own, word__is_active=True)
+        .exclude(word_id=word_id)
+        .select_related("word")
+        .order_by("word__hierarchy_stage", "word_id")
+    )
+    pairs = []
+    for partner in partners:
+        mine = own[partner.key]
+        if partner.value != mine.value:
+            pairs.append((partner.word, mine.position, mine.slot, mine.value, partner.value))
+    return pairs
+
+
+def minimal_pairs_for_contrast(slot, from_value, to_value, limit=10):
+    """Return up to ``limit`` ``(word_a, word_b)`` pairs contrasting ``from_value``/``to_value`` in ``slot``."""
+    to_keys = MinimalPairKey.objects.filter(slot=slot, value=to_value, word__is_active=True).values("key")
+    sides = (
+        MinimalPairKey.objects.filter(slot=slot, value=from_value, word__is_active=True, key__in=to_keys)
+        .select_related("word")
+        .order_by("word__hierarchy_stage", "word_id")
+    )
+
+    firsts = {}
+    # Homophones share a key, so stream rows until ``limit`` distinct keys rather than slicing.
+    for row in sides.iterator(chunk_size=limit * 4):
+        firsts.setdefault(row.key, row.word)
+        if len(firsts) >= limit:
+            break
+    if not firsts:
+        return []
+
+    seconds = defaultdict(list)
+    partners = (
+        MinimalPairKey.objects.filter(key__in=list(firsts), value=to_value, word__is_active=True)
+        .select_related("word")
+        .order_by("word__hierarchy_stage", "word_id")
+    )
+    for row in partners:
+        seconds[row.key].append(row.word)
+    return [(word, seconds[key][0]) for key, word in firsts.items() if seconds[key]]
@@ -1,5 +1,9 @@
+from collections import defaultdict
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+
+from .jyutping import normalize_jyutping
 
 
 class SoundGroup(models.TextChoices):
@@ -20,10 +24,31 @@ class Word(models.Model):
 
     sound_group = models.CharField(max_length=16, choices=SoundGroup.choices, default=SoundGroup.OTHER)
     hierarchy_stage = models.PositiveSmallIntegerField(default=1)
+    # Rasch difficulty in logits, fitted by calibrate_word_difficulty; null until the word has enough attempts.
+    difficulty = models.FloatField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Tone-free, lower-case jyutping kept in sync by save(); used for search.
+    search_jyutping = models.CharField(max_length=50, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["hierarchy_stage", "id"],
+                condition=models.Q(is_active=True),
+                name="lexicon_word_active_stage_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_jyutping = normalize_jyutping(self.jyutping)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "jyutping" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "search_jyutping"}
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return self.hanzi or self.jyutping or f"Word {self.pk}"
 
@@ -40,20 +65,10 @@ class WordComponent(models.Model):
         ordering = ["position"]
 
     def _creates_cycle(self):
-        visited = set()
-        stack = [self.component_word_id]
-        target = self.parent_word_id
-
-        while stack:
-            current = stack.pop()
-            if current == target:
-                return True
-            if current in visited:
-                continue
-            visited.add(current)
-            next_ids = WordComponent.objects.filter(parent_word_id=current).values_list("component_word_id", flat=True)
-            stack.extend(next_ids)
-        return False
+        return WordClosure.objects.filter(
+            ancestor_id=self.component_word_id,
+            descendant_id=self.parent_word_id,
+        ).exists()
 
     def clean(self):
         super().clean()
@@ -64,7 +79,201 @@ class WordComponent(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = (
+                    WordComponent.objects.filter(pk=self.pk).values_list("parent_word_id", "component_word_id").first()
+                )
+            result = super().save(*args, **kwargs)
+            edge = (self.parent_word_id, self.component_word_id)
+            if previous != edge:
+                if previous:
+                    WordClosure.objects.remove_edge(*previous)
+                WordClosure.objects.add_edge(*edge)
+        return result
 
     def __str__(self):
         return f"{self.parent_word_id} <- {self.component_word_id} ({self.position})"
+
+
+class WordClosureManager(models.Manager):
+    def _paths_through(self, parent_id, component_id):
+        ancestors = [(parent_id, 1), *self.filter(descendant_id=parent_id).values_list("ancestor_id", "path_count")]
+        descendants = [
+            (component_id, 1),
+            *self.filter(ancestor_id=component_id).values_list("descendant_id", "path_count"),
+        ]
+        return {
+            (ancestor_id, descendant_id): ancestor_paths * descendant_paths
+            for ancestor_id, ancestor_paths in ancestors
+            for descendant_id, descendant_paths in descendants
+        }
+
+    def _apply(self, deltas, sign):
+        existing = {
+            (row.ancestor_id, row.descendant_id): row
+            for row in self.filter(
+                ancestor_id__in={ancestor_id for ancestor_id, _ in deltas},
+                descendant_id__in={descendant_id for _, descendant_id in deltas},
+            )
+        }
+        to_create, to_update, to_delete = [], [], []
+        for (ancestor_id, descendant_id), paths in deltas.items():
+            row = existing.get((ancestor_id, descendant_id))
+            if row is None:
+                if sign > 0:
+                    to_create.append(self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, path_count=paths))
+                continue
+            row.path_count += sign * paths
+            if row.path_count > 0:
+                to_update.append(row)
+            else:
+                to_delete.append(row.pk)
+
+        if to_create:
+            self.bulk_create(to_create)
+        if to_update:
+            self.bulk_update(to_update, ["path_count"])
+        if to_delete:
+            self.filter(pk__in=to_delete).delete()
+
+    def add_edge(self, parent_id, component_id):
+        with transaction.atomic():
+            self._apply(self._paths_through(parent_id, component_id), 1)
+
+    def remove_edge(self, parent_id, component_id):
+        with transaction.atomic():
+            self._apply(self._paths_through(parent_id, component_id), -1)
+
+    def rebuild(self):
+        """Recompute the whole table from the component edges and return the number of rows written."""
+        component_model = self.model._meta.apps.get_model("lexicon", "WordComponent")
+        children = defaultdict(list)
+        for parent_id, component_id in component_model.objects.values_list("parent_word_id", "component_word_id"):
+            children[parent_id].append(component_id)
+
+        paths = {}
+        visiting = set()
+        for root_id in children:
+            stack = [(root_id, False)]
+            while stack:
+                word_id, expanded = stack.pop()
+                if word_id in paths:
+                    continue
+                if not expanded:
+                    if word_id in visiting:
+                        raise ValueError(f"Word {word_id} is part of a component cycle.")
+                    visiting.add(word_id)
+                    stack.append((word_id, True))
+                    stack.extend((child_id, False) for child_id in children.get(word_id, ()) if child_id not in paths)
+                    continue
+                merged = defaultdict(int)
+                for child_id in children.get(word_id, ()):
+                    merged[child_id] += 1
+                    for descendant_id, count in paths[child_id].items():
+                        merged[descendant_id] += count
+                paths[word_id] = merged
+
+        rows = [
+            self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, path_count=count)
+            for ancestor_id, descendants in paths.items()
+            for descendant_id, count in descendants.items()
+        ]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class WordClosure(models.Model):
+    """Transitive closure of the component graph: one row per (ancestor, descendant) pair.
+
+    ``path_count`` is the number of distinct component paths between the pair, which
+    lets an edge be removed without recomputing the shared parts of the graph.
+    """
+
+    ancestor = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="ancestor_links")
+    path_count = models.PositiveIntegerField(default=1)
+
+    objects = WordClosureManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="uniq_wordclosure_ancestor_descendant"),
+        ]
+        indexes = [
+            models.Index(fields=["descendant", "ancestor"], name="lexicon_closure_desc_anc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.path_count})"
+
+
+class WordSearchToken(models.Model):
+    """Inverted search index entry; ``token`` is ``<kind>:<value>`` (see ``apps.lexicon.search``)."""
+
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64, db_index=True)
+
+    def __str__(self):
+        return f"{self.token} -> {self.word_id}"
+
+
+class WordSyllable(models.Model):
+    """One parsed jyutping syllable of a word, kept in sync with ``Word.jyutping``."""
+
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="syllables")
+    position = models.PositiveSmallIntegerField()
+    initial = models.CharField(max_length=2, blank=True)
+    nucleus = models.CharField(max_length=2)
+    coda = models.CharField(max_length=2, blank=True)
+    final = models.CharField(max_length=4)
+    tone = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["word", "position"], name="uniq_wordsyllable_word_position"),
+        ]
+        indexes = [
+            models.Index(fields=["initial", "tone"], name="lexicon_syllable_initial_idx"),
+            models.Index(fields=["final", "tone"], name="lexicon_syllable_final_idx"),
+            models.Index(fields=["coda", "tone"], name="lexicon_syllable_coda_idx"),
+            models.Index(fields=["nucleus", "tone"], name="lexicon_syllable_nucleus_idx"),
+        ]
+        ordering = ["position"]
+
+    def __str__(self):
+        tone = self.tone or ""
+        return f"{self.word_id}#{self.position} {self.initial}{self.final}{tone}"
+
+
+class PhonemeSlot(models.TextChoices):
+    INITIAL = "initial", "Initial"
+    NUCLEUS = "nucleus", "Nucleus"
+    CODA = "coda", "Coda"
+    TONE = "tone", "Tone"
+
+
+class MinimalPairKey(models.Model):
+    """A word's phoneme sequence with one slot blanked out, hashed to 64 bits.
+
+    Two words sharing a key with different ``value`` differ in exactly that slot,
+    i.e. they form a minimal pair (see ``apps.lexicon.minimal_pairs``).
+    """
+
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="minimal_pair_keys")
+    key = models.BigIntegerField()
+    position = models.PositiveSmallIntegerField()
+    slot = models.CharField(max_length=8, choices=PhonemeSlot.choices)
+    value = models.CharField(max_length=2, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "value"], name="lexicon_minpair_key_idx"),
+            models.Index(fields=["slot", "value"], name="lexicon_minpair_slot_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.word_id} {self.slot}@{self.position}={self.value}"
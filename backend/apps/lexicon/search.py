@@ -0,0 +1,124 @@
+"""Hanzi / jyutping / meaning search over the lexicon.
+
+Matching goes through ``WordSearchToken``, an n-gram style inverted index that
+works the same on SQLite and Postgres: hanzi unigrams and bigrams (the useful
+n-grams for Chinese, where most queries are one or two characters), tone-free
+jyutping syllables plus the whole tone-free reading, and meaning keywords.
+One indexed token lookup produces the candidates, and the rank is computed in SQL
+on that small set.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .jyutping import normalize_jyutping
+from .models import Word, WordSearchToken
+
+_CJK = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+_KEYWORD = re.compile(r"[^\W_]+")
+_MAX_CODEPOINT = "\U0010ffff"
+
+HANZI = "h"
+SYLLABLE = "j"
+READING = "p"
+MEANING = "m"
+
+
+def _token(kind, value):
+    return f"{kind}:{value}"
+
+
+def search_tokens(hanzi, jyutping, meaning):
+    tokens = set()
+    hanzi = hanzi.strip()
+    tokens.update(_token(HANZI, char) for char in hanzi)
+    tokens.update(_token(HANZI, hanzi[index : index + 2]) for index in range(len(hanzi) - 1))
+
+    reading = normalize_jyutping(jyutping)
+    if reading:
+        tokens.add(_token(READING, reading))
+        tokens.update(_token(SYLLABLE, syllable) for syllable in reading.split())
+
+    tokens.update(_token(MEANING, keyword) for keyword in _KEYWORD.findall(meaning.lower()))
+    return {token[: WordSearchToken._meta.get_field("token").max_length] for token in tokens}
+
+
+def refresh_search_index(words):
+    """Replace the search tokens of ``words`` (saved instances) in two queries."""
+    words = [word for word in words if word.pk is not None]
+    if not words:
+        return
+    WordSearchToken.objects.filter(word_id__in=[word.pk for word in words]).delete()
+    WordSearchToken.objects.bulk_create(
+        [
+            WordSearchToken(word_id=word.pk, token=token)
+            for word in words
+            for token in search_tokens(word.hanzi, word.jyutping, word.meaning)
+        ],
+        batch_size=1000,
+    )
+
+
+def _startswith(field, prefix):
+    # Postgres uses the varchar_pattern_ops index Django creates for LIKE 'x%'. SQLite's LIKE is
+    # case-insensitive and cannot use a plain index, but a BINARY range over the prefix can.
+    if connection.vendor == "postgresql":
+        return Q(**{f"{field}__startswith": prefix})
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + _MAX_CODEPOINT})
+
+
+def search_words(query, queryset=None):
+    """Return ``queryset`` filtered to words matching ``query``, best matches first.
+
+    Rank order: exact hanzi, exact reading, hanzi prefix, reading prefix, hanzi
+    substring, syllable prefix, meaning keywords.
+    """
+    if queryset is None:
+        queryset = Word.objects.filter(is_active=True)
+
+    query = query.strip()
+    candidates = Q()
+    ranks = []
+
+    hanzi = "".join(_CJK.findall(query))
+    if hanzi == query.replace(" ", "") and hanzi:
+        candidates |= Q(token=_token(HANZI, hanzi[:2]))
+        ranks += [
+            When(hanzi=hanzi, then=0),
+            When(hanzi__startswith=hanzi, then=2),
+            When(hanzi__contains=hanzi, then=4),
+        ]
+
+    reading = normalize_jyutping(query)
+    if len(reading) == 1:
+        # A single letter prefixes too much of the lexicon to be useful; only syllabic m/ng-style exact hits.
+        candidates |= Q(token=_token(READING, reading))
+        ranks.append(When(search_jyutping=reading, then=1))
+    elif reading:
+        candidates |= _startswith("token", _token(READING, reading))
+        ranks += [When(search_jyutping=reading, then=1), When(_startswith("search_jyutping", reading), then=3)]
+        if " " not in reading:
+            candidates |= _startswith("token", _token(SYLLABLE, reading))
+            ranks.append(When(search_jyutping__contains=f" {reading}", then=5))
+
+    keywords = _KEYWORD.findall(query.lower())
+    if keywords and not hanzi:
+        # Every keyword must match, so the longest (most selective) one is enough to find candidates.
+        candidates |= _startswith("token", _token(MEANING, max(keywords, key=len)))
+        all_keywords = Q()
+        for keyword in keywords:
+            all_keywords &= Q(meaning__icontains=keyword)
+        ranks.append(When(all_keywords, then=6))
+
+    if not ranks:
+        # Still annotated, so callers can order and page the empty result like any other.
+        return queryset.annotate(search_rank=Value(None, output_field=IntegerField())).none()
+
+    return (
+        queryset.filter(id__in=WordSearchToken.objects.filter(candidates).values("word_id"))
+        .annotate(search_rank=Case(*ranks, default=None, output_field=IntegerField()))
+        .filter(search_rank__isnull=False)
+        .order_by("search_rank", "hierarchy_stage", "id")
+    )
@@ -55,5 +55,5 @@ class WordDetailSerializer(serializers.ModelSerializer):
                     "meaning": c.component_word.meaning,
                 },
             }
-            for c in obj.components.all().order_by("position")
+            for c in obj.components.all()
         ]
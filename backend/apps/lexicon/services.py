@@ -1,4 +1,13 @@
-from apps.lexicon.models import Word
+from collections import defaultdict
+
+from django.db import connection
+
+from apps.lexicon.jyutping import parse_jyutping
+from apps.lexicon.minimal_pairs import sync_minimal_pair_keys
+from apps.lexicon.models import Word, WordComponent, WordSyllable
+
+MAX_TREE_DEPTH = 8
+PHONEME_FIELDS = ("initial", "nucleus", "coda", "final", "tone", "position")
 
 
 def get_word_components(word_id: int):
@@ -11,5 +20,130 @@ def get_word_components(word_id: int):
             "jyutping": component.component_word.jyutping,
             "meaning": component.component_word.meaning,
         }
-        for component in word.components.all().order_by("position")
+        for component in word.components.all()
     ]
+
+
+def words_using(word_id: int):
+    """Every word that contains ``word_id`` anywhere in its decomposition."""
+    return Word.objects.filter(descendant_links__descendant_id=word_id)
+
+
+def word_parts(word_id: int):
+    """Every word that appears anywhere in the decomposition of ``word_id``."""
+    return Word.objects.filter(ancestor_links__ancestor_id=word_id)
+
+
+def _tree_sql(root_count):
+    quote = connection.ops.quote_name
+    word_table = quote(Word._meta.db_table)
+    component_table = quote(WordComponent._meta.db_table)
+    placeholders = ", ".join(["%s"] * root_count)
+    # Casts keep the column types identical across both terms, which Postgres requires.
+    return f"""
+        WITH RECURSIVE tree (root_id, parent_id, word_id, position, depth) AS (
+            SELECT w.id, CAST(NULL AS BIGINT), w.id, 0, 0
+            FROM {word_table} w
+            WHERE w.is_active AND w.id IN ({placeholders})
+            UNION
+            SELECT tree.root_id, wc.parent_word_id, wc.component_word_id, CAST(wc.position AS INTEGER), tree.depth + 1
+            FROM tree
+            JOIN {component_table} wc ON wc.parent_word_id = tree.word_id
+            WHERE tree.depth < %s
+        )
+        SELECT tree.root_id, tree.parent_id, tree.word_id, tree.position, w.hanzi, w.jyutping, w.meaning, w.sound_group
+        FROM tree
+        JOIN {word_table} w ON w.id = tree.word_id
+    """
+
+
+def get_word_trees(word_ids, max_depth=MAX_TREE_DEPTH):
+    """Return ``{word_id: tree}`` with the full decomposition of each active word, using one query."""
+    word_ids = list(dict.fromkeys(word_ids))
+    if not word_ids:
+        return {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(_tree_sql(len(word_ids)), [*word_ids, max_depth])
+        rows = cursor.fetchall()
+
+    words = {}
+    children = defaultdict(dict)
+    roots = set()
+    for root_id, parent_id, word_id, position, hanzi, jyutping, meaning, sound_group in rows:
+        words[word_id] = {
+            "id": word_id,
+            "hanzi": hanzi,
+            "jyutping": jyutping,
+            "meaning": meaning,
+            "sound_group": sound_group,
+        }
+        if parent_id is None:
+            roots.add(root_id)
+        else:
+            children[parent_id][position] = word_id
+
+    def build(word_id, depth):
+        node = dict(words[word_id])
+        node["components"] = []
+        if depth < max_depth:
+            node["components"] = [
+                {"position": position, "word": build(component_id, depth + 1)}
+                for position, component_id in sorted(children[word_id].items())
+            ]
+        return node
+
+    return {word_id: build(word_id, 0) for word_id in word_ids if word_id in roots}
+
+
+def sync_word_phonemes(words):
+    """Replace the parsed syllables and minimal-pair keys of ``words`` (saved instances)."""
+    words = [word for word in words if word.pk is not None]
+    if not words:
+        return
+    sync_minimal_pair_keys(words)
+    WordSyllable.objects.filter(word_id__in=[word.pk for word in words]).delete()
+    WordSyllable.objects.bulk_create(
+        [
+            WordSyllable(
+                word_id=word.pk,
+                position=position,
+                initial=syllable.initial,
+                nucleus=syllable.nucleus,
+                coda=syllable.coda,
+                final=syllable.final,
+                tone=syllable.tone,
+            )
+            for word in words
+            for position, syllable in parse_jyutping(word.jyutping)
+        ],
+        batch_size=1000,
+    )
+
+
+def phoneme_filters_from(params):
+    """Pick phoneme criteria out of request parameters; raises ``ValueError`` for a bad tone/position."""
+    values = {field: str(params.get(field, "")).strip().lower() for field in PHONEME_FIELDS}
+    criteria = {field: value for field, value in values.items() if value}
+    for field in ("tone", "position"):
+        if field in criteria:
+            criteria[field] = int(criteria[field])
+    return criteria
+
+
+def words_with_phonemes(**criteria):
+    """Subquery of the ids of words with at least one syllable matching every criterion.
+
+    Criteria are the ``WordSyllable`` columns, e.g. ``initial="gw", tone=2``; ``position``
+    counts syllables from 1.
+    """
+    # An IN subquery lets the database drive the lookup from the phoneme index instead of
+    # probing every candidate word as a correlated EXISTS would.
+    return WordSyllable.objects.filter(**criteria).values("word_id")
+
+
+def filter_words_by_phonemes(queryset, **criteria):
+    """Keep words with at least one syllable matching every criterion; see ``words_with_phonemes``."""
+    if not criteria:
+        return queryset
+    return queryset.filter(id__in=words_with_phonemes(**criteria))
@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Word, WordClosure, WordComponent
+from .search import refresh_search_index
+from .services import sync_word_phonemes
+from .snapshot import bump_lexicon_version
+
+
+@receiver([post_save, post_delete], sender=Word)
+@receiver([post_save, post_delete], sender=WordComponent)
+def invalidate_lexicon_snapshot(sender, **kwargs):
+    transaction.on_commit(bump_lexicon_version)
+
+
+_closure_updates = threading.local()
+
+
+@contextmanager
+def closure_updates_paused():
+    """Leave the closure alone while components are deleted; the caller must rebuild it afterwards."""
+    _closure_updates.paused = True
+    try:
+        yield
+    finally:
+        _closure_updates.paused = False
+
+
+@receiver(post_delete, sender=WordComponent)
+def remove_component_closure(sender, instance, **kwargs):
+    if not getattr(_closure_updates, "paused", False):
+        WordClosure.objects.remove_edge(instance.parent_word_id, instance.component_word_id)
+
+
+def _changed(update_fields, fields):
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Word)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _changed(update_fields, {"hanzi", "jyutping", "meaning"}):
+        refresh_search_index([instance])
+
+
+@receiver(post_save, sender=Word)
+def update_word_syllables(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _changed(update_fields, {"jyutping"}):
+        sync_word_phonemes([instance])
@@ -0,0 +1,101 @@
+"""Versioned, pre-rendered snapshot of the active lexicon.
+
+The version token lives in the shared cache and is replaced by signals whenever a
+``Word`` or ``WordComponent`` changes. Each process keeps the rendered bytes for the
+version it last built, so repeat fetches never reach the lexicon tables.
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.http import etag_for
+
+from .models import Word, WordComponent
+from .serializers import WordListSerializer
+
+VERSION_CACHE_KEY = "lexicon:version"
+
+_build_lock = threading.Lock()
+_snapshot = None
+
+
+def bump_lexicon_version():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def current_lexicon_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        candidate = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, candidate, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY, candidate)
+    return version
+
+
+class LexiconSnapshot:
+    def __init__(self, version, rows, components):
+        self.version = version
+        self.list_body = JSONRenderer().render(rows)
+        self.list_etag = etag_for(self.list_body)
+        self._rows = {row["id"]: row for row in rows}
+        self._components = components
+        self._details = {}
+
+    def detail(self, word_id):
+        """Return ``(body, etag)`` for an active word, or ``None`` if it is not in the snapshot."""
+        rendered = self._details.get(word_id)
+        if rendered is None:
+            row = self._rows.get(word_id)
+            if row is None:
+                return None
+            body = JSONRenderer().render({**row, "components": self._components.get(word_id, [])})
+            rendered = (body, etag_for(body))
+            self._details[word_id] = rendered
+        return rendered
+
+
+def _build_snapshot(version):
+    fields = WordListSerializer.Meta.fields
+    rows = list(Word.objects.filter(is_active=True).order_by("hierarchy_stage", "id").values(*fields))
+
+    components = defaultdict(list)
+    edges = (
+        WordComponent.objects.filter(parent_word__is_active=True)
+        .order_by("parent_word_id", "position")
+        .values_list(
+            "parent_word_id",
+            "position",
+            "component_word_id",
+            "component_word__hanzi",
+            "component_word__jyutping",
+            "component_word__meaning",
+        )
+    )
+    for parent_id, position, word_id, hanzi, jyutping, meaning in edges:
+        components[parent_id].append(
+            {
+                "position": position,
+                "word": {"id": word_id, "hanzi": hanzi, "jyutping": jyutping, "meaning": meaning},
+            }
+        )
+
+    return LexiconSnapshot(version, rows, dict(components))
+
+
+def get_lexicon_snapshot():
+    global _snapshot
+
+    # Read the version before querying so a concurrent change can only make us rebuild again.
+    version = current_lexicon_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _build_lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = _build_snapshot(version)
+                _snapshot = snapshot
+    return snapshot
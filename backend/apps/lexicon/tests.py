@@ -1,3 +1,441 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from . import transfer
+from .jyutping import JyutpingError, Syllable, parse_jyutping, parse_syllable
+from .minimal_pairs import minimal_pairs_for_contrast, minimal_pairs_for_word
+from .models import Word, WordClosure, WordComponent
+from .transfer import LexiconImportError, import_rows
+
+
+def closure_rows():
+    return set(WordClosure.objects.values_list("ancestor_id", "descendant_id", "path_count"))
+
+
+class WordClosureTests(TestCase):
+    def setUp(self):
+        # top -> left -> bottom and top -> right -> bottom: two paths from top to bottom.
+        self.top, self.left, self.right, self.bottom, self.leaf = (
+            Word.objects.create(hanzi=hanzi) for hanzi in ("上", "左", "右", "下", "葉")
+        )
+
+    def link(self, parent, component, position):
+        return WordComponent.objects.create(parent_word=parent, component_word=component, position=position)
+
+    def assert_matches_rebuild(self):
+        incremental = closure_rows()
+        WordClosure.objects.rebuild()
+        self.assertEqual(incremental, closure_rows())
+
+    def build_diamond(self):
+        edges = {
+            "top_left": self.link(self.top, self.left, 1),
+            "top_right": self.link(self.top, self.right, 2),
+            "left_bottom": self.link(self.left, self.bottom, 1),
+            "right_bottom": self.link(self.right, self.bottom, 1),
+        }
+        self.link(self.bottom, self.leaf, 1)
+        return edges
+
+    def test_diamond_counts_both_paths(self):
+        self.build_diamond()
+        self.assertEqual(WordClosure.objects.get(ancestor=self.top, descendant=self.bottom).path_count, 2)
+        self.assertEqual(WordClosure.objects.get(ancestor=self.top, descendant=self.leaf).path_count, 2)
+        self.assert_matches_rebuild()
+
+    def test_removing_one_diamond_edge_keeps_the_other_path(self):
+        edges = self.build_diamond()
+        edges["left_bottom"].delete()
+        self.assertEqual(WordClosure.objects.get(ancestor=self.top, descendant=self.leaf).path_count, 1)
+        self.assertFalse(WordClosure.objects.filter(ancestor=self.left, descendant=self.bottom).exists())
+        self.assert_matches_rebuild()
+
+        edges["right_bottom"].delete()
+        self.assertFalse(WordClosure.objects.filter(ancestor=self.top, descendant=self.bottom).exists())
+        self.assert_matches_rebuild()
+
+    def test_removing_the_shared_edge_below_the_diamond(self):
+        self.build_diamond()
+        WordComponent.objects.get(parent_word=self.bottom, component_word=self.leaf).delete()
+        self.assertFalse(WordClosure.objects.filter(descendant=self.leaf).exists())
+        self.assert_matches_rebuild()
+
+    def test_moving_an_edge_updates_the_closure(self):
+        edges = self.build_diamond()
+        edge = edges["top_right"]
+        edge.component_word = self.leaf
+        edge.save()
+        self.assertEqual(WordClosure.objects.get(ancestor=self.top, descendant=self.bottom).path_count, 1)
+        self.assertEqual(WordClosure.objects.get(ancestor=self.top, descendant=self.leaf).path_count, 2)
+        self.assert_matches_rebuild()
+
+    def test_updating_an_edge_into_a_cycle_is_rejected(self):
+        edges = self.build_diamond()
+        before = closure_rows()
+        edge = edges["left_bottom"]
+        edge.component_word = self.top
+        with self.assertRaises(ValidationError):
+            edge.save()
+        self.assertEqual(closure_rows(), before)
+
+    def test_self_reference_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.link(self.top, self.top, 1)
+
+
+class WordSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("parent", password="secret"))
+        self.hoeng, self.gong, self.hoeng_gong = (
+            Word.objects.create(hanzi=hanzi, jyutping=jyutping, hierarchy_stage=stage)
+            for hanzi, jyutping, stage in (("香", "hoeng1", 1), ("港", "gong2", 1), ("香港", "hoeng1 gong2", 2))
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            WordComponent.objects.create(parent_word=self.hoeng_gong, component_word=self.hoeng, position=1)
+
+    def test_list_answers_a_matching_etag_with_304_without_queries(self):
+        response = self.client.get("/api/words/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["hanzi"] for row in response.json()], ["香", "港", "香港"])
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/words/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get("/api/words/", HTTP_IF_NONE_MATCH=f"W/{etag}").status_code, 304)
+        self.assertEqual(self.client.get("/api/words/", HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_detail_includes_components_and_etag(self):
+        response = self.client.get(f"/api/words/{self.hoeng_gong.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([component["word"]["hanzi"] for component in response.json()["components"]], ["香"])
+        with self.assertNumQueries(0):
+            repeat = self.client.get(f"/api/words/{self.hoeng_gong.id}/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(self.client.get("/api/words/999999/").status_code, 404)
+
+    def test_word_change_replaces_the_snapshot(self):
+        etag = self.client.get("/api/words/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gong.meaning = "harbour"
+            self.gong.save()
+
+        response = self.client.get("/api/words/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[1]["meaning"], "harbour")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gong.is_active = False
+            self.gong.save()
+        self.assertEqual([row["hanzi"] for row in self.client.get("/api/words/").json()], ["香", "香港"])
+
+    def test_component_change_replaces_the_detail(self):
+        url = f"/api/words/{self.hoeng_gong.id}/"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            WordComponent.objects.create(parent_word=self.hoeng_gong, component_word=self.gong, position=2)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([component["word"]["hanzi"] for component in response.json()["components"]], ["香", "港"])
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            WordComponent.objects.filter(component_word=self.hoeng).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class WordTreeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("parent", password="secret"))
+        # top -> left -> bottom and top -> right -> bottom.
+        self.top, self.left, self.right, self.bottom = (
+            Word.objects.create(hanzi=hanzi) for hanzi in ("上", "左", "右", "下")
+        )
+        for parent, component, position in (
+            (self.top, self.left, 1),
+            (self.top, self.right, 2),
+            (self.left, self.bottom, 1),
+            (self.right, self.bottom, 1),
+        ):
+            WordComponent.objects.create(parent_word=parent, component_word=component, position=position)
+
+    def shape(self, node):
+        return (node["hanzi"], [(part["position"], self.shape(part["word"])) for part in node["components"]])
+
+    def test_diamond_expands_under_both_parents_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/words/{self.top.id}/tree/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.shape(response.json()),
+            ("上", [(1, ("左", [(1, ("下", []))])), (2, ("右", [(1, ("下", []))]))]),
+        )
+
+    def test_batch_skips_unknown_and_inactive_ids(self):
+        self.right.is_active = False
+        self.right.save()
+        response = self.client.get(f"/api/words/tree/?ids={self.bottom.id},999999,{self.right.id},{self.left.id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [self.shape(tree) for tree in response.json()["results"]],
+            [("下", []), ("左", [(1, ("下", []))])],
+        )
+
+    def test_unknown_word_and_bad_ids(self):
+        self.assertEqual(self.client.get("/api/words/999999/tree/").status_code, 404)
+        self.assertEqual(self.client.get("/api/words/tree/?ids=a").status_code, 400)
+        self.assertEqual(self.client.get("/api/words/tree/").status_code, 400)
+
+
+class LexiconImportComponentTests(TestCase):
+    def setUp(self):
+        self.ids = [Word.objects.create(hanzi=hanzi).id for hanzi in "上左右下葉"]
+
+    def import_components(self, edges):
+        rows = [
+            {"id": str(parent_id), "components": [str(word_id) for word_id in components]}
+            for parent_id, components in edges.items()
+        ]
+        return import_rows(enumerate(rows, start=2))
+
+    def components(self, parent_id):
+        return list(WordComponent.objects.filter(parent_word_id=parent_id).values_list("component_word_id", flat=True))
+
+    def assert_matches_rebuild(self):
+        incremental = closure_rows()
+        WordClosure.objects.rebuild()
+        self.assertEqual(incremental, closure_rows())
+
+    def test_small_import_updates_the_closure_edge_by_edge(self):
+        top, left, right, bottom, leaf = self.ids
+        self.import_components({top: [left, right], left: [bottom], right: [bottom]})
+        self.assert_matches_rebuild()
+
+        with mock.patch.object(WordClosure.objects, "rebuild", side_effect=AssertionError("rebuilt")):
+            self.import_components({right: [leaf], bottom: [leaf]})
+        self.assertEqual(self.components(right), [leaf])
+        self.assertEqual(WordClosure.objects.get(ancestor_id=top, descendant_id=leaf).path_count, 2)
+        self.assert_matches_rebuild()
+
+    def test_large_import_rebuilds_once_without_edge_updates(self):
+        top, left, right, bottom, leaf = self.ids
+        self.import_components({top: [left, right], left: [bottom], right: [bottom]})
+        with (
+            mock.patch.object(transfer, "INCREMENTAL_CLOSURE_LIMIT", 1),
+            mock.patch.object(WordClosure.objects, "add_edge", side_effect=AssertionError("added")),
+            mock.patch.object(WordClosure.objects, "remove_edge", side_effect=AssertionError("removed")),
+        ):
+            self.import_components({left: [leaf], right: [leaf, bottom]})
+        self.assertEqual(self.components(left), [leaf])
+        self.assertEqual(WordClosure.objects.get(ancestor_id=top, descendant_id=leaf).path_count, 2)
+        self.assert_matches_rebuild()
+
+    def test_import_with_a_cycle_changes_nothing(self):
+        top, left, right, bottom, leaf = self.ids
+        self.import_components({top: [left], left: [bottom]})
+        before = closure_rows()
+        for limit in (transfer.INCREMENTAL_CLOSURE_LIMIT, 0):
+            with mock.patch.object(transfer, "INCREMENTAL_CLOSURE_LIMIT", limit):
+                # The cycle only exists once both rows are applied.
+                with self.assertRaisesMessage(LexiconImportError, "cycle"):
+                    self.import_components({bottom: [leaf], leaf: [top]})
+                with self.assertRaisesMessage(LexiconImportError, "itself"):
+                    self.import_components({leaf: [leaf]})
+        self.assertEqual(self.components(bottom), [])
+        self.assertEqual(closure_rows(), before)
+
+
+class WordSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("parent", password="secret"))
+        for hanzi, jyutping, meaning in (
+            ("香港", "hoeng1 gong2", "Hong Kong"),
+            ("港", "gong2", "harbour"),
+            ("江", "gong1", "river"),
+            ("蘋果", "ping4 gwo2", "apple, red fruit"),
+            ("香", "hoeng1", "fragrant"),
+        ):
+            Word.objects.create(hanzi=hanzi, jyutping=jyutping, meaning=meaning)
+
+    def search(self, **params):
+        response = self.client.get("/api/words/", params)
+        self.assertEqual(response.status_code, 200)
+        return [word["hanzi"] for word in response.json()["results"]]
+
+    def test_hanzi(self):
+        self.assertEqual(self.search(q="港"), ["港", "香港"])
+        self.assertEqual(self.search(q="香港"), ["香港"])
+
+    def test_jyutping_with_and_without_tones(self):
+        self.assertEqual(self.search(q="hoeng1 gong2"), ["香港"])
+        self.assertEqual(self.search(q="Hoeng Gong"), ["香港"])
+        self.assertEqual(self.search(q="gong"), ["港", "江", "香港"])
+        self.assertEqual(self.search(q="hoe"), ["香港", "香"])
+
+    def test_meaning(self):
+        self.assertEqual(self.search(q="Harbour"), ["港"])
+        self.assertEqual(self.search(q="red fruit"), ["蘋果"])
+        self.assertEqual(self.search(q="fruit river"), [])
+
+    def test_reindexes_changed_words(self):
+        word = Word.objects.get(hanzi="香")
+        word.jyutping = "heung1"
+        word.save()
+        self.assertEqual(self.search(q="heung"), ["香"])
+        self.assertEqual(self.search(q="hoeng"), ["香港"])
+
+    def test_combines_with_phoneme_filters(self):
+        self.assertEqual(self.search(q="gong", tone=1), ["江", "香港"])
+        self.assertEqual(self.search(q="gong", initial="h"), ["香港"])
+
+    def test_pages_with_a_cursor(self):
+        pages, cursor = [], None
+        while True:
+            params = {"q": "gong", "page_size": 1, **({"cursor": cursor} if cursor else {})}
+            body = self.client.get("/api/words/", params).json()
+            pages.append([word["hanzi"] for word in body["results"]])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(pages, [["港"], ["江"], ["香港"]])
+
+    def test_unsearchable_query(self):
+        self.assertEqual(self.search(q="!!!"), [])
+
+
+class JyutpingParserTests(SimpleTestCase):
+    def test_splits_initial_final_and_tone(self):
+        self.assertEqual(parse_syllable("gwong2"), Syllable("gw", "o", "ng", 2))
+        self.assertEqual(parse_syllable("Hoeng1"), Syllable("h", "oe", "ng", 1))
+        self.assertEqual(parse_syllable("jyut6"), Syllable("j", "yu", "t", 6))
+        self.assertEqual(parse_syllable("aa3"), Syllable("", "aa", "", 3))
+        self.assertEqual(parse_syllable("ngo5"), Syllable("ng", "o", "", 5))
+        self.assertEqual(parse_syllable("gwong2").final, "ong")
+
+    def test_syllabic_nasals(self):
+        self.assertEqual(parse_syllable("m4"), Syllable("", "m", "", 4))
+        self.assertEqual(parse_syllable("ng5"), Syllable("", "ng", "", 5))
+
+    def test_missing_tone(self):
+        self.assertEqual(parse_syllable("gaa"), Syllable("g", "aa", "", None))
+        self.assertEqual(parse_syllable("m"), Syllable("", "m", "", None))
+
+    def test_invalid_syllables(self):
+        for text in ("xyz1", "gaa7", "gaa1b", "1", ""):
+            with self.subTest(text=text), self.assertRaises(JyutpingError):
+                parse_syllable(text)
+
+    def test_reading_skips_invalid_syllables_but_keeps_positions(self):
+        self.assertEqual(
+            parse_jyutping("m4 goi1 xx sik6"),
+            [(1, Syllable("", "m", "", 4)), (2, Syllable("g", "o", "i", 1)), (4, Syllable("s", "i", "k", 6))],
+        )
+
+
+class PhonemeFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("parent", password="secret"))
+        for hanzi, jyutping in (("光", "gwong1"), ("廣東", "gwong2 dung1"), ("江", "gong1"), ("唔該", "m4 goi1")):
+            Word.objects.create(hanzi=hanzi, jyutping=jyutping)
+
+    def filtered(self, **params):
+        response = self.client.get("/api/words/", params)
+        self.assertEqual(response.status_code, 200)
+        return [word["hanzi"] for word in response.json()["results"]]
+
+    def test_filters_on_syllable_columns(self):
+        self.assertEqual(self.filtered(initial="gw"), ["光", "廣東"])
+        self.assertEqual(self.filtered(final="ong", tone=1), ["光", "江"])
+        self.assertEqual(self.filtered(nucleus="m"), ["唔該"])
+        self.assertEqual(self.filtered(initial="d", position=2), ["廣東"])
+        self.assertEqual(self.client.get("/api/words/", {"tone": "high"}).status_code, 400)
+
+    def test_syllables_follow_jyutping_changes(self):
+        word = Word.objects.get(hanzi="江")
+        word.jyutping = "gwong1"
+        word.save()
+        self.assertEqual(self.filtered(initial="gw", tone=1), ["光", "江"])
+
+
+class MinimalPairTests(TestCase):
+    def setUp(self):
+        self.words = {
+            jyutping: Word.objects.create(hanzi=hanzi, jyutping=jyutping)
+            for hanzi, jyutping in (
+                ("爸", "baa1"),
+                ("趴", "paa1"),
+                ("嫁", "gaa3"),
+                ("家", "gaa1"),
+                ("加", "gaa"),
+                ("街", "gaai1"),
+                ("香港", "hoeng1 gong2"),
+                ("香江", "hoeng1 gong1"),
+            )
+        }
+
+    def pairs(self, jyutping):
+        return {
+            (word.jyutping, position, slot, from_value, to_value)
+            for word, position, slot, from_value, to_value in minimal_pairs_for_word(self.words[jyutping].id)
+        }
+
+    def test_pairs_differ_in_exactly_one_slot(self):
+        self.assertEqual(
+            self.pairs("gaa1"),
+            {
+                ("gaa3", 1, "tone", "1", "3"),
+                ("gaai1", 1, "coda", "", "i"),
+                ("baa1", 1, "initial", "g", "b"),
+                ("paa1", 1, "initial", "g", "p"),
+            },
+        )
+        self.assertEqual(self.pairs("baa1"), {("paa1", 1, "initial", "b", "p"), ("gaa1", 1, "initial", "b", "g")})
+        self.assertEqual(self.pairs("hoeng1 gong2"), {("hoeng1 gong1", 2, "tone", "2", "1")})
+
+    def test_missing_tone_is_not_a_tone_pair(self):
+        self.assertEqual(self.pairs("gaa"), set())
+        self.assertNotIn("gaa", {pair[0] for pair in self.pairs("gaa3")})
+
+    def test_inactive_and_changed_words(self):
+        self.words["gaai1"].is_active = False
+        self.words["gaai1"].save()
+        self.assertNotIn("gaai1", {pair[0] for pair in self.pairs("gaa1")})
+
+        self.words["paa1"].jyutping = "maa1"
+        self.words["paa1"].save()
+        self.assertEqual(self.pairs("baa1"), {("maa1", 1, "initial", "b", "m"), ("gaa1", 1, "initial", "b", "g")})
+
+    def test_contrast_across_the_lexicon(self):
+        Word.objects.create(hanzi="瓜", jyutping="gwaa1")
+        Word.objects.create(hanzi="寡", jyutping="gwaa2")
+        pairs = minimal_pairs_for_contrast("tone", "1", "3")
+        self.assertEqual([(a.jyutping, b.jyutping) for a, b in pairs], [("gaa1", "gaa3")])
+        pairs = minimal_pairs_for_contrast("tone", "1", "2", limit=5)
+        self.assertEqual(
+            sorted((a.jyutping, b.jyutping) for a, b in pairs),
+            [("gwaa1", "gwaa2"), ("hoeng1 gong1", "hoeng1 gong2")],
+        )
+        self.assertEqual(len(minimal_pairs_for_contrast("tone", "1", "2", limit=1)), 1)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("parent", password="secret"))
+        response = client.get(f"/api/words/{self.words['gaai1'].id}/minimal-pairs/")
+        self.assertEqual(
+            [pair | {"word": pair["word"]["hanzi"]} for pair in response.json()["results"]],
+            [{"word": "家", "position": 1, "slot": "coda", "from": "i", "to": ""}],
+        )
+        self.assertEqual(client.get("/api/words/999999/minimal-pairs/").status_code, 404)
@@ -0,0 +1,289 @@
+"""Streaming CSV/JSONL transfer of the lexicon used by ``lexicon_import`` and ``lexicon_export``.
+
+Each row is one ``Word``. ``components`` lists the ids of its component words in
+order (space-separated in CSV, a JSON array in JSONL) and replaces the word's
+existing components; omit the column/key to leave components untouched.
+"""
+
+import csv
+import json
+from collections import defaultdict
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .jyutping import normalize_jyutping
+from .models import Word, WordClosure, WordComponent
+from .search import refresh_search_index
+from .services import sync_word_phonemes
+from .signals import closure_updates_paused
+from .snapshot import bump_lexicon_version
+
+WORD_FIELDS = (
+    "hanzi",
+    "jyutping",
+    "meaning",
+    "image_url",
+    "audio_url",
+    "sound_group",
+    "hierarchy_stage",
+    "is_active",
+)
+COLUMNS = ("id", *WORD_FIELDS, "components")
+FORMATS = ("csv", "jsonl")
+TRUE_VALUES = {"1", "true", "yes", "on"}
+SEARCH_FIELDS = {"hanzi", "jyutping", "meaning"}
+BULK_UPDATE_BATCH = 100
+# Above this many changed component edges, one closure rebuild is cheaper than updating it edge by edge.
+INCREMENTAL_CLOSURE_LIMIT = 500
+
+
+class LexiconImportError(Exception):
+    pass
+
+
+def detect_format(path, default="csv"):
+    if path and path.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if path and path.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` dicts without loading the whole file."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if "components" in row:
+                row["components"] = (row["components"] or "").split()
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_number, json.loads(line)
+
+
+def write_rows(stream, fmt, rows):
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "components": " ".join(str(word_id) for word_id in row["components"])})
+        return
+
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write("\n")
+
+
+def iter_export_rows(chunk_size=2000):
+    queryset = Word.objects.order_by("id").prefetch_related("components")
+    for word in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            "id": word.id,
+            **{field: getattr(word, field) for field in WORD_FIELDS},
+            "components": [component.component_word_id for component in word.components.all()],
+        }
+
+
+def _parse_row(line_number, row):
+    values = {}
+    for field in WORD_FIELDS:
+        if field not in row or row[field] is None:
+            continue
+        value = row[field]
+        if field == "is_active" and isinstance(value, str):
+            value = value.strip().lower() in TRUE_VALUES
+        elif field == "hierarchy_stage":
+            value = int(value)
+        values[field] = value
+
+    word_id = row.get("id")
+    word_id = int(word_id) if word_id not in (None, "") else None
+
+    components = None
+    if "components" in row and row["components"] is not None:
+        components = [int(component_id) for component_id in row["components"]]
+        if word_id is None and components:
+            raise LexiconImportError(f"Line {line_number}: rows with components need an id.")
+    return word_id, values, components
+
+
+def _find_cycle(children):
+    """Return a word id on a cycle in ``{parent: [components]}``, or ``None``."""
+    state = {}
+    for root_id in children:
+        if root_id in state:
+            continue
+        stack = [(root_id, iter(children.get(root_id, ())))]
+        state[root_id] = "visiting"
+        while stack:
+            word_id, remaining = stack[-1]
+            next_id = next(remaining, None)
+            if next_id is None:
+                state[word_id] = "done"
+                stack.pop()
+            elif state.get(next_id) == "visiting":
+                return next_id
+            elif next_id not in state:
+                state[next_id] = "visiting"
+                stack.append((next_id, iter(children.get(next_id, ()))))
+    return None
+
+
+def _chunks(values, size):
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _upsert_batch(batch, stats):
+    word_ids = [word_id for _, word_id, _, _ in batch if word_id is not None]
+    existing = Word.objects.in_bulk(word_ids)
+    to_update, to_create, to_reindex, to_reparse, updated_fields = [], [], [], [], set()
+
+    for line_number, word_id, values, _ in batch:
+        word = existing.get(word_id) if word_id is not None else None
+        if word is None:
+            word = Word(id=word_id, **values)
+            word.search_jyutping = normalize_jyutping(word.jyutping)
+            to_create.append((line_number, word))
+            if word_id is not None:
+                stats["explicit_ids"] = True
+        else:
+            changed = [field for field, value in values.items() if getattr(word, field) != value]
+            for field in changed:
+                setattr(word, field, values[field])
+            if "jyutping" in changed:
+                word.search_jyutping = normalize_jyutping(word.jyutping)
+                changed.append("search_jyutping")
+            if changed:
+                updated_fields.update(changed)
+                to_update.append((line_number, word))
+                if SEARCH_FIELDS.intersection(changed):
+                    to_reindex.append(word)
+                if "jyutping" in changed:
+                    to_reparse.append(word)
+            stats["unchanged"] += not changed
+
+    for line_number, word in to_create + to_update:
+        try:
+            word.full_clean(validate_unique=False, validate_constraints=False)
+        except ValidationError as exc:
+            raise LexiconImportError(f"Line {line_number}: {exc.messages}") from exc
+
+    if to_create:
+        Word.objects.bulk_create([word for _, word in to_create])
+    if to_update:
+        # bulk_update builds one CASE expression per field, which grows quadratically with batch size.
+        Word.objects.bulk_update([word for _, word in to_update], sorted(updated_fields), batch_size=BULK_UPDATE_BATCH)
+    created = [word for _, word in to_create]
+    refresh_search_index(created + to_reindex)
+    sync_word_phonemes(created + to_reparse)
+    stats["created"] += len(to_create)
+    stats["updated"] += len(to_update)
+
+
+def _check_whole_graph(edges):
+    """One in-memory cycle check over the whole component graph as it will look after the import."""
+    children = defaultdict(list)
+    stored = WordComponent.objects.values_list("parent_word_id", "component_word_id")
+    for parent_id, component_id in stored.iterator(chunk_size=10_000):
+        if parent_id not in edges:
+            children[parent_id].append(component_id)
+    for parent_id, component_ids in edges.items():
+        children[parent_id].extend(component_ids)
+    cycle_word = _find_cycle(children)
+    if cycle_word is not None:
+        raise LexiconImportError(f"Components would create a cycle through word {cycle_word}.")
+
+
+def _replace_components(edges, batch_size):
+    referenced = {component_id for component_ids in edges.values() for component_id in component_ids}
+    known = set()
+    for chunk in _chunks(referenced, batch_size):
+        known.update(Word.objects.filter(id__in=chunk).values_list("id", flat=True))
+    missing = referenced - known
+    if missing:
+        raise LexiconImportError(f"Unknown component word ids: {sorted(missing)[:20]}")
+    for parent_id, component_ids in edges.items():
+        if parent_id in component_ids:
+            raise LexiconImportError(f"Word {parent_id} cannot be a component of itself.")
+
+    # Only edges that differ from what is stored are touched.
+    stored = defaultdict(dict)
+    for chunk in _chunks(edges, batch_size):
+        rows = WordComponent.objects.filter(parent_word_id__in=chunk).values_list(
+            "pk", "parent_word_id", "position", "component_word_id"
+        )
+        for pk, parent_id, position, component_id in rows:
+            stored[parent_id][position] = (pk, component_id)
+    stale, added = [], []
+    for parent_id, component_ids in edges.items():
+        current = stored[parent_id]
+        wanted = dict(enumerate(component_ids, start=1))
+        stale.extend(pk for position, (pk, component_id) in current.items() if wanted.get(position) != component_id)
+        added.extend(
+            WordComponent(parent_word_id=parent_id, component_word_id=component_id, position=position)
+            for position, component_id in wanted.items()
+            if current.get(position, (None, None))[1] != component_id
+        )
+
+    _check_whole_graph(edges)
+    rebuild = len(stale) + len(added) > INCREMENTAL_CLOSURE_LIMIT
+    # Below the limit the post_delete signal removes each stale edge's paths from the closure.
+    with closure_updates_paused() if rebuild else nullcontext():
+        for chunk in _chunks(stale, batch_size):
+            WordComponent.objects.filter(pk__in=chunk).delete()
+    WordComponent.objects.bulk_create(added, batch_size=batch_size)
+    if rebuild:
+        WordClosure.objects.rebuild()
+    else:
+        # The cycle check covered the final graph, so the edges can go straight in.
+        for edge in added:
+            WordClosure.objects.add_edge(edge.parent_word_id, edge.component_word_id)
+    return sum(len(component_ids) for component_ids in edges.values())
+
+
+def import_rows(rows, batch_size=1000, on_batch=None):
+    """Upsert words from ``(line_number, row)`` pairs in batches and load their components.
+
+    Runs in a single transaction, so any invalid row or component cycle leaves the
+    lexicon untouched. Returns counts of created/updated words and loaded components.
+    """
+    stats = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "components": 0, "explicit_ids": False}
+    edges = {}
+
+    with transaction.atomic():
+        for chunk in _chunks(rows, batch_size):
+            batch = []
+            for line_number, row in chunk:
+                try:
+                    word_id, values, components = _parse_row(line_number, row)
+                except (TypeError, ValueError) as exc:
+                    raise LexiconImportError(f"Line {line_number}: {exc}") from exc
+                batch.append((line_number, word_id, values, components))
+                if components is not None:
+                    edges[word_id] = components
+            _upsert_batch(batch, stats)
+            stats["rows"] += len(batch)
+            if on_batch:
+                on_batch(stats)
+
+        if stats["explicit_ids"]:
+            with connection.cursor() as cursor:
+                for statement in connection.ops.sequence_reset_sql(no_style(), [Word]):
+                    cursor.execute(statement)
+
+        if edges:
+            stats["components"] = _replace_components(edges, batch_size)
+
+        # Bulk writes bypass the model signals, so invalidate the snapshot once here.
+        transaction.on_commit(bump_lexicon_version)
+
+    return stats
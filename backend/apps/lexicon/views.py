@@ -1,7 +1,21 @@
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.common.http import rendered_json_response
+from apps.common.pagination import page_size_from, paginate_keyset, paginate_request, paging_requested
+
+from .minimal_pairs import minimal_pairs_for_word
 from .models import Word
 from .serializers import WordDetailSerializer, WordListSerializer
+from .search import search_words
+from .services import filter_words_by_phonemes, get_word_trees, phoneme_filters_from
+from .snapshot import get_lexicon_snapshot
+
+MAX_TREE_BATCH = 100
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
 
 
 class WordListView(generics.ListAPIView):
@@ -11,6 +25,31 @@ class WordListView(generics.ListAPIView):
     def get_queryset(self):
         return Word.objects.filter(is_active=True).order_by("hierarchy_stage", "id")
 
+    def list(self, request, *args, **kwargs):
+        try:
+            phonemes = phoneme_filters_from(request.query_params)
+        except ValueError:
+            return Response({"detail": "tone and position must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filter_words_by_phonemes(self.get_queryset(), **phonemes)
+
+        query = request.query_params.get("q", "").strip()
+        if query:
+            # Matches page in rank order, with the list order breaking ties, so the cursor is a keyset too.
+            words, next_cursor = paginate_keyset(
+                search_words(query, queryset),
+                ("search_rank", "hierarchy_stage", "id"),
+                cursor=request.query_params.get("cursor"),
+                page_size=page_size_from(request, SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE),
+            )
+            return Response(
+                {"query": query, "results": self.get_serializer(words, many=True).data, "next_cursor": next_cursor}
+            )
+        if phonemes or paging_requested(request):
+            words, next_cursor = paginate_request(request, queryset, ("hierarchy_stage", "id"))
+            return Response({"results": self.get_serializer(words, many=True).data, "next_cursor": next_cursor})
+        snapshot = get_lexicon_snapshot()
+        return rendered_json_response(request, snapshot.list_body, snapshot.list_etag)
+
 
 class WordDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -18,3 +57,66 @@ class WordDetailView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         return Word.objects.filter(is_active=True).prefetch_related("components__component_word")
+
+    def retrieve(self, request, *args, **kwargs):
+        rendered = get_lexicon_snapshot().detail(kwargs["pk"])
+        if rendered is None:
+            raise NotFound("Word not found.")
+        body, etag = rendered
+        return rendered_json_response(request, body, etag)
+
+
+class WordTreeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        tree = get_word_trees([pk]).get(pk)
+        if tree is None:
+            return Response({"detail": "Word not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(tree)
+
+
+class WordTreeBatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        raw_ids = [value for value in request.query_params.get("ids", "").split(",") if value.strip()]
+        try:
+            word_ids = [int(value) for value in raw_ids]
+        except ValueError:
+            return Response({"detail": "ids must be a comma-separated list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not word_ids:
+            return Response({"detail": "ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(word_ids) > MAX_TREE_BATCH:
+            return Response(
+                {"detail": f"At most {MAX_TREE_BATCH} ids may be requested at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        trees = get_word_trees(word_ids)
+        return Response({"results": [trees[word_id] for word_id in dict.fromkeys(word_ids) if word_id in trees]})
+
+
+class WordMinimalPairsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        if not Word.objects.filter(pk=pk, is_active=True).exists():
+            return Response({"detail": "Word not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        pairs = minimal_pairs_for_word(pk)
+        return Response(
+            {
+                "word_id": pk,
+                "results": [
+                    {
+                        "word": WordListSerializer(word).data,
+                        "position": position,
+                        "slot": slot,
+                        "from": from_value,
+                        "to": to_value,
+                    }
+                    for word, position, slot, from_value, to_value in pairs
+                ],
+            }
+        )
@@ -2,11 +2,13 @@ from django.urls import path
 
 from .views import (
     PracticeHistoryView,
+    PracticeMinimalPairCreateView,
     PracticeMissedView,
     PracticeReviewCreateView,
     PracticeSessionCreateView,
     PracticeSessionDetailView,
     PracticeSessionSubmitView,
+    PrebuiltSessionStatsView,
 )
 
 urlpatterns = [
@@ -16,4 +18,6 @@ urlpatterns = [
     path("practice/history/", PracticeHistoryView.as_view(), name="practice-history"),
     path("practice/missed/", PracticeMissedView.as_view(), name="practice-missed"),
     path("practice/review/", PracticeReviewCreateView.as_view(), name="practice-review-create"),
+    path("practice/minimal-pairs/", PracticeMinimalPairCreateView.as_view(), name="practice-minimal-pair-create"),
+    path("practice/prebuilt-stats/", PrebuiltSessionStatsView.as_view(), name="practice-prebuilt-stats"),
 ]
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from apps.practice.models import PracticeItem, PracticeSession, PracticeSessionSnapshot
+from apps.practice.services import build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Store detail snapshots for submitted practice sessions that lack one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        pending = (
+            PracticeSession.objects.filter(submitted_at__isnull=False, snapshot__isnull=True)
+            .prefetch_related(Prefetch("items", queryset=PracticeItem.objects.select_related("word")))
+            .order_by("id")
+        )
+
+        total = 0
+        last_id = 0
+        while batch := list(pending.filter(id__gt=last_id)[: options["batch_size"]]):
+            PracticeSessionSnapshot.objects.bulk_create(
+                [build_snapshot(session, session.items.all()) for session in batch], ignore_conflicts=True
+            )
+            total += len(batch)
+            last_id = batch[-1].id
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Froze {total} sessions in {elapsed:.1f}s."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.practice.prebuilt import build_queued, queued_build_requests
+
+
+class Command(BaseCommand):
+    help = "Drain the session build queue, preparing each queued user's next daily and review sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty instead of polling.")
+
+    def handle(self, *args, **options):
+        built = 0
+        while True:
+            requests = queued_build_requests(options["batch_size"])
+            batch_built = sum(build_queued(request) for request in requests)
+            built += batch_built
+            if batch_built and options["verbosity"] >= 2:
+                self.stdout.write(f"Built next sessions for {batch_built} users.")
+            if not requests:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                # Like a request handler, drop connections that failed or outlived CONN_MAX_AGE between polls.
+                close_old_connections()
+
+        self.stdout.write(self.style.SUCCESS(f"Built next sessions for {built} users."))
@@ -0,0 +1,45 @@
+import time
+from itertools import groupby
+from operator import attrgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.practice.models import NewWordFrontier, PracticeAttempt, WordMemoryState
+from apps.practice.services import apply_review
+
+
+class Command(BaseCommand):
+    help = "Rebuild every user's spaced-repetition memory states by replaying submitted practice attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        attempts = (
+            PracticeAttempt.objects.filter(session__submitted_at__isnull=False)
+            .select_related("session")
+            .only("word_id", "is_correct", "session__created_by_id", "session__submitted_at")
+            .order_by("session__created_by_id", "session__submitted_at", "session_id", "position")
+        )
+
+        users = total = 0
+        with transaction.atomic():
+            WordMemoryState.objects.all().delete()
+            # Frontiers assume the old states; without them the next daily session searches from the start.
+            NewWordFrontier.objects.all().delete()
+            by_user = groupby(attempts.iterator(chunk_size=options["chunk_size"]), key=attrgetter("session.created_by_id"))
+            for user_id, user_attempts in by_user:
+                states = {}
+                for attempt in user_attempts:
+                    state = states.get(attempt.word_id)
+                    if state is None:
+                        state = states[attempt.word_id] = WordMemoryState(user_id=user_id, word_id=attempt.word_id, box=0)
+                    apply_review(state, attempt.is_correct, attempt.session.submitted_at)
+                    total += 1
+                WordMemoryState.objects.bulk_create(states.values(), batch_size=options["chunk_size"])
+                users += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Replayed {total} attempts for {users} users in {elapsed:.1f}s."))
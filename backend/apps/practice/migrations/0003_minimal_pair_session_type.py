@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('practice', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='practicesession',
+            name='session_type',
+            field=models.CharField(choices=[('DAILY', 'Daily practice'), ('REVIEW', 'Review practice'), ('MINIMAL_PAIR', 'Minimal pair practice'), ('SCREENING', 'Screening')], default='DAILY', max_length=16),
+        ),
+    ]
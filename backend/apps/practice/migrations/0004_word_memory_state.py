@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lexicon', '0006_minimal_pair_keys'),
+        ('practice', '0003_minimal_pair_session_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordMemoryState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('box', models.PositiveSmallIntegerField(default=1)),
+                ('due_at', models.DateTimeField()),
+                ('last_reviewed_at', models.DateTimeField()),
+                ('last_missed_at', models.DateTimeField(blank=True, null=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('miss_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_memory_states', to=settings.AUTH_USER_MODEL)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memory_states', to='lexicon.word')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due_at'], name='practice_memory_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'word'), name='uniq_wordmemorystate_user_word')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('practice', '0006_prebuilt_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeSessionSnapshot',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='practice.practicesession')),
+                ('body', models.BinaryField()),
+                ('etag', models.CharField(max_length=40)),
+            ],
+        ),
+    ]
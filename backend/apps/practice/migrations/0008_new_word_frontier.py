@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('practice', '0007_session_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewWordFrontier',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('hierarchy_stage', models.PositiveSmallIntegerField()),
+                ('word_id', models.BigIntegerField()),
+                ('lexicon_version', models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('practice', '0008_new_word_frontier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prebuiltsession',
+            name='lexicon_version',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
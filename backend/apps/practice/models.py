@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from apps.centres.models import Centre
 from apps.lexicon.models import Word
@@ -8,6 +9,7 @@ from apps.lexicon.models import Word
 class PracticeSessionType(models.TextChoices):
     DAILY = "DAILY", "Daily practice"
     REVIEW = "REVIEW", "Review practice"
+    MINIMAL_PAIR = "MINIMAL_PAIR", "Minimal pair practice"
     SCREENING = "SCREENING", "Screening"
 
 
@@ -19,8 +21,25 @@ class PracticeSession(models.Model):
     child_display_name = models.CharField(max_length=100, blank=True)
     planned_item_count = models.PositiveSmallIntegerField(default=10)
 
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Offline clients (see apps.sync) supply their own start time and a per-user idempotency key.
+    started_at = models.DateTimeField(default=timezone.now)
     submitted_at = models.DateTimeField(null=True, blank=True)
+    client_key = models.UUIDField(null=True, blank=True, editable=False)
+    # Set by apps.analytics.rollups once the session's attempts are in the centre rollups.
+    rolled_up_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["created_by", "client_key"], name="uniq_practicesession_client_key"),
+        ]
+        indexes = [
+            models.Index(fields=["created_by", "-started_at", "-id"], name="practice_sess_user_start_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(submitted_at__isnull=False, rolled_up_at__isnull=True),
+                name="practice_sess_unrolled_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.session_type} {self.id}"
@@ -49,3 +68,92 @@ class PracticeAttempt(models.Model):
             models.UniqueConstraint(fields=["session", "position"], name="uniq_practiceattempt_session_position"),
         ]
         ordering = ["position"]
+
+
+class PracticeSessionSnapshot(models.Model):
+    """Rendered detail payload of a submitted session, which never changes afterwards."""
+
+    session = models.OneToOneField(PracticeSession, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    body = models.BinaryField()
+    etag = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f"Snapshot of {self.session_id}"
+
+
+class WordMemoryState(models.Model):
+    """Leitner-box spaced-repetition state of one word for one user.
+
+    ``due_at`` is indexed per user so daily sessions read the due queue directly
+    instead of aggregating attempt history.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="word_memory_states")
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="memory_states")
+    box = models.PositiveSmallIntegerField(default=1)
+    due_at = models.DateTimeField()
+    last_reviewed_at = models.DateTimeField()
+    last_missed_at = models.DateTimeField(null=True, blank=True)
+    review_count = models.PositiveIntegerField(default=0)
+    miss_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "word"], name="uniq_wordmemorystate_user_word"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "due_at"], name="practice_memory_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.word_id} box {self.box}"
+
+
+class NewWordFrontier(models.Model):
+    """Where the search for a user's unseen words starts in hierarchy order.
+
+    The user has a memory state for every active word before ``(hierarchy_stage,
+    word_id)``, so daily sessions look for unseen words from here instead of skipping
+    everything the user has already seen. Any lexicon change can reorder or add
+    words, so the frontier only holds for the lexicon version it was recorded with.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    hierarchy_stage = models.PositiveSmallIntegerField()
+    word_id = models.BigIntegerField()
+    lexicon_version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.user_id} from ({self.hierarchy_stage}, {self.word_id})"
+
+
+class SessionBuildRequest(models.Model):
+    """Queue entry asking the session builder to prepare a user's next sessions.
+
+    One row per user: repeated submits before the worker runs collapse into one build.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Build for {self.user_id}"
+
+
+class PrebuiltSession(models.Model):
+    """Words selected ahead of time for a user's next session of one type."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    session_type = models.CharField(max_length=16, choices=PracticeSessionType.choices)
+    word_ids = models.JSONField(default=list)
+    built_at = models.DateTimeField(default=timezone.now)
+    # The lexicon version the words were selected under; a list from an older version is not served.
+    lexicon_version = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "session_type"], name="uniq_prebuiltsession_user_type"),
+        ]
+
+    def __str__(self):
+        return f"{self.session_type} for {self.user_id}"
@@ -0,0 +1,128 @@
+"""Next sessions selected ahead of time by a background worker.
+
+Submitting a practice session enqueues a ``SessionBuildRequest`` in the same
+transaction. The ``build_next_sessions`` worker drains the queue and stores each
+user's next daily and review word lists as ``PrebuiltSession`` rows, one user per
+transaction. Create endpoints claim a matching prebuilt list with a conditional
+delete and fall back to on-demand selection when none is ready, or when it is too
+old or was built under an earlier lexicon version; hits and misses are counted in
+the cache for ``PrebuiltSessionStatsView``.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.lexicon.models import Word
+from apps.lexicon.snapshot import current_lexicon_version
+
+from .models import PrebuiltSession, PracticeSessionType, SessionBuildRequest
+from .services import recent_missed_words_for_user, select_daily_words
+
+PREBUILT_ITEM_COUNT = 20
+PREBUILT_REVIEW_DAYS = 30
+# Due dates move on with the clock, so an old daily list may miss words that have become due.
+PREBUILT_MAX_AGE = timedelta(hours=12)
+PREBUILT_TYPES = (PracticeSessionType.DAILY, PracticeSessionType.REVIEW)
+STATS_CACHE_KEY = "practice:prebuilt:{session_type}:{outcome}"
+
+
+def enqueue_session_build(user_id):
+    SessionBuildRequest.objects.bulk_create([SessionBuildRequest(user_id=user_id)], ignore_conflicts=True)
+
+
+def build_sessions_for(user):
+    # Read before selecting, so a lexicon change during the build leaves the lists stale rather than current.
+    lexicon_version = current_lexicon_version()
+    word_lists = {
+        PracticeSessionType.DAILY: select_daily_words(user, limit=PREBUILT_ITEM_COUNT),
+        PracticeSessionType.REVIEW: recent_missed_words_for_user(user, days=PREBUILT_REVIEW_DAYS, limit=PREBUILT_ITEM_COUNT),
+    }
+    built_at = timezone.now()
+    PrebuiltSession.objects.filter(user=user).delete()
+    PrebuiltSession.objects.bulk_create(
+        [
+            PrebuiltSession(
+                user=user,
+                session_type=session_type,
+                word_ids=[word.id for word in words],
+                built_at=built_at,
+                lexicon_version=lexicon_version,
+            )
+            for session_type, words in word_lists.items()
+            if words
+        ]
+    )
+
+
+def queued_build_requests(batch_size):
+    return list(SessionBuildRequest.objects.select_related("user").order_by("requested_at")[:batch_size])
+
+
+def build_queued(request):
+    """Claim one queue entry and build its user's sessions; ``False`` if another worker claimed it first.
+
+    Each user gets its own short transaction, so the claimed row and the user's prebuilt
+    rows stay locked only while that one user is built, and a crash leaves them queued.
+    """
+    with transaction.atomic():
+        deleted, _ = SessionBuildRequest.objects.filter(pk=request.pk, requested_at=request.requested_at).delete()
+        if deleted:
+            build_sessions_for(request.user)
+    return bool(deleted)
+
+
+def _count(session_type, outcome):
+    key = STATS_CACHE_KEY.format(session_type=session_type, outcome=outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; losing one count is fine for a hit-rate metric.
+        pass
+
+
+def claim_prebuilt_words(user, session_type, limit):
+    """Return the first ``limit`` words of the user's prebuilt session, or ``None`` if none is ready.
+
+    Lists shorter than ``PREBUILT_ITEM_COUNT`` already hold every candidate, so any
+    ``limit`` up to that size can be served from them.
+    """
+    prebuilt = None
+    if limit <= PREBUILT_ITEM_COUNT:
+        prebuilt = PrebuiltSession.objects.filter(user=user, session_type=session_type).first()
+    # Only the request whose delete removes the row may use it.
+    claimed = prebuilt is not None and PrebuiltSession.objects.filter(pk=prebuilt.pk).delete()[0]
+    if (
+        not claimed
+        or prebuilt.built_at < timezone.now() - PREBUILT_MAX_AGE
+        or prebuilt.lexicon_version != current_lexicon_version()
+    ):
+        _count(session_type, "misses")
+        return None
+
+    word_ids = prebuilt.word_ids[:limit]
+    words = Word.objects.filter(is_active=True).in_bulk(word_ids)
+    _count(session_type, "hits")
+    return [words[word_id] for word_id in word_ids if word_id in words]
+
+
+def prebuilt_stats():
+    keys = {
+        (session_type, outcome): STATS_CACHE_KEY.format(session_type=session_type, outcome=outcome)
+        for session_type in PREBUILT_TYPES
+        for outcome in ("hits", "misses")
+    }
+    counts = cache.get_many(keys.values())
+    stats = {}
+    for session_type in PREBUILT_TYPES:
+        hits = counts.get(keys[session_type, "hits"], 0)
+        misses = counts.get(keys[session_type, "misses"], 0)
+        stats[session_type] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from rest_framework import serializers
 
 from .models import PracticeSession
@@ -19,6 +21,10 @@ class PracticeSessionSerializer(serializers.ModelSerializer):
         )
 
     def get_items(self, obj):
+        # Create views pass the items they just inserted; otherwise use the (usually prefetched) relation.
+        items = self.context.get("items")
+        if items is None:
+            items = obj.items.all()
         return [
             {
                 "position": item.position,
@@ -28,7 +34,9 @@ class PracticeSessionSerializer(serializers.ModelSerializer):
                     "jyutping": item.word.jyutping,
                     "meaning": item.word.meaning,
                     "sound_group": item.word.sound_group,
+                    "image_url": item.word.image_url,
+                    "audio_url": item.word.audio_url,
                 },
             }
-            for item in obj.items.select_related("word").order_by("position")
+            for item in sorted(items, key=attrgetter("position"))
         ]
@@ -1,37 +1,155 @@
 from datetime import timedelta
 
-from django.db.models import Count, Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 
+from apps.analytics.services import missed_words_for_user
+from apps.common.http import etag_for
+from apps.lexicon.minimal_pairs import minimal_pairs_for_contrast, minimal_pairs_for_word
 from apps.lexicon.models import Word
+from apps.lexicon.services import filter_words_by_phonemes
+from apps.lexicon.snapshot import current_lexicon_version
 
-from .models import PracticeAttempt
+from .models import NewWordFrontier, PracticeSessionSnapshot, WordMemoryState
+from .serializers import PracticeSessionSerializer
 
 
-def select_daily_words(limit=10):
-    queryset = Word.objects.filter(is_active=True).order_by("hierarchy_stage", "id")
-    return list(queryset[:limit])
+# Days until a word in each Leitner box is due again; a miss sends it back to box 1.
+LEITNER_INTERVALS = {1: 1, 2: 2, 3: 4, 4: 8, 5: 16}
+MAX_BOX = max(LEITNER_INTERVALS)
+MEMORY_FIELDS = ("box", "due_at", "last_reviewed_at", "last_missed_at", "review_count", "miss_count")
 
 
-def recent_missed_words_for_user(user, days=30, limit=10):
-    since = timezone.now() - timedelta(days=days)
-    missed = (
-        PracticeAttempt.objects.filter(session__created_by=user, session__started_at__gte=since, is_correct=False)
-        .values("word_id")
-        .annotate(missed_count=Count("id"))
-        .order_by("-missed_count")
+def apply_review(state, is_correct, reviewed_at):
+    """Move ``state`` to its next Leitner box for one answer given at ``reviewed_at``."""
+    state.box = min(state.box + 1, MAX_BOX) if is_correct else 1
+    state.due_at = reviewed_at + timedelta(days=LEITNER_INTERVALS[state.box])
+    state.last_reviewed_at = reviewed_at
+    state.review_count += 1
+    if not is_correct:
+        state.last_missed_at = reviewed_at
+        state.miss_count += 1
+
+
+def record_reviews(user_id, attempts, reviewed_at):
+    """Apply ``attempts`` (in answer order) to the user's memory states with one read and one upsert."""
+    record_review_batches(user_id, [(reviewed_at, attempts)])
+
+
+def record_review_batches(user_id, batches):
+    """Apply several ``(reviewed_at, attempts)`` batches, in order, with one read and one upsert."""
+    word_ids = {attempt.word_id for _, attempts in batches for attempt in attempts}
+    states = {state.word_id: state for state in WordMemoryState.objects.filter(user_id=user_id, word_id__in=word_ids)}
+    for reviewed_at, attempts in batches:
+        for attempt in attempts:
+            state = states.get(attempt.word_id)
+            if state is None:
+                # Unseen words start below box 1, so a correct first answer puts them in box 1.
+                state = states[attempt.word_id] = WordMemoryState(user_id=user_id, word_id=attempt.word_id, box=0)
+            apply_review(state, attempt.is_correct, reviewed_at)
+
+    WordMemoryState.objects.bulk_create(
+        states.values(),
+        update_conflicts=True,
+        unique_fields=["user", "word"],
+        update_fields=MEMORY_FIELDS,
+    )
+
+
+def _unseen_words(user, words, limit, advance_frontier):
+    """Up to ``limit`` of ``words`` the user has no memory state for, in hierarchy order.
+
+    The search starts at the user's ``NewWordFrontier``. With ``advance_frontier`` (only
+    valid when ``words`` is every active word) the frontier then moves up to the first
+    unseen word, so each seen word is skipped at most once per lexicon version.
+    """
+    # Read the version first so a concurrent lexicon change can only leave a frontier that is ignored.
+    version = current_lexicon_version()
+    frontier = (
+        NewWordFrontier.objects.filter(user=user, lexicon_version=version)
+        .values_list("hierarchy_stage", "word_id")
+        .first()
+    )
+    seen = WordMemoryState.objects.filter(user=user, word=OuterRef("pk"))
+    unseen = words.filter(~Exists(seen))
+    if frontier:
+        stage, word_id = frontier
+        unseen = unseen.filter(Q(hierarchy_stage__gt=stage) | Q(hierarchy_stage=stage, id__gte=word_id))
+    found = list(unseen.order_by("hierarchy_stage", "id")[:limit])
+
+    if advance_frontier:
+        if found:
+            position = (found[0].hierarchy_stage, found[0].id)
+        else:
+            # Everything has been seen; start after the last word until the lexicon changes.
+            last = words.order_by("-hierarchy_stage", "-id").values_list("hierarchy_stage", "id").first()
+            position = (last[0], last[1] + 1) if last else None
+        if position and position != frontier:
+            NewWordFrontier.objects.update_or_create(
+                user=user,
+                defaults={"hierarchy_stage": position[0], "word_id": position[1], "lexicon_version": version},
+            )
+    return found
+
+
+def select_daily_words(user, limit=10, phonemes=None):
+    """Return up to ``limit`` words: the user's due words first, then unseen words in hierarchy order.
+
+    Due words come from the ``(user, due_at)`` index. Unseen words are read from the
+    user's ``NewWordFrontier`` onwards, so the query only skips words seen out of
+    order since the frontier last moved, not the user's whole history.
+    """
+    words = Word.objects.filter(is_active=True)
+    if phonemes:
+        words = filter_words_by_phonemes(words, **phonemes)
+
+    due = list(
+        WordMemoryState.objects.filter(user=user, due_at__lte=timezone.now(), word__in=words)
+        .select_related("word")
+        .order_by("due_at")[:limit]
     )
+    selected = [state.word for state in due]
+    if len(selected) < limit:
+        selected.extend(_unseen_words(user, words, limit - len(selected), advance_frontier=not phonemes))
+    return selected
+
+
+def select_minimal_pair_words(word_id=None, slot=None, contrast=None, limit=10):
+    """Return words in pair order (a, b, a, b, ...) for a minimal-pair session.
+
+    Pairs either contrast ``word_id`` with its minimal-pair partners, or contrast the
+    two ``contrast`` values in one phoneme ``slot`` across the lexicon.
+    """
+    pair_limit = max(limit // 2, 1)
+    if word_id is not None:
+        word = Word.objects.filter(pk=word_id, is_active=True).first()
+        if word is None:
+            return []
+        pairs = [(word, partner) for partner, *_ in minimal_pairs_for_word(word_id)[:pair_limit]]
+    else:
+        pairs = minimal_pairs_for_contrast(slot, contrast[0], contrast[1], limit=pair_limit)
+    return [word for pair in pairs for word in pair]
+
 
-    word_ids = [row["word_id"] for row in missed[:limit]]
+def recent_missed_words_for_user(user, days=30, limit=10):
+    word_ids = [row["word_id"] for row in missed_words_for_user(user, days=days)[:limit]]
     words = Word.objects.in_bulk(word_ids)
     return [words[word_id] for word_id in word_ids if word_id in words]
 
 
 def aggregate_missed_words_for_user(user, days=30):
-    since = timezone.now() - timedelta(days=days)
-    return (
-        PracticeAttempt.objects.filter(session__created_by=user, session__started_at__gte=since, is_correct=False)
-        .values("word_id", "word__hanzi", "word__jyutping")
-        .annotate(missed_count=Count("id"), total_attempts=Count("id", filter=Q(is_correct=False) | Q(is_correct=True)))
-        .order_by("-missed_count")
-    )
+    return missed_words_for_user(user, days=days)
+
+
+def build_snapshot(session, items):
+    """Unsaved snapshot of a submitted session's rendered detail payload."""
+    body = JSONRenderer().render(PracticeSessionSerializer(session, context={"items": items}).data)
+    return PracticeSessionSnapshot(session=session, body=body, etag=etag_for(body))
+
+
+def freeze_session(session, items):
+    """Store the rendered detail payload of a submitted session and return ``(body, etag)``."""
+    snapshot = build_snapshot(session, items)
+    PracticeSessionSnapshot.objects.bulk_create([snapshot], ignore_conflicts=True)
+    return snapshot.body, snapshot.etag
@@ -1,3 +1,269 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common.http import IMMUTABLE_CACHE_CONTROL
+
+from apps.lexicon.models import Word
+from apps.lexicon.snapshot import bump_lexicon_version
+
+from .models import (
+    NewWordFrontier,
+    PracticeAttempt,
+    PracticeItem,
+    PracticeSession,
+    PracticeSessionType,
+    PracticeSessionSnapshot,
+    PrebuiltSession,
+    WordMemoryState,
+)
+from .prebuilt import enqueue_session_build, prebuilt_stats
+from .services import record_reviews, select_daily_words
+
+
+class ConcurrentSubmitTests(TransactionTestCase):
+    thread_count = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user("parent", password="secret")
+        words = [Word.objects.create(hanzi=hanzi, jyutping="gaa1") for hanzi in "家加嘉"]
+        self.session = PracticeSession.objects.create(created_by=self.user, planned_item_count=len(words))
+        PracticeItem.objects.bulk_create(
+            [PracticeItem(session=self.session, word=word, position=index) for index, word in enumerate(words, start=1)]
+        )
+        self.answers = [{"position": position, "is_correct": True} for position in range(1, len(words) + 1)]
+
+    def test_only_one_concurrent_submit_wins(self):
+        barrier = threading.Barrier(self.thread_count)
+        statuses = []
+
+        def submit():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                response = client.post(
+                    f"/api/practice/sessions/{self.session.id}/submit/", {"answers": self.answers}, format="json"
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(self.thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] + [409] * (self.thread_count - 1))
+        self.assertEqual(PracticeAttempt.objects.filter(session=self.session).count(), len(self.answers))
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.submitted_at)
+
+    def test_submit_after_submission_conflicts(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/practice/sessions/{self.session.id}/submit/"
+
+        self.assertEqual(client.post(url, {"answers": self.answers}, format="json").status_code, 200)
+        self.assertEqual(client.post(url, {"answers": self.answers}, format="json").status_code, 409)
+
+    def test_invalid_submit_releases_the_claim(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/practice/sessions/{self.session.id}/submit/"
+
+        self.assertEqual(client.post(url, {"answers": self.answers[:1]}, format="json").status_code, 400)
+        self.session.refresh_from_db()
+        self.assertIsNone(self.session.submitted_at)
+        self.assertEqual(client.post(url, {"answers": self.answers}, format="json").status_code, 200)
+
+
+class SessionCreateTests(TestCase):
+    url = "/api/practice/sessions/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Word.objects.create(hanzi="家", jyutping="gaa1")
+
+    def test_include_session_returns_the_full_payload(self):
+        for value in (True, "true", "1", "on"):
+            with self.subTest(value=value):
+                response = self.client.post(self.url, {"include_session": value}, format="json")
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual([item["word"]["hanzi"] for item in response.json()["items"]], ["家"])
+
+        response = self.client.post(f"{self.url}?include_session=yes", {}, format="json")
+        self.assertIn("items", response.json())
+
+    def test_false_values_return_only_the_id(self):
+        for value in (False, "false", "0", "off", ""):
+            with self.subTest(value=value):
+                response = self.client.post(self.url, {"include_session": value}, format="json")
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(list(response.json()), ["id"])
+
+    def test_unrecognised_values_are_rejected_without_creating_a_session(self):
+        response = self.client.post(self.url, {"include_session": "maybe"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "include_session must be a boolean.")
+        self.assertFalse(PracticeSession.objects.exists())
+
+
+class WordMemoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("parent", password="secret")
+        self.words = [
+            Word.objects.create(hanzi=hanzi, jyutping="gaa1", hierarchy_stage=stage)
+            for hanzi, stage in zip("家加嘉假價", (2, 1, 1, 3, 2))
+        ]
+        self.in_order = sorted(self.words, key=lambda word: (word.hierarchy_stage, word.id))
+
+    def review(self, word, is_correct, reviewed_at):
+        record_reviews(self.user.id, [SimpleNamespace(word_id=word.id, is_correct=is_correct)], reviewed_at)
+        return WordMemoryState.objects.get(user=self.user, word=word)
+
+    def test_leitner_boxes_move_up_on_hits_and_reset_on_a_miss(self):
+        now = timezone.now()
+        word = self.words[0]
+        for expected_box, expected_days in ((1, 1), (2, 2), (3, 4), (4, 8), (5, 16), (5, 16)):
+            state = self.review(word, True, now)
+            self.assertEqual(state.box, expected_box)
+            self.assertEqual(state.due_at, now + timedelta(days=expected_days))
+
+        state = self.review(word, False, now)
+        self.assertEqual((state.box, state.due_at), (1, now + timedelta(days=1)))
+        self.assertEqual((state.review_count, state.miss_count, state.last_missed_at), (7, 1, now))
+
+    def test_due_words_come_first_oldest_due_first(self):
+        now = timezone.now()
+        self.review(self.words[3], True, now - timedelta(days=3))
+        self.review(self.words[0], True, now - timedelta(days=5))
+        # Not due until tomorrow, and no longer unseen.
+        self.review(self.words[1], True, now)
+
+        selected = select_daily_words(self.user, limit=4)
+
+        unseen = [word for word in self.in_order if word not in (self.words[0], self.words[1], self.words[3])]
+        self.assertEqual(selected, [self.words[0], self.words[3], *unseen])
+
+    def test_unseen_words_resume_from_the_frontier(self):
+        self.assertEqual(select_daily_words(self.user, limit=2), self.in_order[:2])
+        for word in self.in_order[:2]:
+            self.review(word, True, timezone.now())
+        # A word seen out of order is still skipped after the frontier.
+        self.review(self.in_order[3], True, timezone.now())
+
+        self.assertEqual(select_daily_words(self.user, limit=2), [self.in_order[2], self.in_order[4]])
+        frontier = NewWordFrontier.objects.get(user=self.user)
+        self.assertEqual(
+            (frontier.hierarchy_stage, frontier.word_id), (self.in_order[2].hierarchy_stage, self.in_order[2].id)
+        )
+
+        with self.assertNumQueries(3):
+            # Lexicon version, frontier and unseen words; the unchanged frontier is not rewritten.
+            select_daily_words(self.user, limit=2)
+
+    def test_lexicon_change_resets_the_frontier(self):
+        for word in self.in_order[:3]:
+            self.review(word, True, timezone.now())
+        self.assertEqual(select_daily_words(self.user, limit=1), [self.in_order[3]])
+
+        earlier = Word.objects.create(hanzi="嫁", jyutping="gaa3", hierarchy_stage=1)
+        bump_lexicon_version()
+
+        self.assertEqual(select_daily_words(self.user, limit=1), [earlier])
+
+    def test_phoneme_filter_leaves_the_frontier_alone(self):
+        select_daily_words(self.user, limit=2, phonemes={"initial": "g"})
+        self.assertFalse(NewWordFrontier.objects.filter(user=self.user).exists())
+
+
+class PrebuiltSessionTests(TestCase):
+    url = "/api/practice/sessions/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.words = [Word.objects.create(hanzi=hanzi, jyutping="gaa1", hierarchy_stage=2) for hanzi in "家加嘉"]
+        enqueue_session_build(self.user.id)
+        call_command("build_next_sessions", "--once", stdout=StringIO())
+
+    def created_words(self, response):
+        self.assertEqual(response.status_code, 201)
+        return list(PracticeItem.objects.filter(session_id=response.json()["id"]).values_list("word__hanzi", flat=True))
+
+    def test_create_consumes_the_prebuilt_list(self):
+        prebuilt = PrebuiltSession.objects.get(user=self.user, session_type=PracticeSessionType.DAILY)
+        self.assertEqual(prebuilt.word_ids, [word.id for word in self.words])
+
+        self.assertEqual(self.created_words(self.client.post(self.url, {"planned_item_count": 2})), ["家", "加"])
+        self.assertFalse(PrebuiltSession.objects.filter(user=self.user, session_type="DAILY").exists())
+        self.assertEqual(prebuilt_stats()[PracticeSessionType.DAILY], {"hits": 1, "misses": 0, "hit_rate": 1.0})
+
+        # The list is used once; the next session is selected on demand.
+        self.assertEqual(self.created_words(self.client.post(self.url, {"planned_item_count": 2})), ["家", "加"])
+        self.assertEqual(prebuilt_stats()[PracticeSessionType.DAILY]["misses"], 1)
+
+    def test_list_built_before_a_lexicon_change_is_not_served(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Word.objects.create(hanzi="假", jyutping="gaa2", hierarchy_stage=1)
+
+        self.assertEqual(self.created_words(self.client.post(self.url, {"planned_item_count": 2})), ["假", "家"])
+        self.assertEqual(prebuilt_stats()[PracticeSessionType.DAILY], {"hits": 0, "misses": 1, "hit_rate": 0.0})
+        self.assertFalse(PrebuiltSession.objects.filter(user=self.user, session_type="DAILY").exists())
+
+
+class SessionSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.word = Word.objects.create(hanzi="家", jyutping="gaa1")
+        self.session = PracticeSession.objects.create(created_by=self.user, planned_item_count=1)
+        PracticeItem.objects.create(session=self.session, word=self.word, position=1)
+        self.url = f"/api/practice/sessions/{self.session.id}/"
+
+    def test_submitted_session_is_served_from_its_snapshot(self):
+        answers = [{"position": 1, "is_correct": True}]
+        self.assertEqual(self.client.post(f"{self.url}submit/", {"answers": answers}, format="json").status_code, 200)
+        self.word.hanzi = "加"
+        self.word.save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.json()["items"][0]["word"]["hanzi"], "家")
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_legacy_session_is_rendered_without_writing_until_backfilled(self):
+        PracticeSession.objects.filter(pk=self.session.pk).update(submitted_at=timezone.now())
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get("Cache-Control"), IMMUTABLE_CACHE_CONTROL)
+        self.assertFalse(PracticeSessionSnapshot.objects.exists())
+
+        call_command("backfill_practice_snapshots", stdout=StringIO())
+        frozen = self.client.get(self.url)
+        self.assertEqual(frozen["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(frozen.json(), response.json())
@@ -1,25 +1,64 @@
 from datetime import timedelta
 
 from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import PracticeAttempt, PracticeItem, PracticeSession, PracticeSessionType
+from apps.accounts.permissions import IsStaffOrAdmin
+from apps.analytics.models import AttemptSource
+from apps.analytics.services import record_word_attempts
+from apps.common.http import IMMUTABLE_CACHE_CONTROL, boolean_param, rendered_json_response
+from apps.common.idempotency import idempotent
+from apps.common.pagination import paginate_request
+from apps.lexicon.models import PhonemeSlot
+from apps.lexicon.services import phoneme_filters_from
+
+from .models import PracticeAttempt, PracticeItem, PracticeSession, PracticeSessionSnapshot, PracticeSessionType
+from .prebuilt import PREBUILT_REVIEW_DAYS, claim_prebuilt_words, enqueue_session_build, prebuilt_stats
 from .serializers import PracticeSessionSerializer
-from .services import aggregate_missed_words_for_user, recent_missed_words_for_user, select_daily_words
+from .services import (
+    aggregate_missed_words_for_user,
+    freeze_session,
+    recent_missed_words_for_user,
+    record_reviews,
+    select_daily_words,
+    select_minimal_pair_words,
+)
+
+
+def _created_session_response(request, session, items):
+    """201 for a new session: just its id, or the full payload when ``include_session`` is set.
+
+    The payload is built from the in-memory session and items, so it costs no extra reads.
+    """
+    if boolean_param(request, "include_session"):
+        return Response(
+            PracticeSessionSerializer(session, context={"items": items}).data, status=status.HTTP_201_CREATED
+        )
+    return Response({"id": session.id}, status=status.HTTP_201_CREATED)
 
 
 class PracticeSessionCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request):
         planned_item_count = int(request.data.get("planned_item_count", 10))
         child_display_name = request.data.get("child_display_name", "")
+        try:
+            phonemes = phoneme_filters_from(request.data.get("phonemes") or {})
+        except (AttributeError, ValueError):
+            return Response({"detail": "phonemes must map phoneme fields to values."}, status=status.HTTP_400_BAD_REQUEST)
 
-        words = select_daily_words(limit=planned_item_count)
+        words = None
+        if not phonemes:
+            words = claim_prebuilt_words(request.user, PracticeSessionType.DAILY, planned_item_count)
+        if not words:
+            words = select_daily_words(request.user, limit=planned_item_count, phonemes=phonemes)
         if not words:
             return Response({"detail": "No active words are available."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -37,45 +76,67 @@ class PracticeSessionCreateView(APIView):
         ]
         PracticeItem.objects.bulk_create(items)
 
-        return Response({"id": session.id}, status=status.HTTP_201_CREATED)
+        return _created_session_response(request, session, items)
 
 
 class PracticeSessionDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, session_id):
+        frozen = (
+            PracticeSessionSnapshot.objects.filter(session_id=session_id)
+            .values_list("session__created_by_id", "body", "etag")
+            .first()
+        )
+        if frozen is not None:
+            created_by_id, body, etag = frozen
+            if created_by_id != request.user.id:
+                return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
+            return rendered_json_response(request, bytes(body), etag, cache_control=IMMUTABLE_CACHE_CONTROL)
+
         try:
-            session = PracticeSession.objects.prefetch_related("items__word").get(pk=session_id)
+            session = PracticeSession.objects.prefetch_related(
+                Prefetch("items", queryset=PracticeItem.objects.select_related("word"))
+            ).get(pk=session_id)
         except PracticeSession.DoesNotExist:
             return Response({"detail": "Session not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if session.created_by_id != request.user.id:
             return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
 
+        # Unsubmitted, or submitted before snapshots existed and not yet frozen by backfill_practice_snapshots.
         return Response(PracticeSessionSerializer(session).data)
 
 
 class PracticeSessionSubmitView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request, session_id):
         try:
-            session = PracticeSession.objects.prefetch_related("items__word").get(pk=session_id)
+            session = PracticeSession.objects.get(pk=session_id)
         except PracticeSession.DoesNotExist:
             return Response({"detail": "Session not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if session.created_by_id != request.user.id:
             return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
-        if session.submitted_at:
-            return Response({"detail": "Session has already been submitted."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Claim the session with a conditional UPDATE before doing any work: of concurrent
+        # submits exactly one matches the row, and the others get a 409 straight away.
+        submitted_at = timezone.now()
+        claimed = PracticeSession.objects.filter(pk=session.pk, submitted_at__isnull=True).update(submitted_at=submitted_at)
+        if not claimed:
+            return Response({"detail": "Session has already been submitted."}, status=status.HTTP_409_CONFLICT)
+        session.submitted_at = submitted_at
 
         answers = request.data.get("answers", [])
         answer_map = {entry.get("position"): entry for entry in answers}
-        expected_items = list(session.items.all().order_by("position"))
+        expected_items = list(session.items.select_related("word").order_by("position"))
         expected_positions = {item.position for item in expected_items}
 
         if set(answer_map.keys()) != expected_positions:
+            transaction.set_rollback(True)
             return Response(
                 {"detail": "All positions must be answered exactly once."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -85,6 +146,7 @@ class PracticeSessionSubmitView(APIView):
         for item in expected_items:
             answer = answer_map[item.position]
             if "is_correct" not in answer:
+                transaction.set_rollback(True)
                 return Response({"detail": f"Missing is_correct for position {item.position}."}, status=status.HTTP_400_BAD_REQUEST)
             attempts.append(
                 PracticeAttempt(
@@ -96,8 +158,10 @@ class PracticeSessionSubmitView(APIView):
             )
         PracticeAttempt.objects.bulk_create(attempts)
 
-        session.submitted_at = timezone.now()
-        session.save(update_fields=["submitted_at"])
+        freeze_session(session, expected_items)
+        record_reviews(request.user.id, attempts, session.submitted_at)
+        record_word_attempts(request.user.id, AttemptSource.PRACTICE, attempts, session.submitted_at)
+        enqueue_session_build(request.user.id)
 
         missed = [attempt for attempt in attempts if not attempt.is_correct]
         score = len(attempts) - len(missed)
@@ -123,7 +187,11 @@ class PracticeHistoryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        sessions = PracticeSession.objects.filter(created_by=request.user).order_by("-started_at")
+        sessions, next_cursor = paginate_request(
+            request,
+            PracticeSession.objects.filter(created_by=request.user),
+            ("-started_at", "-id"),
+        )
         data = [
             {
                 "id": session.id,
@@ -133,7 +201,7 @@ class PracticeHistoryView(APIView):
             }
             for session in sessions
         ]
-        return Response(data)
+        return Response({"results": data, "next_cursor": next_cursor})
 
 
 class PracticeMissedView(APIView):
@@ -157,11 +225,16 @@ class PracticeMissedView(APIView):
 class PracticeReviewCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request):
         days = int(request.data.get("days", 30))
         limit = int(request.data.get("planned_item_count", 10))
-        words = recent_missed_words_for_user(request.user, days=days, limit=limit)
+        words = None
+        if days == PREBUILT_REVIEW_DAYS:
+            words = claim_prebuilt_words(request.user, PracticeSessionType.REVIEW, limit)
+        if not words:
+            words = recent_missed_words_for_user(request.user, days=days, limit=limit)
 
         if not words:
             return Response({"detail": "No missed items available for review."}, status=status.HTTP_400_BAD_REQUEST)
@@ -174,8 +247,55 @@ class PracticeReviewCreateView(APIView):
             child_display_name=request.data.get("child_display_name", ""),
         )
 
-        PracticeItem.objects.bulk_create(
-            [PracticeItem(session=session, word=word, position=index) for index, word in enumerate(words, start=1)]
+        items = [PracticeItem(session=session, word=word, position=index) for index, word in enumerate(words, start=1)]
+        PracticeItem.objects.bulk_create(items)
+
+        return _created_session_response(request, session, items)
+
+
+class PracticeMinimalPairCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    @transaction.atomic
+    def post(self, request):
+        limit = int(request.data.get("planned_item_count", 10))
+        word_id = request.data.get("word_id")
+        slot = request.data.get("slot")
+        contrast = request.data.get("contrast")
+
+        if word_id is not None:
+            try:
+                words = select_minimal_pair_words(word_id=int(word_id), limit=limit)
+            except (TypeError, ValueError):
+                return Response({"detail": "word_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        elif slot in PhonemeSlot.values and isinstance(contrast, list) and len(contrast) == 2:
+            words = select_minimal_pair_words(slot=slot, contrast=[str(value) for value in contrast], limit=limit)
+        else:
+            return Response(
+                {"detail": "Provide word_id, or slot with a two-value contrast list."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not words:
+            return Response({"detail": "No minimal pairs are available."}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = PracticeSession.objects.create(
+            created_by=request.user,
+            centre_id=getattr(request.user.profile, "centre_id", None),
+            session_type=PracticeSessionType.MINIMAL_PAIR,
+            planned_item_count=len(words),
+            child_display_name=request.data.get("child_display_name", ""),
         )
 
-        return Response({"id": session.id}, status=status.HTTP_201_CREATED)
+        items = [PracticeItem(session=session, word=word, position=index) for index, word in enumerate(words, start=1)]
+        PracticeItem.objects.bulk_create(items)
+
+        return _created_session_response(request, session, items)
+
+
+class PrebuiltSessionStatsView(APIView):
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request):
+        return Response(prebuilt_stats())
@@ -2,6 +2,7 @@ from django.urls import path
 
 from .views import (
     AgeBandListView,
+    ScreeningNormsView,
     ScreeningSessionCreateView,
     ScreeningSessionDetailView,
     ScreeningSessionSubmitView,
@@ -10,6 +11,7 @@ from .views import (
 
 urlpatterns = [
     path("screening/age-bands/", AgeBandListView.as_view(), name="screening-age-bands"),
+    path("screening/norms/", ScreeningNormsView.as_view(), name="screening-norms"),
     path("screening/sessions/", ScreeningSessionCreateView.as_view(), name="screening-session-create"),
     path("screening/sessions/<int:session_id>/", ScreeningSessionDetailView.as_view(), name="screening-session-detail"),
     path(
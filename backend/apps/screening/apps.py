@@ -6,3 +6,6 @@ class ScreeningConfig(AppConfig):
     name = "apps.screening"
     label = "screening"
     verbose_name = "Screening"
+
+    def ready(self):
+        from . import signals  # noqa: F401
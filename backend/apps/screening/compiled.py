@@ -0,0 +1,132 @@
+"""Compiled, versioned cache of the screening catalogue.
+
+Every screening set is compiled once into its ordered items with pre-serialized
+word payloads, and the set used for each ``(age_band, centre)`` is resolved up
+front. Signals replace the screening version token when an age band, set or item
+changes, and each process then recompiles its catalogue. Word changes replace the
+lexicon version instead; that only re-reads the words used by screening items and
+re-serializes their payloads. Both tokens are read in one cache round trip, so
+starting a session and rendering its items need no catalogue queries.
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from apps.lexicon import snapshot as lexicon_snapshot
+from apps.lexicon.models import Word
+
+from .models import AgeBand, ScreeningItem, ScreeningSet
+from .serializers import ScreeningItemSerializer
+
+VERSION_CACHE_KEY = "screening:version"
+
+_build_lock = threading.Lock()
+_catalogue = None
+
+
+class CompiledScreeningSet(NamedTuple):
+    id: int
+    age_band_id: int
+    # ``{position: word_id}`` in position order, for validating and writing attempts.
+    word_ids: dict
+    items_payload: list
+
+
+def bump_screening_version():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def current_screening_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        candidate = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, candidate, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY, candidate)
+    return version
+
+
+def _current_versions():
+    """``(screening version, lexicon version)``, with a single cache read once both tokens exist."""
+    versions = cache.get_many([VERSION_CACHE_KEY, lexicon_snapshot.VERSION_CACHE_KEY])
+    screening_version = versions.get(VERSION_CACHE_KEY) or current_screening_version()
+    lexicon_version = versions.get(lexicon_snapshot.VERSION_CACHE_KEY) or lexicon_snapshot.current_lexicon_version()
+    return screening_version, lexicon_version
+
+
+def _items_payload(word_ids, words):
+    items = [ScreeningItem(position=position, word=words[word_id]) for position, word_id in word_ids.items()]
+    return ScreeningItemSerializer(items, many=True).data
+
+
+class ScreeningCatalogue:
+    def __init__(self, version, active_age_band_ids, sets, resolved):
+        self.version = version
+        self.active_age_band_ids = active_age_band_ids
+        self._sets = sets
+        self._resolved = resolved
+
+    def screening_set(self, set_id):
+        return self._sets.get(set_id)
+
+    def resolve(self, age_band_id, centre_id):
+        """The active set for a centre, falling back to the band's global set; ``None`` if there is none.
+
+        The resolved set may have no items; starting a session from it is refused, as before.
+        """
+        set_id = self._resolved.get((age_band_id, centre_id)) or self._resolved.get((age_band_id, None))
+        return self._sets[set_id] if set_id else None
+
+    def with_words(self, version):
+        """A copy for lexicon ``version`` with the word payloads re-read; sets and resolution are kept."""
+        word_ids = {word_id for screening_set in self._sets.values() for word_id in screening_set.word_ids.values()}
+        words = Word.objects.in_bulk(word_ids)
+        sets = {
+            set_id: screening_set._replace(items_payload=_items_payload(screening_set.word_ids, words))
+            for set_id, screening_set in self._sets.items()
+        }
+        return ScreeningCatalogue(version, self.active_age_band_ids, sets, self._resolved)
+
+
+def _build_catalogue(version):
+    active_age_band_ids = frozenset(AgeBand.objects.filter(is_active=True).values_list("id", flat=True))
+
+    word_ids_by_set = defaultdict(dict)
+    for set_id, position, word_id in ScreeningItem.objects.order_by("screening_set_id", "position").values_list(
+        "screening_set_id", "position", "word_id"
+    ):
+        word_ids_by_set[set_id][position] = word_id
+
+    sets, resolved = {}, {}
+    for screening_set in ScreeningSet.objects.order_by("id"):
+        sets[screening_set.id] = CompiledScreeningSet(
+            id=screening_set.id,
+            age_band_id=screening_set.age_band_id,
+            word_ids=word_ids_by_set.get(screening_set.id, {}),
+            items_payload=[],
+        )
+        # The lowest-id active set wins, as it did before compilation.
+        if screening_set.is_active:
+            resolved.setdefault((screening_set.age_band_id, screening_set.centre_id), screening_set.id)
+
+    return ScreeningCatalogue(version, active_age_band_ids, sets, resolved).with_words(version)
+
+
+def get_screening_catalogue():
+    global _catalogue
+
+    # Read the versions before querying so a concurrent change can only make us rebuild again.
+    version = _current_versions()
+    catalogue = _catalogue
+    if catalogue is None or catalogue.version != version:
+        with _build_lock:
+            catalogue = _catalogue
+            if catalogue is None or catalogue.version[0] != version[0]:
+                catalogue = _build_catalogue(version)
+            elif catalogue.version != version:
+                catalogue = catalogue.with_words(version)
+            _catalogue = catalogue
+    return catalogue
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from apps.screening.models import ScreeningAttempt, ScreeningSession
+from apps.screening.services import freeze_sessions, items_from_attempts
+
+
+class Command(BaseCommand):
+    help = "Compute stored summaries (and detail snapshots) for submitted screening sessions that lack one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        pending = (
+            ScreeningSession.objects.filter(submitted_at__isnull=False, summary__isnull=True)
+            .prefetch_related(
+                Prefetch("attempts", queryset=ScreeningAttempt.objects.select_related("word").order_by("position"))
+            )
+            .order_by("id")
+        )
+
+        total = 0
+        last_id = 0
+        while batch := list(pending.filter(id__gt=last_id)[: options["batch_size"]]):
+            frozen = []
+            for session in batch:
+                attempts = list(session.attempts.all())
+                results = {attempt.position: attempt.is_correct for attempt in attempts}
+                frozen.append((session, items_from_attempts(attempts), results))
+            freeze_sessions(frozen)
+            total += len(batch)
+            last_id = batch[-1].id
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Summarised {total} sessions in {elapsed:.1f}s."))
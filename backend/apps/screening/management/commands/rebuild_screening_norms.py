@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.screening.models import ScreeningNorm, ScreeningSummary
+from apps.screening.norms import score
+from apps.screening.sketch import KLLSketch
+
+
+class Command(BaseCommand):
+    help = "Rebuild the screening age-band norms from stored session summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summaries = ScreeningSummary.objects.values_list(
+            "session__age_band_id", "session__screening_set_id", "session__centre_id", "sound_group_results"
+        ).order_by("session_id")
+
+        # One sketch per centre (sessions without a centre share one), then each
+        # all-centres norm is the merge of its centre sketches.
+        by_centre = {}
+        sessions = 0
+        for age_band_id, set_id, centre_id, results in summaries.iterator(chunk_size=options["chunk_size"]):
+            for sound_group, counts in results.items():
+                by_centre.setdefault((age_band_id, set_id, sound_group, centre_id), KLLSketch()).update(score(counts))
+            sessions += 1
+
+        overall = {}
+        for (age_band_id, set_id, sound_group, _), sketch in by_centre.items():
+            overall.setdefault((age_band_id, set_id, sound_group, None), KLLSketch()).merge(sketch)
+
+        rows = [
+            ScreeningNorm(
+                age_band_id=age_band_id,
+                screening_set_id=set_id,
+                sound_group=sound_group,
+                centre_id=centre_id,
+                sample_size=sketch.count,
+                sketch=sketch.to_dict(),
+            )
+            for sketches in (by_centre, overall)
+            for (age_band_id, set_id, sound_group, centre_id), sketch in sketches.items()
+            if sketches is overall or centre_id is not None
+        ]
+        with transaction.atomic():
+            ScreeningNorm.objects.all().delete()
+            ScreeningNorm.objects.bulk_create(rows, batch_size=500)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} norms from {sessions} sessions in {elapsed:.1f}s."))
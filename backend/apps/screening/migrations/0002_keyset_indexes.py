@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('centres', '0001_initial'),
+        ('screening', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='screeningsession',
+            index=models.Index(fields=['created_by', '-started_at', '-id'], name='screening_sess_user_start_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:18
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('centres', '0001_initial'),
+        ('screening', '0002_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningsession',
+            name='client_key',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='screeningsession',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='screeningsession',
+            constraint=models.UniqueConstraint(fields=('created_by', 'client_key'), name='uniq_screeningsession_client_key'),
+        ),
+    ]
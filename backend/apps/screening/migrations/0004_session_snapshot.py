@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0003_session_client_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningSessionSnapshot',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='screening.screeningsession')),
+                ('detail_body', models.BinaryField()),
+                ('detail_etag', models.CharField(max_length=40)),
+            ],
+        ),
+    ]
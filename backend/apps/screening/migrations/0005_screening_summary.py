@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0004_session_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningSummary',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='screening.screeningsession')),
+                ('correct_count', models.PositiveSmallIntegerField()),
+                ('total_count', models.PositiveSmallIntegerField()),
+                ('sound_group_results', models.JSONField(default=dict)),
+                ('missed_words', models.JSONField(default=list)),
+                ('recommended_focus', models.JSONField(default=list)),
+                ('body', models.BinaryField()),
+                ('etag', models.CharField(max_length=40)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('centres', '0001_initial'),
+        ('screening', '0005_screening_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningsummary',
+            name='percentiles',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.CreateModel(
+            name='ScreeningNorm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sound_group', models.CharField(max_length=16)),
+                ('sample_size', models.PositiveIntegerField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('age_band', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='screening.ageband')),
+                ('centre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='centres.centre')),
+                ('screening_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='screening.screeningset')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('centre__isnull', False)), fields=('age_band', 'screening_set', 'sound_group', 'centre'), name='uniq_screeningnorm_centre'), models.UniqueConstraint(condition=models.Q(('centre__isnull', True)), fields=('age_band', 'screening_set', 'sound_group'), name='uniq_screeningnorm_global')],
+            },
+        ),
+    ]
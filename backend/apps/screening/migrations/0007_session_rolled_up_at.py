@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('centres', '0001_initial'),
+        ('screening', '0006_screening_norms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningsession',
+            name='rolled_up_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='screeningsession',
+            index=models.Index(condition=models.Q(('rolled_up_at__isnull', True), ('submitted_at__isnull', False)), fields=['id'], name='screening_sess_unrolled_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from apps.centres.models import Centre
 from apps.lexicon.models import Word
@@ -43,8 +44,25 @@ class ScreeningSession(models.Model):
     age_band = models.ForeignKey(AgeBand, on_delete=models.PROTECT)
     screening_set = models.ForeignKey(ScreeningSet, on_delete=models.PROTECT)
 
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Offline clients (see apps.sync) supply their own start time and a per-user idempotency key.
+    started_at = models.DateTimeField(default=timezone.now)
     submitted_at = models.DateTimeField(null=True, blank=True)
+    client_key = models.UUIDField(null=True, blank=True, editable=False)
+    # Set by apps.analytics.rollups once the session's attempts are in the centre rollups.
+    rolled_up_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["created_by", "client_key"], name="uniq_screeningsession_client_key"),
+        ]
+        indexes = [
+            models.Index(fields=["created_by", "-started_at", "-id"], name="screening_sess_user_start_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(submitted_at__isnull=False, rolled_up_at__isnull=True),
+                name="screening_sess_unrolled_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Screening {self.id} ({self.age_band})"
@@ -61,3 +79,71 @@ class ScreeningAttempt(models.Model):
             models.UniqueConstraint(fields=["session", "position"], name="uniq_screeningattempt_session_position"),
         ]
         ordering = ["position"]
+
+
+class ScreeningSessionSnapshot(models.Model):
+    """Rendered detail payload of a submitted session, which never changes afterwards."""
+
+    session = models.OneToOneField(ScreeningSession, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    detail_body = models.BinaryField()
+    detail_etag = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f"Snapshot of {self.session_id}"
+
+
+class ScreeningSummary(models.Model):
+    """Results of a submitted session, computed once at submit time.
+
+    ``created_by`` is copied from the session so the summary endpoint is a single
+    primary-key read; ``body`` is the rendered summary payload.
+    """
+
+    session = models.OneToOneField(ScreeningSession, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    correct_count = models.PositiveSmallIntegerField()
+    total_count = models.PositiveSmallIntegerField()
+    # ``{sound_group: {"correct": n, "total": n}}`` over every answered item.
+    sound_group_results = models.JSONField(default=dict)
+    missed_words = models.JSONField(default=list)
+    recommended_focus = models.JSONField(default=list)
+    # ``{sound_group: {"score", "percentile", "sample_size"}}`` against the age-band norms at submit time.
+    percentiles = models.JSONField(default=dict)
+    body = models.BinaryField()
+    etag = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f"Summary of {self.session_id}"
+
+
+class ScreeningNorm(models.Model):
+    """Score distribution for one sound group of a screening set, as a mergeable KLL sketch.
+
+    Rows with a centre cover that centre's sessions; the row without one covers every
+    session and is the norm percentiles are read from.
+    """
+
+    age_band = models.ForeignKey(AgeBand, on_delete=models.CASCADE)
+    screening_set = models.ForeignKey(ScreeningSet, on_delete=models.CASCADE)
+    sound_group = models.CharField(max_length=16)
+    centre = models.ForeignKey(Centre, null=True, blank=True, on_delete=models.CASCADE)
+    sample_size = models.PositiveIntegerField(default=0)
+    sketch = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["age_band", "screening_set", "sound_group", "centre"],
+                condition=models.Q(centre__isnull=False),
+                name="uniq_screeningnorm_centre",
+            ),
+            models.UniqueConstraint(
+                fields=["age_band", "screening_set", "sound_group"],
+                condition=models.Q(centre__isnull=True),
+                name="uniq_screeningnorm_global",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.screening_set} / {self.sound_group} ({self.centre or 'all centres'})"
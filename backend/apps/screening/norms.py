@@ -0,0 +1,100 @@
+"""Age-band norms: how a child's per-sound-group score compares with other children's.
+
+Each ``ScreeningNorm`` row holds a KLL sketch of the scores (share of items
+correct) for one sound group of one screening set, either for one centre or for
+all of them. Submits update both rows in the same transaction, and a session's
+percentiles are read from the all-centres sketch just before its own scores are
+added, then stored with its summary.
+"""
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ScreeningNorm
+from .sketch import KLLSketch
+
+# Below this many earlier sessions a percentile says little, so none is reported.
+NORM_MIN_SAMPLE = 20
+REPORTED_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def score(counts):
+    return round(counts["correct"] / counts["total"], 4)
+
+
+def unranked(sound_group_results):
+    """Scores in the ``record_norms`` shape for a session that has not been added to the norms."""
+    return {
+        sound_group: {"score": score(counts), "percentile": None, "sample_size": None}
+        for sound_group, counts in sound_group_results.items()
+    }
+
+
+def _keys(session, sound_groups):
+    for sound_group in sound_groups:
+        yield session.age_band_id, session.screening_set_id, sound_group, None
+        if session.centre_id:
+            yield session.age_band_id, session.screening_set_id, sound_group, session.centre_id
+
+
+def record_norms(entries):
+    """Add ``[(session, sound_group_results), ...]`` to the norms in order.
+
+    Returns each session's ``{sound_group: {"score", "percentile", "sample_size"}}``,
+    measured against the sessions recorded before it. Must run inside a transaction;
+    the affected norm rows stay locked until it commits.
+    """
+    keys = {key for session, results in entries for key in _keys(session, results)}
+    if not keys:
+        return [{} for _ in entries]
+
+    ScreeningNorm.objects.bulk_create(
+        [
+            ScreeningNorm(age_band_id=age_band_id, screening_set_id=set_id, sound_group=sound_group, centre_id=centre_id)
+            for age_band_id, set_id, sound_group, centre_id in keys
+        ],
+        ignore_conflicts=True,
+    )
+    # Lock in id order so concurrent submits cannot deadlock.
+    rows = (
+        ScreeningNorm.objects.select_for_update()
+        .filter(screening_set_id__in={key[1] for key in keys}, sound_group__in={key[2] for key in keys})
+        .filter(Q(centre__isnull=True) | Q(centre_id__in={key[3] for key in keys if key[3]}))
+        .order_by("id")
+    )
+    norms = {(row.age_band_id, row.screening_set_id, row.sound_group, row.centre_id): row for row in rows}
+    sketches = {key: KLLSketch.from_dict(norms[key].sketch) for key in keys}
+
+    percentiles = []
+    for session, results in entries:
+        session_percentiles = {}
+        for sound_group, counts in results.items():
+            value = score(counts)
+            overall = sketches[(session.age_band_id, session.screening_set_id, sound_group, None)]
+            rank = overall.rank(value) if overall.count >= NORM_MIN_SAMPLE else None
+            session_percentiles[sound_group] = {
+                "score": value,
+                "percentile": round(rank * 100, 1) if rank is not None else None,
+                "sample_size": overall.count,
+            }
+        for key in _keys(session, results):
+            sketches[key].update(score(results[key[2]]))
+        percentiles.append(session_percentiles)
+
+    now = timezone.now()
+    for key, sketch in sketches.items():
+        norms[key].sketch = sketch.to_dict()
+        norms[key].sample_size = sketch.count
+        norms[key].updated_at = now
+    ScreeningNorm.objects.bulk_update([norms[key] for key in sketches], ["sketch", "sample_size", "updated_at"])
+    return percentiles
+
+
+def merged_norms(screening_set_id, centre_ids=None):
+    """``{sound_group: KLLSketch}`` for a screening set, merged over ``centre_ids`` (all centres if ``None``)."""
+    rows = ScreeningNorm.objects.filter(screening_set_id=screening_set_id)
+    rows = rows.filter(centre__isnull=True) if centre_ids is None else rows.filter(centre_id__in=centre_ids)
+    merged = {}
+    for sound_group, sketch in rows.values_list("sound_group", "sketch"):
+        merged.setdefault(sound_group, KLLSketch()).merge(KLLSketch.from_dict(sketch))
+    return merged
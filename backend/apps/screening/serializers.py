@@ -17,6 +17,8 @@ class ScreeningWordSerializer(serializers.Serializer):
     jyutping = serializers.CharField(allow_blank=True)
     meaning = serializers.CharField(allow_blank=True)
     sound_group = serializers.ChoiceField(choices=SoundGroup.choices)
+    image_url = serializers.CharField(allow_blank=True)
+    audio_url = serializers.CharField(allow_blank=True)
 
 
 class ScreeningItemSerializer(serializers.ModelSerializer):
@@ -35,5 +37,8 @@ class ScreeningSessionSerializer(serializers.ModelSerializer):
         fields = ("id", "age_band", "started_at", "submitted_at", "items")
 
     def get_items(self, obj):
+        # Views pass the pre-serialized items of the compiled set (see apps.screening.compiled).
+        if "items_payload" in self.context:
+            return self.context["items_payload"]
         items = obj.screening_set.items.select_related("word").order_by("position")
         return ScreeningItemSerializer(items, many=True).data
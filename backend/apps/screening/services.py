@@ -0,0 +1,124 @@
+from collections import Counter
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.http import etag_for
+
+from .models import ScreeningSession, ScreeningSessionSnapshot, ScreeningSummary
+from .norms import record_norms, unranked
+from .serializers import ScreeningSessionSerializer, ScreeningWordSerializer
+
+
+def summary_payload(session_id, missed_words, percentiles=None):
+    sound_counts = Counter([word["sound_group"] for word in missed_words])
+    recommended = [
+        {"sound_group": sound_group, "count": count}
+        for sound_group, count in sound_counts.most_common(3)
+    ]
+    return {
+        "session_id": session_id,
+        "missed_words": missed_words,
+        "missed_sound_group_counts": sound_counts,
+        "recommended_focus": recommended,
+        "percentiles": percentiles or {},
+    }
+
+
+def build_summary(session, items_payload, results):
+    """Unsaved ``ScreeningSummary`` from serialized items and ``{position: is_correct}`` results.
+
+    The payload is rendered by ``render_summary`` once the norms have given its percentiles.
+    """
+    sound_group_results = {}
+    missed_words = []
+    for item in items_payload:
+        is_correct = results.get(item["position"])
+        if is_correct is None:
+            continue
+        word = item["word"]
+        counts = sound_group_results.setdefault(word["sound_group"], {"correct": 0, "total": 0})
+        counts["total"] += 1
+        counts["correct"] += is_correct
+        if not is_correct:
+            missed_words.append(
+                {
+                    "position": item["position"],
+                    "word_id": word["id"],
+                    "hanzi": word["hanzi"],
+                    "jyutping": word["jyutping"],
+                    "sound_group": word["sound_group"],
+                }
+            )
+
+    return ScreeningSummary(
+        session=session,
+        created_by_id=session.created_by_id,
+        correct_count=sum(counts["correct"] for counts in sound_group_results.values()),
+        total_count=sum(counts["total"] for counts in sound_group_results.values()),
+        sound_group_results=sound_group_results,
+        missed_words=missed_words,
+    )
+
+
+def render_summary(summary, percentiles):
+    payload = summary_payload(summary.session_id, summary.missed_words, percentiles)
+    summary.recommended_focus = payload["recommended_focus"]
+    summary.percentiles = percentiles
+    summary.body = JSONRenderer().render(payload)
+    summary.etag = etag_for(summary.body)
+    return summary
+
+
+def build_snapshot(session, items_payload):
+    body = JSONRenderer().render(ScreeningSessionSerializer(session, context={"items_payload": items_payload}).data)
+    return ScreeningSessionSnapshot(session=session, detail_body=body, detail_etag=etag_for(body))
+
+
+def items_from_attempts(attempts):
+    """Serialized items as the child saw them, from attempts with their words loaded."""
+    return [{"position": attempt.position, "word": ScreeningWordSerializer(attempt.word).data} for attempt in attempts]
+
+
+def freeze_sessions(frozen):
+    """Store snapshots and summaries for ``[(session, items_payload, results), ...]`` and add them to the norms.
+
+    Sessions are locked first, so a session whose summary another submit or backfill
+    already stored is skipped instead of being counted in the norms twice. Returns the
+    summaries stored by this call.
+    """
+    session_ids = [session.id for session, _, _ in frozen]
+    with transaction.atomic():
+        # Lock in id order; a concurrent freeze of the same session waits here and then sees its summary.
+        locked = ScreeningSession.objects.select_for_update().filter(id__in=session_ids).order_by("id")
+        list(locked.values_list("id", flat=True))
+        summarised = set(ScreeningSummary.objects.filter(pk__in=session_ids).values_list("pk", flat=True))
+        pending = [entry for entry in frozen if entry[0].id not in summarised]
+
+        summaries = [build_summary(session, items_payload, results) for session, items_payload, results in pending]
+        percentiles = record_norms([(summary.session, summary.sound_group_results) for summary in summaries])
+        for summary, session_percentiles in zip(summaries, percentiles):
+            render_summary(summary, session_percentiles)
+        ScreeningSessionSnapshot.objects.bulk_create(
+            [build_snapshot(session, items_payload) for session, items_payload, _ in frozen], ignore_conflicts=True
+        )
+        ScreeningSummary.objects.bulk_create(summaries)
+    return summaries
+
+
+def freeze_session(session, items_payload, results):
+    """Store the snapshot and summary of a submitted session, unless they are already stored."""
+    freeze_sessions([(session, items_payload, results)])
+
+
+def render_from_attempts(session):
+    """Unsaved snapshot and summary of a session submitted before they were stored.
+
+    Built from the session's attempts rather than the live set. Nothing is written and
+    the norms are left alone, so the summary has scores but no percentiles;
+    ``backfill_screening_summaries`` freezes such sessions.
+    """
+    attempts = list(session.attempts.select_related("word").order_by("position"))
+    items_payload = items_from_attempts(attempts)
+    summary = build_summary(session, items_payload, {attempt.position: attempt.is_correct for attempt in attempts})
+    return build_snapshot(session, items_payload), render_summary(summary, unranked(summary.sound_group_results))
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .compiled import bump_screening_version
+from .models import AgeBand, ScreeningItem, ScreeningSet
+
+
+@receiver([post_save, post_delete], sender=AgeBand)
+@receiver([post_save, post_delete], sender=ScreeningSet)
+@receiver([post_save, post_delete], sender=ScreeningItem)
+def invalidate_screening_catalogue(sender, **kwargs):
+    transaction.on_commit(bump_screening_version)
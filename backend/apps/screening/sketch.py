@@ -0,0 +1,111 @@
+"""KLL quantile sketch for streaming score distributions.
+
+A sketch keeps a bounded number of samples (a few times ``k``) however many values
+it has seen, answers rank and quantile queries within roughly ``1.7 / k`` of the
+true rank, and two sketches can be merged into one that summarises both streams.
+Sketches round-trip through ``to_dict``/``from_dict`` so they can live in a
+``JSONField``.
+
+See Karnin, Lang and Liberty, "Optimal Quantile Approximation in Streams" (2016).
+"""
+
+import random
+
+DEFAULT_K = 200
+# Each compactor below the top holds two thirds as many items as the one above it.
+CAPACITY_DECAY = 2 / 3
+
+_random = random.Random()
+
+
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, compactors=None, count=0):
+        self.k = k
+        self.compactors = compactors or [[]]
+        self.count = count
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return cls()
+        return cls(k=data["k"], compactors=[list(level) for level in data["compactors"]], count=data["count"])
+
+    def to_dict(self):
+        return {"k": self.k, "count": self.count, "compactors": self.compactors}
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(self.k * CAPACITY_DECAY**depth) + 2
+
+    def _size(self):
+        return sum(len(level) for level in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        # Halve the first full compactor into the level above, keeping every other
+        # sorted item (from a random offset) at twice the weight.
+        for level, items in enumerate(self.compactors):
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items.sort()
+            carry = [items.pop()] if len(items) % 2 else []
+            self.compactors[level + 1].extend(items[_random.getrandbits(1) :: 2])
+            self.compactors[level] = carry
+            if self._size() < self._max_size():
+                break
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        if self._size() >= self._max_size():
+            self._compress()
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        while self._size() >= self._max_size():
+            self._compress()
+        return self
+
+    def _weighted(self):
+        return [(value, 2**level) for level, items in enumerate(self.compactors) for value in items]
+
+    def rank(self, value):
+        """Mid-rank of ``value`` in ``[0, 1]``: the share below it plus half the share equal to it."""
+        below = equal = total = 0
+        for item, weight in self._weighted():
+            total += weight
+            if item < value:
+                below += weight
+            elif item == value:
+                equal += weight
+        if not total:
+            return None
+        return (below + equal / 2) / total
+
+    def quantiles(self, fractions):
+        """Values at each fraction in ``fractions`` (e.g. ``[0.5]`` for the median)."""
+        weighted = sorted(self._weighted())
+        total = sum(weight for _, weight in weighted)
+        if not total:
+            return [None for _ in fractions]
+        results = []
+        for fraction in fractions:
+            target = fraction * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    results.append(value)
+                    break
+            else:
+                results.append(weighted[-1][0])
+        return results
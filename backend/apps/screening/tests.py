@@ -1,3 +1,355 @@
-from django.test import TestCase
+import random
+from bisect import bisect_left, bisect_right
+from unittest import mock
 
-# Create your tests here.
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.centres.models import Centre
+from apps.common.http import IMMUTABLE_CACHE_CONTROL
+from apps.lexicon.models import Word
+
+from . import compiled
+from . import sketch as sketch_module
+from .models import (
+    AgeBand,
+    ScreeningAttempt,
+    ScreeningItem,
+    ScreeningNorm,
+    ScreeningSession,
+    ScreeningSessionSnapshot,
+    ScreeningSet,
+    ScreeningSummary,
+)
+from .norms import NORM_MIN_SAMPLE, record_norms
+from .services import freeze_sessions, items_from_attempts
+from .sketch import KLLSketch
+
+# The sketch promises ranks within about 1.7 / k; allow some slack for an unlucky seed.
+RANK_TOLERANCE = 0.02
+
+
+def exact_rank(values, value):
+    """Mid-rank of ``value`` in sorted ``values``, matching ``KLLSketch.rank``."""
+    below = bisect_left(values, value)
+    equal = bisect_right(values, value) - below
+    return (below + equal / 2) / len(values)
+
+
+class KLLSketchTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sketch_module, "_random", random.Random(1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        generator = random.Random(2)
+        self.values = [round(generator.gauss(0.6, 0.15), 3) for _ in range(20_000)]
+
+    def sketch_of(self, values):
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        return sketch
+
+    def assert_ranks_close(self, sketch, values):
+        ordered = sorted(values)
+        for fraction in (0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99):
+            probe = ordered[int(fraction * len(ordered))]
+            self.assertAlmostEqual(sketch.rank(probe), exact_rank(ordered, probe), delta=RANK_TOLERANCE)
+
+    def test_rank_matches_exact_ranks(self):
+        sketch = self.sketch_of(self.values)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLess(sum(len(level) for level in sketch.compactors), 3 * sketch.k)
+        self.assert_ranks_close(sketch, self.values)
+
+    def test_quantiles_match_exact_quantiles(self):
+        sketch = self.sketch_of(self.values)
+        ordered = sorted(self.values)
+        fractions = (0.1, 0.5, 0.9)
+        for fraction, value in zip(fractions, sketch.quantiles(fractions)):
+            self.assertAlmostEqual(exact_rank(ordered, value), fraction, delta=RANK_TOLERANCE)
+
+    def test_small_sketch_is_exact(self):
+        sketch = self.sketch_of([0.2, 0.4, 0.4, 0.8])
+        self.assertEqual(sketch.rank(0.4), 0.5)
+        self.assertEqual(sketch.rank(0.1), 0)
+        self.assertEqual(sketch.rank(0.9), 1)
+
+    def test_empty_sketch(self):
+        sketch = KLLSketch()
+        self.assertIsNone(sketch.rank(0.5))
+        self.assertEqual(sketch.quantiles([0.5]), [None])
+
+    def test_merge_matches_one_sketch_over_all_values(self):
+        parts = [self.values[:3_000], self.values[3_000:11_000], self.values[11_000:]]
+        merged = KLLSketch()
+        for part in parts:
+            merged.merge(self.sketch_of(part))
+        self.assertEqual(merged.count, len(self.values))
+        self.assertLess(sum(len(level) for level in merged.compactors), 3 * merged.k)
+        self.assert_ranks_close(merged, self.values)
+
+        single = self.sketch_of(self.values)
+        for probe in (0.3, 0.5, 0.6, 0.7, 0.9):
+            self.assertAlmostEqual(merged.rank(probe), single.rank(probe), delta=2 * RANK_TOLERANCE)
+
+    def test_dict_round_trip(self):
+        sketch = self.sketch_of(self.values[:5_000])
+        restored = KLLSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.to_dict(), sketch.to_dict())
+        for probe in (0.3, 0.6, 0.9):
+            self.assertEqual(restored.rank(probe), sketch.rank(probe))
+
+        # A restored sketch keeps accepting values like the original.
+        for value in self.values[5_000:]:
+            restored.update(value)
+        self.assertEqual(restored.count, len(self.values))
+        self.assert_ranks_close(restored, self.values)
+
+    def test_from_empty_dict(self):
+        self.assertEqual(KLLSketch.from_dict({}).count, 0)
+
+
+class RecordNormsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="screener", password="pw")
+        self.north = Centre.objects.create(name="North", code="N")
+        self.south = Centre.objects.create(name="South", code="S")
+        self.age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        self.screening_set = ScreeningSet.objects.create(name="Set", age_band=self.age_band)
+
+    def session(self, centre):
+        return ScreeningSession.objects.create(
+            created_by=self.user, centre=centre, age_band=self.age_band, screening_set=self.screening_set
+        )
+
+    def record(self, entries):
+        with transaction.atomic():
+            return record_norms(entries)
+
+    def norm(self, sound_group, centre):
+        return ScreeningNorm.objects.get(screening_set=self.screening_set, sound_group=sound_group, centre=centre)
+
+    def test_records_per_centre_and_global_rows(self):
+        self.record(
+            [
+                (self.session(self.north), {"k": {"correct": 1, "total": 2}, "s": {"correct": 2, "total": 2}}),
+                (self.session(self.north), {"k": {"correct": 2, "total": 2}}),
+                (self.session(self.south), {"k": {"correct": 0, "total": 2}}),
+                (self.session(None), {"k": {"correct": 1, "total": 4}}),
+            ]
+        )
+
+        self.assertEqual(ScreeningNorm.objects.count(), 5)
+        self.assertEqual(self.norm("k", None).sample_size, 4)
+        self.assertEqual(self.norm("k", self.north).sample_size, 2)
+        self.assertEqual(self.norm("k", self.south).sample_size, 1)
+        self.assertEqual(self.norm("s", None).sample_size, 1)
+        self.assertEqual(self.norm("s", self.north).sample_size, 1)
+        self.assertFalse(ScreeningNorm.objects.filter(sound_group="s", centre=self.south).exists())
+
+        north = KLLSketch.from_dict(self.norm("k", self.north).sketch)
+        self.assertEqual(north.quantiles([0, 1]), [0.5, 1.0])
+        overall = KLLSketch.from_dict(self.norm("k", None).sketch)
+        self.assertEqual(overall.quantiles([0, 0.5, 1]), [0.0, 0.25, 1.0])
+
+    def test_later_calls_add_to_existing_rows(self):
+        self.record([(self.session(self.north), {"k": {"correct": 1, "total": 2}})])
+        self.record([(self.session(self.north), {"k": {"correct": 2, "total": 2}})])
+        self.assertEqual(ScreeningNorm.objects.count(), 2)
+        self.assertEqual(self.norm("k", None).sample_size, 2)
+        self.assertEqual(self.norm("k", self.north).sample_size, 2)
+
+    def test_percentile_is_measured_against_earlier_sessions(self):
+        entries = [
+            (self.session(self.north), {"k": {"correct": correct, "total": NORM_MIN_SAMPLE}})
+            for correct in range(NORM_MIN_SAMPLE)
+        ]
+        results = self.record(entries + [(self.session(self.south), {"k": {"correct": 5, "total": NORM_MIN_SAMPLE}})])
+
+        # Too few earlier sessions for the first ones to get a percentile.
+        self.assertIsNone(results[0]["k"]["percentile"])
+        self.assertEqual(results[0]["k"]["sample_size"], 0)
+        # The last session is ranked against all of the earlier ones, whatever their centre.
+        last = results[-1]["k"]
+        self.assertEqual(last["sample_size"], NORM_MIN_SAMPLE)
+        self.assertEqual(last["score"], 0.25)
+        self.assertEqual(last["percentile"], 27.5)
+
+
+class ScreeningCatalogueTests(TestCase):
+    url = "/api/screening/sessions/"
+
+    def setUp(self):
+        cache.clear()
+        self.north = Centre.objects.create(name="North", code="N")
+        self.south = Centre.objects.create(name="South", code="S")
+        self.age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        self.home = Word.objects.create(hanzi="家", jyutping="gaa1")
+        self.global_set = self.screening_set(None, self.home)
+        self.north_set = self.screening_set(self.north, self.home)
+
+    def screening_set(self, centre, *words):
+        screening_set = ScreeningSet.objects.create(name="Set", age_band=self.age_band, centre=centre)
+        for position, word in enumerate(words, start=1):
+            ScreeningItem.objects.create(screening_set=screening_set, word=word, position=position)
+        return screening_set
+
+    def start(self, centre):
+        user = get_user_model().objects.create_user(f"parent-{get_user_model().objects.count()}")
+        user.profile.centre = centre
+        user.profile.save()
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(self.url, {"age_band_id": self.age_band.id, "include_session": True}, format="json")
+
+    def started_set(self, centre):
+        response = self.start(centre)
+        self.assertEqual(response.status_code, 201)
+        return ScreeningSession.objects.get(pk=response.json()["id"]).screening_set_id
+
+    def test_centre_set_is_preferred_over_the_global_set(self):
+        self.assertEqual(self.started_set(self.north), self.north_set.id)
+        self.assertEqual(self.started_set(self.south), self.global_set.id)
+        self.assertEqual(self.started_set(None), self.global_set.id)
+
+    def test_inactive_centre_set_falls_back_to_the_global_set(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.north_set.is_active = False
+            self.north_set.save()
+        self.assertEqual(self.started_set(self.north), self.global_set.id)
+
+    def test_centre_set_without_items_is_refused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.screening_set(self.south)
+
+        response = self.start(self.south)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Screening set has no items.")
+
+    def test_item_changes_recompile_the_catalogue(self):
+        self.start(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            add = Word.objects.create(hanzi="加")
+            ScreeningItem.objects.create(screening_set=self.global_set, word=add, position=2)
+
+        items = self.start(None).json()["items"]
+        self.assertEqual([item["word"]["hanzi"] for item in items], ["家", "加"])
+
+    def test_word_changes_only_reread_the_words(self):
+        catalogue = compiled.get_screening_catalogue()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.home.meaning = "home"
+            self.home.save()
+
+        with self.assertNumQueries(1):
+            updated = compiled.get_screening_catalogue()
+        self.assertEqual(updated.screening_set(self.global_set.id).items_payload[0]["word"]["meaning"], "home")
+        self.assertIs(updated._resolved, catalogue._resolved)
+
+    def test_unchanged_catalogue_needs_one_cache_read_and_no_queries(self):
+        catalogue = compiled.get_screening_catalogue()
+        with mock.patch.object(compiled, "cache", wraps=cache) as wrapped, self.assertNumQueries(0):
+            self.assertIs(compiled.get_screening_catalogue(), catalogue)
+        self.assertEqual([call[0] for call in wrapped.method_calls], ["get_many"])
+
+
+class LegacySessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        screening_set = ScreeningSet.objects.create(name="Set", age_band=age_band)
+        home = Word.objects.create(hanzi="家", jyutping="gaa1", sound_group="INITIAL")
+        ScreeningItem.objects.create(screening_set=screening_set, word=home, position=1)
+        # Submitted before snapshots and summaries were stored.
+        self.session = ScreeningSession.objects.create(
+            created_by=self.user, age_band=age_band, screening_set=screening_set, submitted_at=timezone.now()
+        )
+        ScreeningAttempt.objects.create(session=self.session, word=home, position=1, is_correct=False)
+        url = f"/api/screening/sessions/{self.session.id}/"
+        self.urls = [url, f"{url}summary/"]
+
+    def test_reads_store_nothing_until_backfilled(self):
+        rendered = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+            rendered.append(response.json())
+        self.assertEqual([word["hanzi"] for word in rendered[1]["missed_words"]], ["家"])
+        unranked = {"INITIAL": {"score": 0.0, "percentile": None, "sample_size": None}}
+        self.assertEqual(rendered[1]["percentiles"], unranked)
+        self.assertFalse(ScreeningSessionSnapshot.objects.exists())
+        self.assertFalse(ScreeningSummary.objects.exists())
+        self.assertFalse(ScreeningNorm.objects.exists())
+
+        call_command("backfill_screening_summaries", stdout=StringIO())
+
+        frozen = [self.client.get(url) for url in self.urls]
+        self.assertEqual([response["Cache-Control"] for response in frozen], [IMMUTABLE_CACHE_CONTROL] * 2)
+        self.assertEqual(frozen[0].json(), rendered[0])
+        self.assertEqual(frozen[1].json()["percentiles"]["INITIAL"]["sample_size"], 0)
+        self.assertEqual(ScreeningNorm.objects.get(centre=None).sample_size, 1)
+
+    def test_freezing_twice_counts_the_session_once(self):
+        attempts = list(self.session.attempts.select_related("word"))
+        results = {attempt.position: attempt.is_correct for attempt in attempts}
+        entry = (self.session, items_from_attempts(attempts), results)
+
+        self.assertEqual(len(freeze_sessions([entry])), 1)
+        self.assertEqual(freeze_sessions([entry]), [])
+
+        self.assertEqual(ScreeningNorm.objects.get(centre=None).sample_size, 1)
+        self.assertEqual(ScreeningSummary.objects.count(), 1)
+
+
+class ScreeningSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        screening_set = ScreeningSet.objects.create(name="Set", age_band=age_band)
+        words = [("家", "INITIAL"), ("加", "INITIAL"), ("街", "FINAL"), ("雞", "VOWEL"), ("狗", "VOWEL"), ("貓", "DIPHTHONG")]
+        for position, (hanzi, sound_group) in enumerate(words, start=1):
+            word = Word.objects.create(hanzi=hanzi, jyutping="gaa1", sound_group=sound_group)
+            ScreeningItem.objects.create(screening_set=screening_set, word=word, position=position)
+        session = ScreeningSession.objects.create(created_by=self.user, age_band=age_band, screening_set=screening_set)
+        self.url = f"/api/screening/sessions/{session.id}/"
+
+    def test_summary_is_rendered_at_submit_and_read_by_primary_key(self):
+        missed = {1, 2, 3, 4, 6}
+        answers = [{"position": position, "is_correct": position not in missed} for position in range(1, 7)]
+        self.assertEqual(self.client.post(f"{self.url}submit/", {"answers": answers}, format="json").status_code, 200)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{self.url}summary/")
+        summary = response.json()
+
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual([word["hanzi"] for word in summary["missed_words"]], ["家", "加", "街", "雞", "貓"])
+        self.assertEqual(summary["missed_sound_group_counts"], {"INITIAL": 2, "FINAL": 1, "VOWEL": 1, "DIPHTHONG": 1})
+        # Most-missed first, then first seen, and at most three groups.
+        self.assertEqual(
+            [(focus["sound_group"], focus["count"]) for focus in summary["recommended_focus"]],
+            [("INITIAL", 2), ("FINAL", 1), ("VOWEL", 1)],
+        )
+        self.assertEqual(summary["percentiles"]["VOWEL"]["score"], 0.5)
+        self.assertEqual(self.client.get(f"{self.url}summary/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_unsubmitted_session_has_an_empty_summary(self):
+        summary = self.client.get(f"{self.url}summary/").json()
+        self.assertEqual((summary["missed_words"], summary["recommended_focus"]), ([], []))
+        self.assertFalse(ScreeningSummary.objects.exists())
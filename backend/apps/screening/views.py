@@ -1,15 +1,20 @@
-from collections import Counter
-
 from django.db import transaction
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.lexicon.models import Word
+from apps.accounts.permissions import IsStaffOrAdmin
+from apps.analytics.models import AttemptSource
+from apps.analytics.services import record_word_attempts
+from apps.common.http import IMMUTABLE_CACHE_CONTROL, boolean_param, rendered_json_response
+from apps.common.idempotency import idempotent
 
-from .models import AgeBand, ScreeningAttempt, ScreeningSession, ScreeningSet
+from .compiled import get_screening_catalogue
+from .norms import REPORTED_QUANTILES, merged_norms
+from .models import AgeBand, ScreeningAttempt, ScreeningSession, ScreeningSessionSnapshot, ScreeningSummary
 from .serializers import AgeBandSerializer, ScreeningSessionSerializer
+from .services import freeze_session, render_from_attempts, summary_payload
 
 
 class AgeBandListView(APIView):
@@ -23,34 +28,39 @@ class AgeBandListView(APIView):
 class ScreeningSessionCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
+        include_session = boolean_param(request, "include_session")
         age_band_id = request.data.get("age_band_id")
         if not age_band_id:
             return Response({"detail": "age_band_id is required."}, status=status.HTTP_400_BAD_REQUEST)
 
+        catalogue = get_screening_catalogue()
         try:
-            age_band = AgeBand.objects.get(pk=age_band_id, is_active=True)
-        except AgeBand.DoesNotExist:
+            age_band_id = int(age_band_id)
+        except (TypeError, ValueError):
+            age_band_id = None
+        if age_band_id not in catalogue.active_age_band_ids:
             return Response({"detail": "Age band not found."}, status=status.HTTP_404_NOT_FOUND)
 
         centre_id = getattr(request.user.profile, "centre_id", None)
-
-        screening_set = (
-            ScreeningSet.objects.filter(age_band=age_band, is_active=True, centre_id=centre_id).first()
-            or ScreeningSet.objects.filter(age_band=age_band, is_active=True, centre__isnull=True).first()
-        )
+        screening_set = catalogue.resolve(age_band_id, centre_id)
         if not screening_set:
             return Response({"detail": "No active screening set available."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not screening_set.items.exists():
+        if not screening_set.word_ids:
             return Response({"detail": "Screening set has no items."}, status=status.HTTP_400_BAD_REQUEST)
 
         session = ScreeningSession.objects.create(
             created_by=request.user,
             centre_id=centre_id,
-            age_band=age_band,
-            screening_set=screening_set,
+            age_band_id=age_band_id,
+            screening_set_id=screening_set.id,
         )
+        if include_session:
+            return Response(
+                ScreeningSessionSerializer(session, context={"items_payload": screening_set.items_payload}).data,
+                status=status.HTTP_201_CREATED,
+            )
         return Response({"id": session.id}, status=status.HTTP_201_CREATED)
 
 
@@ -58,60 +68,85 @@ class ScreeningSessionDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, session_id):
+        frozen = (
+            ScreeningSessionSnapshot.objects.filter(session_id=session_id)
+            .values_list("session__created_by_id", "detail_body", "detail_etag")
+            .first()
+        )
+        if frozen is not None:
+            created_by_id, body, etag = frozen
+            if created_by_id != request.user.id:
+                return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
+            return rendered_json_response(request, bytes(body), etag, cache_control=IMMUTABLE_CACHE_CONTROL)
+
         try:
-            session = ScreeningSession.objects.select_related("age_band", "created_by", "screening_set").get(pk=session_id)
+            session = ScreeningSession.objects.get(pk=session_id)
         except ScreeningSession.DoesNotExist:
             return Response({"detail": "Session not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if session.created_by_id != request.user.id:
             return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
 
-        return Response(ScreeningSessionSerializer(session).data)
+        if session.submitted_at:
+            # Submitted before snapshots existed and not yet backfilled: render it without storing anything.
+            snapshot, _ = render_from_attempts(session)
+            return rendered_json_response(request, snapshot.detail_body, snapshot.detail_etag)
+        screening_set = get_screening_catalogue().screening_set(session.screening_set_id)
+        return Response(ScreeningSessionSerializer(session, context={"items_payload": screening_set.items_payload}).data)
 
 
 class ScreeningSessionSubmitView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request, session_id):
         try:
-            session = ScreeningSession.objects.select_related("screening_set", "created_by").get(pk=session_id)
+            session = ScreeningSession.objects.get(pk=session_id)
         except ScreeningSession.DoesNotExist:
             return Response({"detail": "Session not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if session.created_by_id != request.user.id:
             return Response({"detail": "You do not have access to this session."}, status=status.HTTP_403_FORBIDDEN)
-        if session.submitted_at:
-            return Response({"detail": "Session has already been submitted."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Claim the session before doing any work; see PracticeSessionSubmitView.
+        submitted_at = timezone.now()
+        claimed = ScreeningSession.objects.filter(pk=session.pk, submitted_at__isnull=True).update(submitted_at=submitted_at)
+        if not claimed:
+            return Response({"detail": "Session has already been submitted."}, status=status.HTTP_409_CONFLICT)
+        session.submitted_at = submitted_at
 
         answers = request.data.get("answers", [])
-        expected_items = list(session.screening_set.items.select_related("word").order_by("position"))
-        expected_positions = {item.position for item in expected_items}
+        screening_set = get_screening_catalogue().screening_set(session.screening_set_id)
+        expected_items = screening_set.word_ids
         answer_map = {entry.get("position"): entry for entry in answers}
 
-        if set(answer_map.keys()) != expected_positions:
+        if set(answer_map.keys()) != set(expected_items):
+            transaction.set_rollback(True)
             return Response(
                 {"detail": "All positions must be answered exactly once."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         attempts = []
-        for item in expected_items:
-            answer = answer_map[item.position]
+        for position, word_id in expected_items.items():
+            answer = answer_map[position]
             if "is_correct" not in answer:
-                return Response({"detail": f"Missing is_correct for position {item.position}."}, status=status.HTTP_400_BAD_REQUEST)
+                transaction.set_rollback(True)
+                return Response({"detail": f"Missing is_correct for position {position}."}, status=status.HTTP_400_BAD_REQUEST)
             attempts.append(
                 ScreeningAttempt(
                     session=session,
-                    word=item.word,
-                    position=item.position,
+                    word_id=word_id,
+                    position=position,
                     is_correct=bool(answer["is_correct"]),
                 )
             )
 
         ScreeningAttempt.objects.bulk_create(attempts)
-        session.submitted_at = timezone.now()
-        session.save(update_fields=["submitted_at"])
+        results = {attempt.position: attempt.is_correct for attempt in attempts}
+        freeze_session(session, screening_set.items_payload, results)
+        record_word_attempts(request.user.id, AttemptSource.SCREENING, attempts, session.submitted_at)
 
         return Response({"detail": "Screening submitted."})
 
@@ -120,36 +155,53 @@ class ScreeningSessionSummaryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, session_id):
+        frozen = (
+            ScreeningSummary.objects.filter(pk=session_id, created_by=request.user).values_list("body", "etag").first()
+        )
+        if frozen is not None:
+            body, etag = frozen
+            return rendered_json_response(request, bytes(body), etag, cache_control=IMMUTABLE_CACHE_CONTROL)
+
         try:
             session = ScreeningSession.objects.get(pk=session_id, created_by=request.user)
         except ScreeningSession.DoesNotExist:
             return Response({"detail": "Session not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        attempts = session.attempts.select_related("word").order_by("position")
-        missed = [attempt for attempt in attempts if not attempt.is_correct]
+        if session.submitted_at:
+            # Submitted before summaries existed and not yet backfilled: render it without storing anything.
+            _, summary = render_from_attempts(session)
+            return rendered_json_response(request, summary.body, summary.etag)
+        # Nothing has been answered yet.
+        return Response(summary_payload(session.id, []))
 
-        missed_words = [
-            {
-                "position": attempt.position,
-                "word_id": attempt.word_id,
-                "hanzi": attempt.word.hanzi,
-                "jyutping": attempt.word.jyutping,
-                "sound_group": attempt.word.sound_group,
-            }
-            for attempt in missed
-        ]
 
-        sound_counts = Counter([attempt.word.sound_group for attempt in missed])
-        recommended = [
-            {"sound_group": sound_group, "count": count}
-            for sound_group, count in sound_counts.most_common(3)
-        ]
+class ScreeningNormsView(APIView):
+    """Score quantiles per sound group for a screening set, over all centres or merged over ``centre_id``."""
 
-        return Response(
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request):
+        try:
+            screening_set_id = int(request.query_params.get("screening_set_id", ""))
+            centre_ids = [int(value) for value in request.query_params.getlist("centre_id")] or None
+        except ValueError:
+            return Response(
+                {"detail": "screening_set_id and centre_id must be integers."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not request.user.is_superuser and centre_ids and set(centre_ids) != {request.user.profile.centre_id}:
+            return Response({"detail": "You can only view your own centre's norms."}, status=status.HTTP_403_FORBIDDEN)
+
+        norms = merged_norms(screening_set_id, centre_ids)
+        data = [
             {
-                "session_id": session.id,
-                "missed_words": missed_words,
-                "missed_sound_group_counts": sound_counts,
-                "recommended_focus": recommended,
+                "sound_group": sound_group,
+                "sample_size": sketch.count,
+                "quantiles": {
+                    f"p{round(fraction * 100)}": value
+                    for fraction, value in zip(REPORTED_QUANTILES, sketch.quantiles(REPORTED_QUANTILES))
+                },
             }
-        )
+            for sound_group, sketch in sorted(norms.items())
+        ]
+        return Response({"screening_set_id": screening_set_id, "centre_ids": centre_ids, "results": data})
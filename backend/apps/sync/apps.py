@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.sync"
+    label = "sync"
+    verbose_name = "Offline sync"
@@ -0,0 +1,289 @@
+"""Bulk upload of sessions completed offline.
+
+Each uploaded session carries a client-generated ``client_key`` (a UUID) that is
+unique per user, so a client can resend a whole batch after a dropped connection
+and only the sessions the server has not seen are written. Valid sessions are
+written in one transaction with a handful of ``bulk_create`` calls.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.analytics.models import AttemptSource
+from apps.analytics.services import record_word_attempt_batches
+from apps.lexicon.models import Word
+from apps.practice.models import PracticeAttempt, PracticeItem, PracticeSession, PracticeSessionType
+from apps.practice.prebuilt import enqueue_session_build
+from apps.practice.services import record_review_batches
+from apps.screening.models import ScreeningAttempt, ScreeningItem, ScreeningSession, ScreeningSet
+from apps.screening.services import freeze_sessions, items_from_attempts
+
+MAX_SYNC_SESSIONS = 100
+# Stored positions and planned_item_count are small integers; real sessions are far shorter than this.
+MAX_SYNC_ANSWERS = 500
+MAX_POSITION = 32767
+# Device clocks drift; submissions stamped slightly ahead of the server are accepted.
+CLOCK_SKEW = timedelta(minutes=5)
+PRACTICE = "practice"
+SCREENING = "screening"
+
+
+class InvalidSession(Exception):
+    pass
+
+
+def _parse_timestamp(value, field):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise InvalidSession(f"{field} must be an ISO 8601 datetime.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_answers(answers, with_words):
+    if not isinstance(answers, list) or not answers:
+        raise InvalidSession("answers must be a non-empty list.")
+    if len(answers) > MAX_SYNC_ANSWERS:
+        raise InvalidSession(f"A session may have at most {MAX_SYNC_ANSWERS} answers.")
+    parsed = {}
+    for answer in answers:
+        try:
+            position = int(answer["position"])
+            word_id = int(answer["word_id"]) if with_words else None
+            is_correct = bool(answer["is_correct"])
+        except (KeyError, TypeError, ValueError):
+            fields = "position, word_id and is_correct" if with_words else "position and is_correct"
+            raise InvalidSession(f"Each answer needs {fields}.")
+        if not 0 <= position <= MAX_POSITION:
+            raise InvalidSession(f"Position {position} is out of range.")
+        if position in parsed:
+            raise InvalidSession(f"Position {position} is answered more than once.")
+        parsed[position] = (word_id, is_correct)
+    return dict(sorted(parsed.items()))
+
+
+def _parse_session(entry):
+    """Validate the shape of one uploaded session; lookups against the database happen in bulk later."""
+    kind = entry.get("kind")
+    if kind not in (PRACTICE, SCREENING):
+        raise InvalidSession("kind must be practice or screening.")
+
+    submitted_at = _parse_timestamp(entry.get("submitted_at"), "submitted_at")
+    started_at = _parse_timestamp(entry["started_at"], "started_at") if entry.get("started_at") else submitted_at
+    if submitted_at > timezone.now() + CLOCK_SKEW:
+        raise InvalidSession("submitted_at must not be in the future.")
+    if started_at > submitted_at:
+        raise InvalidSession("started_at must not be after submitted_at.")
+
+    session = {
+        "kind": kind,
+        "started_at": started_at,
+        "submitted_at": submitted_at,
+        "answers": _parse_answers(entry.get("answers"), with_words=kind == PRACTICE),
+    }
+    if kind == PRACTICE:
+        session_type = entry.get("session_type", PracticeSessionType.DAILY)
+        if session_type not in PracticeSessionType.values:
+            raise InvalidSession("session_type is not valid.")
+        session["session_type"] = session_type
+        session["child_display_name"] = str(entry.get("child_display_name", ""))[:100]
+    else:
+        try:
+            session["screening_set_id"] = int(entry["screening_set_id"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidSession("screening_set_id is required.")
+    return session
+
+
+def _check_against_lexicon(parsed, centre_id):
+    """Validate word ids and screening sets for all parsed sessions with three queries.
+
+    Screening sets must be ones the online create path could start: active, in an
+    active age band, and global or belonging to the user's centre.
+    """
+    word_ids = {
+        word_id
+        for session in parsed.values()
+        if session["kind"] == PRACTICE
+        for word_id, _ in session["answers"].values()
+    }
+    known_words = set(Word.objects.filter(id__in=word_ids).values_list("id", flat=True))
+
+    set_ids = {session["screening_set_id"] for session in parsed.values() if session["kind"] == SCREENING}
+    sets = ScreeningSet.objects.filter(
+        Q(centre_id=centre_id) | Q(centre__isnull=True),
+        is_active=True,
+        age_band__is_active=True,
+    ).in_bulk(set_ids)
+    set_items = defaultdict(dict)
+    for set_id, position, word_id in ScreeningItem.objects.filter(screening_set_id__in=set_ids).values_list(
+        "screening_set_id", "position", "word_id"
+    ):
+        set_items[set_id][position] = word_id
+
+    errors = {}
+    for key, session in parsed.items():
+        if session["kind"] == PRACTICE:
+            unknown = {word_id for word_id, _ in session["answers"].values()} - known_words
+            if unknown:
+                errors[key] = f"Unknown word ids: {sorted(unknown)}."
+            continue
+
+        screening_set = sets.get(session["screening_set_id"])
+        if screening_set is None:
+            errors[key] = "Screening set not found."
+        elif set(session["answers"]) != set(set_items[screening_set.id]):
+            errors[key] = "All positions must be answered exactly once."
+        else:
+            session["age_band_id"] = screening_set.age_band_id
+            session["answers"] = {
+                position: (set_items[screening_set.id][position], is_correct)
+                for position, (_, is_correct) in session["answers"].items()
+            }
+    return errors
+
+
+def _existing_sessions(user, keys):
+    existing = dict(PracticeSession.objects.filter(created_by=user, client_key__in=keys).values_list("client_key", "id"))
+    existing.update(ScreeningSession.objects.filter(created_by=user, client_key__in=keys).values_list("client_key", "id"))
+    return existing
+
+
+def _write_sessions(user, parsed):
+    """Insert sessions, items and attempts in bulk and update the per-user rollups."""
+    centre_id = getattr(getattr(user, "profile", None), "centre_id", None)
+    practice_keys = [key for key, session in parsed.items() if session["kind"] == PRACTICE]
+    screening_keys = [key for key, session in parsed.items() if session["kind"] == SCREENING]
+
+    practice_sessions = PracticeSession.objects.bulk_create(
+        [
+            PracticeSession(
+                created_by=user,
+                centre_id=centre_id,
+                client_key=key,
+                session_type=parsed[key]["session_type"],
+                child_display_name=parsed[key]["child_display_name"],
+                planned_item_count=len(parsed[key]["answers"]),
+                started_at=parsed[key]["started_at"],
+                submitted_at=parsed[key]["submitted_at"],
+            )
+            for key in practice_keys
+        ]
+    )
+    screening_sessions = ScreeningSession.objects.bulk_create(
+        [
+            ScreeningSession(
+                created_by=user,
+                centre_id=centre_id,
+                client_key=key,
+                age_band_id=parsed[key]["age_band_id"],
+                screening_set_id=parsed[key]["screening_set_id"],
+                started_at=parsed[key]["started_at"],
+                submitted_at=parsed[key]["submitted_at"],
+            )
+            for key in screening_keys
+        ]
+    )
+
+    items, practice_attempts, screening_attempts = [], defaultdict(list), defaultdict(list)
+    for session in practice_sessions:
+        for position, (word_id, is_correct) in parsed[session.client_key]["answers"].items():
+            items.append(PracticeItem(session=session, word_id=word_id, position=position))
+            practice_attempts[session].append(
+                PracticeAttempt(session=session, word_id=word_id, position=position, is_correct=is_correct)
+            )
+    for session in screening_sessions:
+        for position, (word_id, is_correct) in parsed[session.client_key]["answers"].items():
+            screening_attempts[session].append(
+                ScreeningAttempt(session=session, word_id=word_id, position=position, is_correct=is_correct)
+            )
+
+    PracticeItem.objects.bulk_create(items)
+    PracticeAttempt.objects.bulk_create([attempt for attempts in practice_attempts.values() for attempt in attempts])
+    ScreeningAttempt.objects.bulk_create([attempt for attempts in screening_attempts.values() for attempt in attempts])
+
+    # Replay in submission order so the spaced-repetition state matches what online submits would produce.
+    practice_batches = [
+        (session.submitted_at, practice_attempts[session])
+        for session in sorted(practice_sessions, key=lambda session: session.submitted_at)
+    ]
+    screening_batches = [(session.submitted_at, screening_attempts[session]) for session in screening_sessions]
+    if practice_batches:
+        record_review_batches(user.id, practice_batches)
+    record_word_attempt_batches(user.id, AttemptSource.PRACTICE, practice_batches)
+    record_word_attempt_batches(user.id, AttemptSource.SCREENING, screening_batches)
+    if screening_sessions:
+        words = Word.objects.in_bulk({attempt.word_id for attempts in screening_attempts.values() for attempt in attempts})
+        frozen = []
+        for session in screening_sessions:
+            attempts = sorted(screening_attempts[session], key=lambda attempt: attempt.position)
+            for attempt in attempts:
+                attempt.word = words[attempt.word_id]
+            results = {attempt.position: attempt.is_correct for attempt in attempts}
+            frozen.append((session, items_from_attempts(attempts), results))
+        freeze_sessions(frozen)
+    if practice_sessions:
+        enqueue_session_build(user.id)
+
+    return {session.client_key: session.id for session in [*practice_sessions, *screening_sessions]}
+
+
+def sync_sessions(user, entries):
+    """Write uploaded sessions and return one result per entry, in order.
+
+    Results carry the session ``kind`` and ``status`` ``created``, ``duplicate`` (already
+    synced; ``id`` is the stored session) or ``invalid`` (with ``detail``). Invalid sessions do not block
+    the valid ones.
+    """
+    results = []
+    parsed = {}
+    for entry in entries:
+        client_key = entry.get("client_key") if isinstance(entry, dict) else None
+        try:
+            if not isinstance(entry, dict):
+                raise InvalidSession("Each session must be an object.")
+            try:
+                key = uuid.UUID(str(client_key))
+            except ValueError:
+                raise InvalidSession("client_key must be a UUID.")
+            if key not in parsed:
+                parsed[key] = _parse_session(entry)
+            results.append({"client_key": str(key), "key": key})
+        except InvalidSession as exc:
+            results.append({"client_key": client_key, "status": "invalid", "detail": str(exc)})
+
+    errors = _check_against_lexicon(parsed, getattr(getattr(user, "profile", None), "centre_id", None))
+    for retry in (False, True):
+        existing = _existing_sessions(user, list(parsed))
+        pending = {key: session for key, session in parsed.items() if key not in existing and key not in errors}
+        try:
+            with transaction.atomic():
+                created = _write_sessions(user, pending) if pending else {}
+            break
+        except IntegrityError:
+            # A concurrent sync stored some of the same client keys first; retry once, treating them as duplicates.
+            if retry:
+                raise
+
+    stored = {**existing, **created}
+    reported = set()
+    for result in results:
+        key = result.pop("key", None)
+        if key is None:
+            continue
+        result["kind"] = parsed[key]["kind"]
+        if key in errors:
+            result.update(status="invalid", detail=errors[key])
+        elif key in created and key not in reported:
+            result.update(status="created", id=created[key])
+        else:
+            result.update(status="duplicate", id=stored[key])
+        reported.add(key)
+    return results
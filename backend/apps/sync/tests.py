@@ -0,0 +1,112 @@
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics.models import UserWordStats
+from apps.lexicon.models import Word
+from apps.practice.models import PracticeAttempt, PracticeSession, WordMemoryState
+from apps.screening.models import AgeBand, ScreeningItem, ScreeningSession, ScreeningSet
+
+from .services import MAX_SYNC_ANSWERS
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("parent", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.home, self.add = Word.objects.create(hanzi="家"), Word.objects.create(hanzi="加")
+        age_band = AgeBand.objects.create(label="3-4", min_months=36, max_months=48)
+        self.screening_set = ScreeningSet.objects.create(name="Set", age_band=age_band)
+        ScreeningItem.objects.create(screening_set=self.screening_set, word=self.home, position=1)
+        ScreeningItem.objects.create(screening_set=self.screening_set, word=self.add, position=2)
+
+    def practice(self, submitted_at, *answers, **fields):
+        return {
+            "client_key": str(uuid.uuid4()),
+            "kind": "practice",
+            "submitted_at": submitted_at.isoformat(),
+            "answers": [
+                {"position": position, "word_id": word.id, "is_correct": is_correct}
+                for position, (word, is_correct) in enumerate(answers, start=1)
+            ],
+            **fields,
+        }
+
+    def sync(self, *sessions):
+        response = self.client.post("/api/sync/", {"sessions": list(sessions)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_resent_sessions_are_duplicates(self):
+        entry = self.practice(timezone.now(), (self.home, True))
+        first = self.sync(entry, entry)
+        self.assertEqual([result["status"] for result in first], ["created", "duplicate"])
+        self.assertEqual(first[1]["id"], first[0]["id"])
+
+        again = self.sync(entry)
+        self.assertEqual((again[0]["status"], again[0]["id"]), ("duplicate", first[0]["id"]))
+        self.assertEqual(PracticeSession.objects.count(), 1)
+
+    def test_invalid_sessions_do_not_block_valid_ones(self):
+        now = timezone.now()
+        screening = {
+            "client_key": str(uuid.uuid4()),
+            "kind": "screening",
+            "screening_set_id": self.screening_set.id,
+            "submitted_at": now.isoformat(),
+            "answers": [{"position": 1, "is_correct": True}, {"position": 2, "is_correct": False}],
+        }
+        results = self.sync(
+            self.practice(now, (self.home, True)),
+            {"client_key": "not-a-uuid", "kind": "practice"},
+            self.practice(now + timedelta(days=1), (self.home, True)),
+            self.practice(now, (self.home, True), started_at=(now + timedelta(minutes=1)).isoformat()),
+            {**self.practice(now, (self.home, True)), "answers": [{"position": 1, "word_id": 0, "is_correct": True}]},
+            screening,
+        )
+
+        self.assertEqual(
+            [result["status"] for result in results], ["created", "invalid", "invalid", "invalid", "invalid", "created"]
+        )
+        self.assertIn("future", results[2]["detail"])
+        self.assertIn("started_at", results[3]["detail"])
+        self.assertIn("Unknown word ids", results[4]["detail"])
+        self.assertEqual(PracticeSession.objects.count(), 1)
+        self.assertEqual(ScreeningSession.objects.get().summary.session_id, results[5]["id"])
+
+    def test_oversized_sessions_are_invalid(self):
+        oversized = self.practice(timezone.now(), *[(self.home, True)] * (MAX_SYNC_ANSWERS + 1))
+        far_position = self.practice(timezone.now(), (self.home, True))
+        far_position["answers"][0]["position"] = 40_000
+
+        results = self.sync(oversized, far_position)
+
+        self.assertEqual([result["status"] for result in results], ["invalid", "invalid"])
+        self.assertIn(str(MAX_SYNC_ANSWERS), results[0]["detail"])
+        self.assertFalse(PracticeAttempt.objects.exists())
+
+    def test_replay_matches_submission_order_in_one_batch(self):
+        now = timezone.now()
+        earlier, later = now - timedelta(days=2), now - timedelta(days=1)
+        results = self.sync(
+            self.practice(later, (self.home, False), (self.add, True)),
+            self.practice(earlier, (self.home, True)),
+        )
+        self.assertEqual([result["status"] for result in results], ["created", "created"])
+
+        # The later miss wins over the earlier hit, whatever order the client sent them in.
+        home = WordMemoryState.objects.get(user=self.user, word=self.home)
+        self.assertEqual((home.box, home.review_count, home.last_missed_at), (1, 2, later))
+        stats = UserWordStats.objects.get(user=self.user, word=self.home)
+        self.assertEqual((stats.attempts, stats.misses, stats.last_seen_at), (2, 1, later))
+
+        entries = [self.practice(now - timedelta(hours=hours), (self.add, True)) for hours in range(1, 6)]
+        # Existence and word checks, the inserts, one memory read and upsert, two rollup upserts, the build request.
+        with self.assertNumQueries(13):
+            self.sync(*entries)
+        self.assertEqual(WordMemoryState.objects.get(user=self.user, word=self.add).review_count, 6)
@@ -0,0 +1,21 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .services import MAX_SYNC_SESSIONS, sync_sessions
+
+
+class SyncView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        sessions = request.data.get("sessions")
+        if not isinstance(sessions, list) or not sessions:
+            return Response({"detail": "sessions must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(sessions) > MAX_SYNC_SESSIONS:
+            return Response(
+                {"detail": f"At most {MAX_SYNC_SESSIONS} sessions may be synced at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({"results": sync_sessions(request.user, sessions)})
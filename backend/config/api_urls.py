@@ -5,5 +5,6 @@ urlpatterns = [
     path("", include("apps.lexicon.api_urls")),
     path("", include("apps.screening.api_urls")),
     path("", include("apps.practice.api_urls")),
+    path("", include("apps.sync.api_urls")),
     path("", include("apps.accounts.staff_api_urls")),
 ]
@@ -9,5 +9,10 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",  # noqa: F405
+        # Writers queue for the database lock up front instead of failing with "database is locked"
+        # when two transactions try to upgrade from read to write at once.
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        # A file-backed test database lets concurrency tests use several connections.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},  # noqa: F405
     }
 }
@@ -1,6 +1,8 @@
 import os
 from urllib.parse import urlparse
 
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *  # noqa: F403,F401
 
 DEBUG = os.getenv("DJANGO_DEBUG", "False").lower() in {"1", "true", "yes", "on"}
@@ -36,6 +38,21 @@ else:
         }
     }
 
+# Workers and dynos share version tokens (e.g. the lexicon snapshot) and counters through
+# the cache, and they are read on every request, so production keeps them in Redis.
+redis_url = os.getenv("REDIS_URL")
+if redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+            # Heroku Redis serves TLS with a self-signed certificate.
+            "OPTIONS": {"ssl_cert_reqs": None} if urlparse(redis_url).scheme == "rediss" else {},
+        }
+    }
+elif database_url:
+    raise ImproperlyConfigured("REDIS_URL must be set so every worker shares one cache.")
+
 ALLOWED_HOSTS = list(dict.fromkeys([*ALLOWED_HOSTS, HEROKU_APP_HOST]))  # noqa: F405
 
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", f"https://{HEROKU_APP_HOST}")
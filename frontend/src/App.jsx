@@ -38,7 +38,7 @@ function App() {
   const fetchPracticeHistory = async () => {
     try {
       const data = await request('/api/practice/history/')
-      setHistory(data)
+      setHistory(data.results)
       console.log('Practice history:', data)
       setMessage('Loaded practice history successfully.')
     } catch (error) {
@@ -46,14 +46,13 @@ function App() {
     }
   }
 
-  const createAndFetchPracticeSession = async () => {
+  const createPracticeSession = async () => {
     try {
       const created = await request('/api/practice/sessions/', {
         method: 'POST',
-        body: JSON.stringify({ planned_item_count: 10 }),
+        body: JSON.stringify({ planned_item_count: 10, include_session: true }),
       })
-      const detail = await request(`/api/practice/sessions/${created.id}/`)
-      setSession(detail)
+      setSession(created)
       setMessage(`Created and loaded practice session ${created.id}.`)
     } catch (error) {
       setMessage(`Practice session flow failed: ${error.message}`)
@@ -67,7 +66,7 @@ function App() {
       <div style={{ display: 'flex', gap: '0.75rem', marginBottom: '1rem' }}>
         <button onClick={fetchWords}>Fetch /api/words/</button>
         <button onClick={fetchPracticeHistory}>Fetch /api/practice/history/</button>
-        <button onClick={createAndFetchPracticeSession}>POST+GET practice session</button>
+        <button onClick={createPracticeSession}>POST practice session</button>
       </div>
       {message && <p>{message}</p>}
 